@@ -1,101 +1,45 @@
-
-import csv
+"""
+2021 Cleanup
+Removes every 2021-11-21 election (presidential, senate and diputados) with
+its results, candidacies, memberships and terms by dropping their partitions
+(partitions.py), then collects the people, parties and jurisdictions only
+those elections referenced (cascade_delete.py). The first run partitions
+data/ if it isn't yet.
+
+Usage:
+    python3 clean_2021.py
+    python3 clean_2021.py --keep-orphans   # leave unreferenced people/parties in place
+"""
+import argparse
 import os
-import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cascade_delete import remove_elections
+from export_parquet import export_after_merge
+from rollups import rollup_after_merge
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
 ELECTION_DATE = "2021-11-21"
-TERM_START_DATE = "2022-03-11"
 
-def clean_csvs():
+def clean_csvs(collect_orphans=True):
     print("🧹 Cleaning 2021 Election Data...")
-    
-    # 1. Identify Election IDs to remove
-    election_ids_to_remove = set()
-    
-    elections_path = os.path.join(DATA_DIR, "wp_politeia_elections.csv")
-    temp_elections = os.path.join(DATA_DIR, "wp_politeia_elections.tmp")
-    
-    if os.path.exists(elections_path):
-        with open(elections_path, 'r', encoding='utf-8') as f_in, \
-             open(temp_elections, 'w', encoding='utf-8', newline='') as f_out:
-            
-            reader = csv.DictReader(f_in)
-            writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames)
-            writer.writeheader()
-            
-            for row in reader:
-                if row['election_date'] == ELECTION_DATE:
-                    election_ids_to_remove.add(row['id'])
-                else:
-                    writer.writerow(row)
-        
-        shutil.move(temp_elections, elections_path)
-        print(f"  - Removed {len(election_ids_to_remove)} elections from wp_politeia_elections.csv")
-    
-    if not election_ids_to_remove:
+
+    removed = remove_elections(ELECTION_DATE, data_dir=DATA_DIR, collect=collect_orphans)
+    if not removed:
         print("  - No 2021 elections found to clean.")
         return
 
-    # 2. Clean wp_politeia_election_results
-    clean_by_election_id("wp_politeia_election_results", election_ids_to_remove)
-    
-    # 3. Clean wp_politeia_candidacies
-    clean_by_election_id("wp_politeia_candidacies", election_ids_to_remove)
-    
-    # 4. Clean wp_politeia_party_memberships (by date)
-    clean_by_date("wp_politeia_party_memberships", "started_on", ELECTION_DATE)
-    
-    # 5. Clean wp_politeia_office_terms (by date)
-    clean_by_date("wp_politeia_office_terms", "started_on", TERM_START_DATE)
-
+    for table, rows in removed.items():
+        print(f"  - Removed {rows} rows from {table}.csv")
+    rollup_after_merge(DATA_DIR)
+    export_after_merge(DATA_DIR)
     print("✅ Cleanup Complete.")
 
-def clean_by_election_id(table_name, election_ids):
-    file_path = os.path.join(DATA_DIR, f"{table_name}.csv")
-    temp_path = os.path.join(DATA_DIR, f"{table_name}.tmp")
-    
-    if os.path.exists(file_path):
-        removed_count = 0
-        with open(file_path, 'r', encoding='utf-8') as f_in, \
-             open(temp_path, 'w', encoding='utf-8', newline='') as f_out:
-            
-            reader = csv.DictReader(f_in)
-            writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames)
-            writer.writeheader()
-            
-            for row in reader:
-                if row['election_id'] in election_ids:
-                    removed_count += 1
-                else:
-                    writer.writerow(row)
-        
-        shutil.move(temp_path, file_path)
-        print(f"  - Removed {removed_count} rows from {table_name}.csv")
-
-def clean_by_date(table_name, date_col, target_date):
-    file_path = os.path.join(DATA_DIR, f"{table_name}.csv")
-    temp_path = os.path.join(DATA_DIR, f"{table_name}.tmp")
-    
-    if os.path.exists(file_path):
-        removed_count = 0
-        with open(file_path, 'r', encoding='utf-8') as f_in, \
-             open(temp_path, 'w', encoding='utf-8', newline='') as f_out:
-            
-            reader = csv.DictReader(f_in)
-            writer = csv.DictWriter(f_out, fieldnames=reader.fieldnames)
-            writer.writeheader()
-            
-            for row in reader:
-                if row[date_col] == target_date:
-                    removed_count += 1
-                else:
-                    writer.writerow(row)
-        
-        shutil.move(temp_path, file_path)
-        print(f"  - Removed {removed_count} rows from {table_name}.csv")
-
 if __name__ == "__main__":
-    clean_csvs()
+    parser = argparse.ArgumentParser(description="Remove the 2021 elections from the master CSVs")
+    parser.add_argument("--keep-orphans", action="store_true", help="Don't collect unreferenced people/parties/places")
+    args = parser.parse_args()
+    clean_csvs(collect_orphans=not args.keep_orphans)
@@ -1,11 +1,30 @@
 """
 2021 Presidential Election Data Consolidation Script
 Consolidates JSON data from regions into the master CSV files.
+
+Two phases: the region files are parsed and normalized in a process pool
+(parse_pool.py), then merged one by one in a single pass that only assigns
+IDs and writes rows.
+
+Usage:
+    python3 consolidate_2021.py               # one parse process per core
+    python3 consolidate_2021.py --workers 1   # parse in this process
 """
-import json
+import argparse
 import csv
 import os
-from datetime import datetime
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from state_index import StateIndex
+from table_writer import TableSet
+from export_parquet import export_after_merge
+from partitions import sync_after_merge
+from rollups import rollup_after_merge
+from gazetteer import JurisdictionCache, jurisdiction_values
+from parse_pool import FILE_NOT_FOUND, parse_files, parse_results_file
+from party_normalizer import PartyRegistry, alias_cache_path
+from person_resolver import PersonResolver, match_cache_path
 
 # Resolve paths relative to this script
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -47,17 +66,13 @@ REGION_NAMES = {
     "XII": "Región de Magallanes y de la Antártica Chilena"
 }
 
-def now():
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
 class Merger:
     def __init__(self):
         self.ids = {}
-        self.cache_people = {}  # "Given Paternal" -> id
-        self.cache_parties = {} # "Party Name" -> id
-        self.cache_jurisdictions = {} # "Name" -> id
-        self.writers = {}
-        self.files = {}
+        self.people = PersonResolver(match_cache_path(DATA_DIR))  # name variants -> id
+        self.parties = PartyRegistry(alias_cache_path(DATA_DIR))  # raw party strings -> id
+        self.jurisdictions = JurisdictionCache()  # any spelling of a place -> id
+        self.tables = None
         
     def load_current_state(self):
         print(f"Loading current state from {DATA_DIR}...")
@@ -66,6 +81,23 @@ class Merger:
             print(f"Creating data directory: {DATA_DIR}")
             os.makedirs(DATA_DIR)
 
+        # Sidecar index (shared with consolidate_senators_2021.py); a full scan
+        # only happens when a table changed outside the mergers
+        self.index = StateIndex(DATA_DIR, TABLES)
+        state = self.index.load()
+        if state is not None:
+            self.ids = state["ids"]
+            for name, person_id in state["people"].items():
+                self.people.add(person_id, name)
+            for name, party_id in state["parties"].items():
+                self.parties.add(party_id, name)
+            self.jurisdictions.load(state["jurisdictions"])
+            self.people.load_matches()
+            print("  (from state index)")
+            for table in TABLES:
+                print(f"  {table}: Next ID {self.ids[table]}")
+            return
+
         # 1. Load Max IDs and Caches
         for table in TABLES:
             file_path = os.path.join(DATA_DIR, f"{table}.csv")
@@ -84,221 +116,131 @@ class Merger:
                         # Populate Caches
                         if table == "wp_politeia_people":
                             full_name = f"{row['given_names']} {row['paternal_surname']}".strip()
-                            self.cache_people[full_name] = curr_id
+                            self.people.add(curr_id, full_name)
                             
                         elif table == "wp_politeia_political_parties":
-                            self.cache_parties[row['official_name']] = curr_id
+                            self.parties.add(curr_id, row['official_name'])
                             
                         elif table == "wp_politeia_jurisdictions":
-                            self.cache_jurisdictions[row['official_name']] = curr_id
+                            self.jurisdictions.add(curr_id, row['official_name'], row['type'])
                             
             self.ids[table] = max_id + 1
             print(f"  {table}: Next ID {self.ids[table]}")
+        self.people.load_matches()
 
     def open_append_writers(self):
-        for table, cols in TABLES.items():
-            file_path = os.path.join(DATA_DIR, f"{table}.csv")
-            # If file doesn't exist, write header
-            file_exists = os.path.exists(file_path)
-            
-            f = open(file_path, "a", newline="", encoding="utf-8")
-            w = csv.DictWriter(f, fieldnames=cols)
-            
-            if not file_exists:
-                w.writeheader()
-                
-            self.files[table] = f
-            self.writers[table] = w
+        # Buffered appends; missing files get a header
+        self.tables = TableSet.open_csv(DATA_DIR, TABLES, ids=self.ids)
 
     def close(self):
-        for f in self.files.values():
-            f.close()
+        self.tables.close()
+        self.people.save_matches()
+        self.parties.save_aliases()
+        self.people.report()
+        self.index.save({
+            "ids": self.ids,
+            "people": self.people.names,
+            "parties": self.parties.names,
+            "jurisdictions": self.jurisdictions.names
+        })
+
+    def merge_regions(self, regions, workers=None):
+        """
+        [(json_file, region_name)]: phase one parses and normalizes every file
+        in a process pool (parse_pool.py), phase two merges them in order
+        """
+        parsed = parse_files(parse_results_file, [path for path, _ in regions], workers)
+        for (_, region_name), source in zip(regions, parsed):
+            self.merge_parsed(source, region_name)
 
     def merge_region(self, json_file, region_name):
-        print(f"\nMerging {os.path.basename(json_file)}...")
+        self.merge_regions([(json_file, region_name)], workers=1)
+
+    def merge_parsed(self, source, region_name):
+        """Allocates IDs and writes the rows of one parsed region file"""
+        print(f"\nMerging {os.path.basename(source.path)}...")
         
-        if not os.path.exists(json_file):
-            print(f"  ⚠️ File not found: {json_file}")
+        if source.error == FILE_NOT_FOUND:
+            print(f"  ⚠️ File not found: {source.path}")
+            return
+        if source.error:
+            print(f"  ❌ Skipping: {source.error}")
             return
-
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
             
         # 1. Ensure Region Jurisdiction
-        if region_name in self.cache_jurisdictions:
-            region_id = self.cache_jurisdictions[region_name]
-        else:
-            region_id = self.ids["wp_politeia_jurisdictions"]
-            self.writers["wp_politeia_jurisdictions"].writerow({
-                "id": region_id,
-                "official_name": region_name,
-                "common_name": region_name,
-                "type": "REGION",
-                "parent_id": "",
-                "external_code": "",
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.cache_jurisdictions[region_name] = region_id
-            self.ids["wp_politeia_jurisdictions"] += 1
+        region_id = self.jurisdictions.get(region_name, "REGION")
+        if region_id is None:
+            region_id = self.tables.insert("wp_politeia_jurisdictions", *jurisdiction_values(region_name, "REGION"))
+            self.jurisdictions.created(region_id, region_name, "REGION")
             print(f"  Created Region: {region_name} (ID {region_id})")
 
         # 2. Process Communes
-        for commune_data in data:
-            commune_name = commune_data['commune']
+        for record in source.records:
+            commune_name = record.name
             
             # Jurisdiction (Commune)
-            if commune_name in self.cache_jurisdictions:
-                commune_id = self.cache_jurisdictions[commune_name]
-            else:
-                commune_id = self.ids["wp_politeia_jurisdictions"]
-                self.writers["wp_politeia_jurisdictions"].writerow({
-                    "id": commune_id,
-                    "official_name": commune_name,
-                    "common_name": commune_name,
-                    "type": "COMMUNE",
-                    "parent_id": region_id,
-                    "external_code": "",
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.cache_jurisdictions[commune_name] = commune_id
-                self.ids["wp_politeia_jurisdictions"] += 1
+            commune_id = self.jurisdictions.get(commune_name, "COMMUNE")
+            if commune_id is None:
+                commune_id = self.tables.insert("wp_politeia_jurisdictions",
+                                                *jurisdiction_values(commune_name, "COMMUNE", region_id))
+                self.jurisdictions.created(commune_id, commune_name, "COMMUNE")
             
             # Election
-            election_id = self.ids["wp_politeia_elections"]
-            self.writers["wp_politeia_elections"].writerow({
-                "id": election_id,
-                "office_id": OFFICE_PRESIDENTE,
-                "jurisdiction_id": commune_id,
-                "election_date": ELECTION_DATE,
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.ids["wp_politeia_elections"] += 1
+            election_id = self.tables.insert("wp_politeia_elections",
+                                             OFFICE_PRESIDENTE, commune_id, ELECTION_DATE)
             
             # Results
-            stats = commune_data['stats']
-            self.writers["wp_politeia_election_results"].writerow({
-                "id": self.ids["wp_politeia_election_results"],
-                "election_id": election_id,
-                "jurisdiction_id": commune_id,
-                "valid_votes": stats.get('valid_votes', 0),
-                "blank_votes": stats.get('blank_votes', 0),
-                "null_votes": stats.get('null_votes', 0),
-                "total_votes": stats.get('total_votes', 0),
-                "participation_rate": stats.get('participation_rate', 0),
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.ids["wp_politeia_election_results"] += 1
+            self.tables.insert("wp_politeia_election_results", election_id, commune_id, *record.stats)
             
             # Candidates
-            for cand in commune_data['candidates']:
-                name = cand['name']
-                party_name = cand['party']
-                
+            for cand in record.candidates:
                 # Person
-                if name in self.cache_people:
-                    person_id = self.cache_people[name]
-                else:
-                    person_id = self.ids["wp_politeia_people"]
-                    parts = name.strip().split()
-                    if len(parts) >= 2:
-                        given = " ".join(parts[:-1])
-                        paternal = parts[-1]
-                    else:
-                        given = parts[0] if parts else "Unknown"
-                        paternal = ""
-                        
-                    self.writers["wp_politeia_people"].writerow({
-                        "id": person_id,
-                        "given_names": given,
-                        "paternal_surname": paternal,
-                        "created_at": now(),
-                        "updated_at": now()
-                    })
-                    self.cache_people[name] = person_id
-                    self.ids["wp_politeia_people"] += 1
+                person_id = self.people.resolve(cand.name, cand.tokens)
+                if person_id is None:
+                    person_id = self.tables.insert("wp_politeia_people", cand.given, cand.paternal)
+                    self.people.created(person_id, cand.name)
                     
                 # Party
-                if party_name in self.cache_parties:
-                    party_id = self.cache_parties[party_name]
-                else:
-                    party_id = self.ids["wp_politeia_political_parties"]
-                    short = party_name.split(" - ")[0].strip() if " - " in party_name else ""
-                    
-                    self.writers["wp_politeia_political_parties"].writerow({
-                        "id": party_id,
-                        "official_name": party_name,
-                        "short_name": short,
-                        "created_at": now(),
-                        "updated_at": now()
-                    })
-                    self.cache_parties[party_name] = party_id
-                    self.ids["wp_politeia_political_parties"] += 1
+                party_id = self.parties.resolve(cand.party, cand.party_info)
+                if party_id is None:
+                    info = self.parties.parse(cand.party)
+                    party_id = self.tables.insert("wp_politeia_political_parties", info.party, info.short_name)
+                    self.parties.created(party_id, cand.party)
                     
                 # Candidacy
-                self.writers["wp_politeia_candidacies"].writerow({
-                    "id": self.ids["wp_politeia_candidacies"],
-                    "election_id": election_id,
-                    "person_id": person_id,
-                    "party_id": party_id,
-                    "votes": cand['votes'],
-                    "vote_share": cand['percentage'],
-                    "elected": 1 if cand['elected'] else 0,
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.ids["wp_politeia_candidacies"] += 1
+                self.tables.insert("wp_politeia_candidacies",
+                                   election_id, person_id, party_id, cand.votes, cand.percentage, cand.elected)
                 
                 # Membership
-                self.writers["wp_politeia_party_memberships"].writerow({
-                    "id": self.ids["wp_politeia_party_memberships"],
-                    "person_id": person_id,
-                    "party_id": party_id,
-                    "started_on": ELECTION_DATE,
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.ids["wp_politeia_party_memberships"] += 1
+                self.tables.insert("wp_politeia_party_memberships",
+                                   person_id, party_id, ELECTION_DATE)
                 
                 # Office Term
-                if cand['elected']:
-                    self.writers["wp_politeia_office_terms"].writerow({
-                        "id": self.ids["wp_politeia_office_terms"],
-                        "person_id": person_id,
-                        "office_id": OFFICE_PRESIDENTE,
-                        "jurisdiction_id": commune_id,
-                        "started_on": TERM_START_DATE,
-                        "status": "ACTIVE",
-                        "created_at": now(),
-                        "updated_at": now()
-                    })
-                    self.ids["wp_politeia_office_terms"] += 1
+                if cand.elected:
+                    self.tables.insert("wp_politeia_office_terms",
+                                       person_id, OFFICE_PRESIDENTE, commune_id, TERM_START_DATE, "ACTIVE")
         
-        print(f"✓ Merged {len(data)} communes from {region_name}")
+        print(f"✓ Merged {len(source.records)} communes from {region_name}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the 2021 presidential region JSONs into the master CSVs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes parsing the region files (default: one per core; 1 = no pool)")
+    args = parser.parse_args()
+
     merger = Merger()
     merger.load_current_state()
     merger.open_append_writers()
     
-    # Iterate through all configured regions
-    for code, name in REGION_NAMES.items():
-        # Construct path: BASE_DIR / GhostMouse / scraped_data_2021_presidentes / CODE / region_{code}_data.json
-        # BASE_DIR is root of politeia-db-scrapper
-        # So BASE_DIR/GhostMouse/scraped_data_2021_presidentes...
-        
-        json_filename = f"region_{code.lower()}_data.json"
-        
-        # NOTE: BASE_DIR in this script was defined as os.path.dirname(script_dir)
-        # script_dir is GhostMouse
-        # so BASE_DIR is project root
-        
-        json_path = os.path.join(BASE_DIR, "GhostMouse", "scraped_data_2021_presidentes", code, json_filename)
-        
-        merger.merge_region(json_path, name)
+    # All configured regions:
+    # BASE_DIR / GhostMouse / scraped_data_2021_presidentes / CODE / region_{code}_data.json
+    regions = [(os.path.join(BASE_DIR, "GhostMouse", "scraped_data_2021_presidentes", code,
+                             f"region_{code.lower()}_data.json"), name)
+               for code, name in REGION_NAMES.items()]
+    merger.merge_regions(regions, args.workers)
         
     merger.close()
     print("\n✓ All available 2021 data merged into master CSVs!")
+    sync_after_merge(DATA_DIR)
+    rollup_after_merge(DATA_DIR)
+    export_after_merge(DATA_DIR)
@@ -0,0 +1,288 @@
+"""
+2021 Diputados Consolidation Script
+Merges the diputados JSONs written by scraper_2021_diputados.py
+(scrap_data_2021_diputados/<CODE>/region_<code>_diputados.json, nested
+distritos -> pactos -> candidatos) into the master CSVs.
+
+Districts are streamed: one region file is open at a time and each district
+is normalized (parse_pool.parse_district), merged and released before the
+next, so memory stays flat whatever the number of districts and candidates.
+Every district becomes a DISTRICT jurisdiction under its region with one
+election (office 4) and one result row. IDs are allocated per district in
+blocks: its new parties first, then its new people, then the election,
+candidacy, membership and term rows.
+
+Pacts go into the raw party string ("IND ( UDI ) - Chile Podemos +"), so
+parse_party gives party, coalition and status like for the other sources
+and the party alias file keeps the pact per raw string; the tables have no
+pact column yet.
+
+The RM scrape lists district 13 twice (district 14 is missing); a district
+seen before is skipped. So is a district that already has its office 4
+election on ELECTION_DATE in wp_politeia_elections, which makes re-running
+the script safe; to reload changed districts, remove them first
+(cascade_delete.py 2021-11-21 --office 4).
+
+Usage:
+    python3 consolidate_diputados_2021.py
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from state_index import StateIndex
+from table_writer import TableSet
+from export_parquet import export_after_merge
+from partitions import sync_after_merge
+from rollups import rollup_after_merge
+from gazetteer import JurisdictionCache, canonical_name, jurisdiction_values, lookup
+from parse_pool import SourceError, parse_district
+from party_normalizer import PartyRegistry, alias_cache_path
+from person_resolver import PersonResolver, match_cache_path
+
+# Paths
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrap_data_2021_diputados")
+
+# Constants
+OFFICE_DIPUTADO = 4
+ELECTION_DATE = "2021-11-21"
+TERM_START_DATE = "2022-03-11"
+DISTRICT = "DISTRICT"
+
+# Tables
+TABLES = {
+    "wp_politeia_jurisdictions": ["id", "official_name", "common_name", "type", "parent_id", "external_code", "created_at", "updated_at"],
+    "wp_politeia_elections": ["id", "office_id", "jurisdiction_id", "election_date", "created_at", "updated_at"],
+    "wp_politeia_election_results": ["id", "election_id", "jurisdiction_id", "valid_votes", "blank_votes", "null_votes", "total_votes", "participation_rate", "created_at", "updated_at"],
+    "wp_politeia_candidacies": ["id", "election_id", "person_id", "party_id", "votes", "vote_share", "elected", "created_at", "updated_at"],
+    "wp_politeia_political_parties": ["id", "official_name", "short_name", "created_at", "updated_at"],
+    "wp_politeia_party_memberships": ["id", "person_id", "party_id", "started_on", "created_at", "updated_at"],
+    "wp_politeia_office_terms": ["id", "person_id", "office_id", "jurisdiction_id", "started_on", "status", "created_at", "updated_at"],
+    "wp_politeia_people": ["id", "given_names", "paternal_surname", "created_at", "updated_at"]
+}
+
+def district_name(number):
+    return f"Distrito {number}"
+
+class DiputadosMerger:
+    def __init__(self):
+        self.ids = {}
+        self.people = PersonResolver(match_cache_path(DATA_DIR))  # name variants -> id
+        self.parties = PartyRegistry(alias_cache_path(DATA_DIR))  # raw party strings -> id
+        self.jurisdictions = JurisdictionCache()  # any spelling of a place -> id
+        self.tables = None
+        self.seen = set()  # district numbers merged in this run
+        self.elections = {}  # district jurisdiction id -> its election id (office 4, ELECTION_DATE)
+        self.counts = {"districts": 0, "candidates": 0, "elected": 0, "existing": 0}
+
+    def load_state(self):
+        print("Loading current DB state...")
+        # Sidecar index (shared with the other consolidators); a full scan
+        # only happens when a table changed outside the mergers
+        self.index = StateIndex(DATA_DIR, TABLES)
+        state = self.index.load()
+        if state is not None:
+            self.ids = state["ids"]
+            for name, person_id in state["people"].items():
+                self.people.add(person_id, name)
+            for name, party_id in state["parties"].items():
+                self.parties.add(party_id, name)
+            self.jurisdictions.load(state["jurisdictions"])
+            self.people.load_matches()
+            for table in TABLES:
+                print(f"  {table}: next_id={self.ids[table]} (indexed)")
+            self.load_elections()
+            return
+
+        for table in TABLES:
+            file_path = os.path.join(DATA_DIR, f"{table}.csv")
+            max_id = 0
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    reader = csv.DictReader(f)
+                    for row in reader:
+                        curr_id = int(row['id'])
+                        if curr_id > max_id:
+                            max_id = curr_id
+
+                        # Populate caches
+                        if table == "wp_politeia_people":
+                            full = f"{row['given_names']} {row['paternal_surname']}".strip()
+                            self.people.add(curr_id, full)
+                        elif table == "wp_politeia_political_parties":
+                            self.parties.add(curr_id, row['official_name'])
+                        elif table == "wp_politeia_jurisdictions":
+                            self.jurisdictions.add(curr_id, row['official_name'], row['type'])
+
+            self.ids[table] = max_id + 1
+            print(f"  {table}: next_id={self.ids[table]}")
+        self.people.load_matches()
+        self.load_elections()
+
+    def load_elections(self):
+        """Diputados elections already in the table (a re-run skips their districts)"""
+        file_path = os.path.join(DATA_DIR, "wp_politeia_elections.csv")
+        if not os.path.exists(file_path):
+            return
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row['office_id'] == str(OFFICE_DIPUTADO) and row['election_date'] == ELECTION_DATE:
+                    self.elections[int(row['jurisdiction_id'])] = int(row['id'])
+        if self.elections:
+            print(f"  {len(self.elections)} diputados district(s) already merged")
+
+    def open_writers(self):
+        self.tables = TableSet.open_csv(DATA_DIR, TABLES, ids=self.ids)
+
+    def close_writers(self):
+        self.tables.close()
+        self.people.save_matches()
+        self.parties.save_aliases()
+        self.people.report()
+        self.index.save({
+            "ids": self.ids,
+            "people": self.people.names,
+            "parties": self.parties.names,
+            "jurisdictions": self.jurisdictions.names
+        })
+
+    def source_files(self):
+        paths = []
+        for root, dirs, files in os.walk(SOURCE_DIR):
+            for file in files:
+                if file.endswith("_diputados.json"):
+                    paths.append(os.path.join(root, file))
+        return sorted(paths)
+
+    def process_directory(self):
+        print(f"Scanning {SOURCE_DIR}...")
+        for path in self.source_files():
+            self.process_file(path)
+        print(f"\n✓ {self.counts['districts']} districts, {self.counts['candidates']} candidates, "
+              f"{self.counts['elected']} elected ({self.counts['existing']} already merged)")
+
+    def region_id(self, code):
+        """Jurisdiction id of a region code ("RM", "XV"), created if missing"""
+        if lookup(code, "REGION") is None:
+            return None
+        region_id = self.jurisdictions.get(code, "REGION")
+        if region_id is None:
+            region_name = canonical_name(code, "REGION")
+            region_id = self.tables.insert("wp_politeia_jurisdictions", *jurisdiction_values(region_name, "REGION"))
+            self.jurisdictions.created(region_id, region_name, "REGION")
+            print(f"  Created Region: {region_name} (ID {region_id})")
+        return region_id
+
+    def process_file(self, json_path):
+        """Merges the districts of one region file, one at a time"""
+        name = os.path.basename(json_path)
+        print(f"\nProcessing {name}...")
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except ValueError as e:
+            print(f"  ❌ Skipping: {e}")
+            return
+        if not isinstance(data, dict) or not isinstance(data.get("distritos"), list):
+            print("  ❌ Skipping: no distritos list")
+            return
+
+        # region_name holds whatever the page header said; the code is reliable
+        code = data.get("region_code") or os.path.basename(os.path.dirname(json_path))
+        region_id = self.region_id(code)
+        if region_id is None:
+            print(f"  ⚠️ Unknown region code {code!r}, skipping")
+            return
+
+        for entry in data["distritos"]:
+            try:
+                district = parse_district(entry, name)
+            except SourceError as e:
+                print(f"  ❌ Skipping district: {e}")
+                continue
+            if district.number in self.seen:
+                print(f"  ⚠️ Distrito {district.number} listed again, skipping")
+                continue
+            self.seen.add(district.number)
+            self.merge_district(district, region_id)
+
+    def merge_district(self, district, region_id):
+        """Allocates the district's IDs in blocks and writes its rows"""
+        name = district_name(district.number)
+        district_id = self.jurisdictions.get(name, DISTRICT)
+        if district_id is None:
+            district_id = self.tables.insert("wp_politeia_jurisdictions",
+                                             *jurisdiction_values(name, DISTRICT, region_id))
+            self.jurisdictions.created(district_id, name, DISTRICT)
+        if district_id in self.elections:
+            self.counts["existing"] += 1
+            print(f"  ↷ {name} already merged (election {self.elections[district_id]}), skipping")
+            return
+
+        # 1. Parties: each raw string of the district once
+        party_ids = {}
+        for cand in district.candidates:
+            if cand.party in party_ids:
+                continue
+            party_id = self.parties.resolve(cand.party, cand.party_info)
+            if party_id is None:
+                info = self.parties.parse(cand.party)
+                party_id = self.tables.insert("wp_politeia_political_parties", info.party, info.short_name)
+                self.parties.created(party_id, cand.party)
+            party_ids[cand.party] = party_id
+
+        # 2. People
+        person_ids = []
+        for cand in district.candidates:
+            person_id = self.people.resolve(cand.name, cand.tokens)
+            if person_id is None:
+                person_id = self.tables.insert("wp_politeia_people", cand.given, cand.paternal)
+                self.people.created(person_id, cand.name)
+            person_ids.append(person_id)
+
+        # 3. Election and results
+        election_id = self.tables.insert("wp_politeia_elections", OFFICE_DIPUTADO, district_id, ELECTION_DATE)
+        self.elections[district_id] = election_id
+        self.tables.insert("wp_politeia_election_results", election_id, district_id, *district.stats)
+
+        # 4. Candidacies, memberships, terms
+        rows = list(zip(district.candidates, person_ids))
+        for cand, person_id in rows:
+            self.tables.insert("wp_politeia_candidacies", election_id, person_id, party_ids[cand.party],
+                               cand.votes, cand.percentage, cand.elected)
+        for cand, person_id in rows:
+            self.tables.insert("wp_politeia_party_memberships", person_id, party_ids[cand.party], ELECTION_DATE)
+        elected = 0
+        for cand, person_id in rows:
+            if cand.elected:
+                self.tables.insert("wp_politeia_office_terms",
+                                   person_id, OFFICE_DIPUTADO, district_id, TERM_START_DATE, "ACTIVE")
+                elected += 1
+
+        if district.seats and elected != district.seats:
+            print(f"  ⚠️ {name}: {elected} elected for {district.seats} seats")
+        self.counts["districts"] += 1
+        self.counts["candidates"] += len(district.candidates)
+        self.counts["elected"] += elected
+        print(f"  ✓ {name}: {len(district.candidates)} candidates, {elected} elected")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the 2021 diputados district JSONs into the master CSVs")
+    parser.parse_args()
+
+    merger = DiputadosMerger()
+    merger.load_state()
+    merger.open_writers()
+    try:
+        merger.process_directory()
+        print("\n✅ Consolidation Complete!")
+    finally:
+        merger.close_writers()
+    sync_after_merge(DATA_DIR)
+    rollup_after_merge(DATA_DIR)
+    export_after_merge(DATA_DIR)
@@ -1,7 +1,30 @@
-import json
+"""
+2021 Senator Consolidation Script
+Merges the senator race JSONs (one region per file) into the master CSVs.
+
+Two phases: the files are parsed and normalized in a process pool
+(parse_pool.py), then merged one by one in a single pass that only assigns
+IDs and writes rows.
+
+Usage:
+    python3 consolidate_senators_2021.py               # one parse process per core
+    python3 consolidate_senators_2021.py --workers 1   # parse in this process
+"""
+import argparse
 import csv
 import os
-from datetime import datetime
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from state_index import StateIndex
+from table_writer import TableSet
+from export_parquet import export_after_merge
+from partitions import sync_after_merge
+from rollups import rollup_after_merge
+from gazetteer import JurisdictionCache, jurisdiction_values
+from parse_pool import parse_files, parse_senator_file
+from party_normalizer import PartyRegistry, alias_cache_path
+from person_resolver import PersonResolver, match_cache_path
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -25,20 +48,32 @@ TABLES = {
     "wp_politeia_people": ["id", "given_names", "paternal_surname", "created_at", "updated_at"]
 }
 
-def now():
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
 class SenatorMerger:
     def __init__(self):
         self.ids = {}
-        self.cache_people = {}  # "Given Paternal" -> id
-        self.cache_parties = {} # "Party Name" -> id
-        self.cache_jurisdictions = {} # "Name" -> id
-        self.writers = {}
-        self.files = {}
+        self.people = PersonResolver(match_cache_path(DATA_DIR))  # name variants -> id
+        self.parties = PartyRegistry(alias_cache_path(DATA_DIR))  # raw party strings -> id
+        self.jurisdictions = JurisdictionCache()  # any spelling of a place -> id
+        self.tables = None
 
     def load_state(self):
         print("Loading current DB state...")
+        # Sidecar index (shared with consolidate_2021.py); a full scan only
+        # happens when a table changed outside the mergers
+        self.index = StateIndex(DATA_DIR, TABLES)
+        state = self.index.load()
+        if state is not None:
+            self.ids = state["ids"]
+            for name, person_id in state["people"].items():
+                self.people.add(person_id, name)
+            for name, party_id in state["parties"].items():
+                self.parties.add(party_id, name)
+            self.jurisdictions.load(state["jurisdictions"])
+            self.people.load_matches()
+            for table in TABLES:
+                print(f"  {table}: next_id={self.ids[table]} (indexed)")
+            return
+
         for table in TABLES:
             file_path = os.path.join(DATA_DIR, f"{table}.csv")
             max_id = 0
@@ -53,189 +88,117 @@ class SenatorMerger:
                         # Populate caches
                         if table == "wp_politeia_people":
                             full = f"{row['given_names']} {row['paternal_surname']}".strip()
-                            self.cache_people[full] = curr_id
+                            self.people.add(curr_id, full)
                         elif table == "wp_politeia_political_parties":
-                            self.cache_parties[row['official_name']] = curr_id
+                            self.parties.add(curr_id, row['official_name'])
                         elif table == "wp_politeia_jurisdictions":
-                            self.cache_jurisdictions[row['official_name']] = curr_id
+                            self.jurisdictions.add(curr_id, row['official_name'], row['type'])
             
             self.ids[table] = max_id + 1
             print(f"  {table}: next_id={self.ids[table]}")
+        self.people.load_matches()
 
     def open_writers(self):
-        for table, cols in TABLES.items():
-            f = open(os.path.join(DATA_DIR, f"{table}.csv"), "a", newline="", encoding="utf-8")
-            w = csv.DictWriter(f, fieldnames=cols)
-            self.files[table] = f
-            self.writers[table] = w
+        self.tables = TableSet.open_csv(DATA_DIR, TABLES, ids=self.ids)
 
     def close_writers(self):
-        for f in self.files.values():
-            f.close()
+        self.tables.close()
+        self.people.save_matches()
+        self.parties.save_aliases()
+        self.people.report()
+        self.index.save({
+            "ids": self.ids,
+            "people": self.people.names,
+            "parties": self.parties.names,
+            "jurisdictions": self.jurisdictions.names
+        })
 
-    def process_directory(self):
+    def process_directory(self, workers=None):
+        """
+        Phase one parses and normalizes every *_data.json under SOURCE_DIR in
+        a process pool (parse_pool.py); phase two merges them in walk order
+        """
         print(f"Scanning {SOURCE_DIR}...")
+        paths = []
         for root, dirs, files in os.walk(SOURCE_DIR):
             for file in files:
                 if file.endswith("_data.json"):
-                    path = os.path.join(root, file)
-                    self.process_file(path)
+                    paths.append(os.path.join(root, file))
+        for source in parse_files(parse_senator_file, paths, workers):
+            self.process_parsed(source)
 
     def process_file(self, json_path):
-        print(f"\nProcessing {os.path.basename(json_path)}...")
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Handle list structure (some files might be wrapped in list)
-        if isinstance(data, list):
-            data = data[0]
+        self.process_parsed(parse_senator_file(json_path))
 
-        region_name = data.get('commune') # mapped to region name in previous steps
-        if not region_name:
-            print("  ❌ Skipping: No 'commune/region' name found")
+    def process_parsed(self, source):
+        """Allocates IDs and writes the rows of one parsed senator file"""
+        print(f"\nProcessing {os.path.basename(source.path)}...")
+        if source.error or not source.records:
+            print(f"  ❌ Skipping: {source.error or 'no entries'}")
             return
 
+        record = source.records[0]
+        region_name = record.name # mapped to region name in previous steps
+
         # 1. Resolve Jurisdiction (Region)
-        if region_name in self.cache_jurisdictions:
-            region_id = self.cache_jurisdictions[region_name]
-        else:
+        region_id = self.jurisdictions.get(region_name, "REGION")
+        if region_id is None:
             # Create Region if not exists (unlikely given previous scraping)
-            region_id = self.ids["wp_politeia_jurisdictions"]
-            self.writers["wp_politeia_jurisdictions"].writerow({
-                "id": region_id,
-                "official_name": region_name,
-                "common_name": region_name,
-                "type": "REGION",
-                "parent_id": "",
-                "external_code": "",
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.cache_jurisdictions[region_name] = region_id
-            self.ids["wp_politeia_jurisdictions"] += 1
+            region_id = self.tables.insert("wp_politeia_jurisdictions", *jurisdiction_values(region_name, "REGION"))
+            self.jurisdictions.created(region_id, region_name, "REGION")
             print(f"  Created Region: {region_name} (ID {region_id})")
 
         # 2. Create Election (Senator for this Region)
-        election_id = self.ids["wp_politeia_elections"]
-        self.writers["wp_politeia_elections"].writerow({
-            "id": election_id,
-            "office_id": OFFICE_SENATOR,
-            "jurisdiction_id": region_id,
-            "election_date": ELECTION_DATE,
-            "created_at": now(),
-            "updated_at": now()
-        })
-        self.ids["wp_politeia_elections"] += 1
+        election_id = self.tables.insert("wp_politeia_elections",
+                                         OFFICE_SENATOR, region_id, ELECTION_DATE)
         print(f"  Created Election ID {election_id} for {region_name}")
 
         # 3. Create Results (Stats)
-        stats = data.get('stats', {})
-        self.writers["wp_politeia_election_results"].writerow({
-            "id": self.ids["wp_politeia_election_results"],
-            "election_id": election_id,
-            "jurisdiction_id": region_id,
-            "valid_votes": stats.get('valid_votes', 0),
-            "blank_votes": stats.get('blank_votes', 0),
-            "null_votes": stats.get('null_votes', 0),
-            "total_votes": stats.get('total_votes', 0),
-            "participation_rate": stats.get('participation_rate', 0),
-            "created_at": now(),
-            "updated_at": now()
-        })
-        self.ids["wp_politeia_election_results"] += 1
+        self.tables.insert("wp_politeia_election_results", election_id, region_id, *record.stats)
 
         # 4. Process Candidates
-        candidates = data.get('candidates', [])
-        for cand in candidates:
-            name = cand['name']
-            party_name = cand['party']
-            
+        for cand in record.candidates:
             # Person
-            if name in self.cache_people:
-                person_id = self.cache_people[name]
-            else:
-                person_id = self.ids["wp_politeia_people"]
-                parts = name.strip().split()
-                if len(parts) >= 2:
-                    given = " ".join(parts[:-1])
-                    paternal = parts[-1]
-                else:
-                    given = parts[0] if parts else "Unknown"
-                    paternal = ""
-                
-                self.writers["wp_politeia_people"].writerow({
-                    "id": person_id,
-                    "given_names": given,
-                    "paternal_surname": paternal,
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.cache_people[name] = person_id
-                self.ids["wp_politeia_people"] += 1
+            person_id = self.people.resolve(cand.name, cand.tokens)
+            if person_id is None:
+                person_id = self.tables.insert("wp_politeia_people", cand.given, cand.paternal)
+                self.people.created(person_id, cand.name)
             
             # Party
-            if party_name in self.cache_parties:
-                party_id = self.cache_parties[party_name]
-            else:
-                party_id = self.ids["wp_politeia_political_parties"]
-                short = party_name.split(" - ")[0].strip() if " - " in party_name else ""
-                self.writers["wp_politeia_political_parties"].writerow({
-                    "id": party_id,
-                    "official_name": party_name,
-                    "short_name": short,
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.cache_parties[party_name] = party_id
-                self.ids["wp_politeia_political_parties"] += 1
+            party_id = self.parties.resolve(cand.party, cand.party_info)
+            if party_id is None:
+                info = self.parties.parse(cand.party)
+                party_id = self.tables.insert("wp_politeia_political_parties", info.party, info.short_name)
+                self.parties.created(party_id, cand.party)
 
             # Candidacy
-            self.writers["wp_politeia_candidacies"].writerow({
-                "id": self.ids["wp_politeia_candidacies"],
-                "election_id": election_id,
-                "person_id": person_id,
-                "party_id": party_id,
-                "votes": cand['votes'],
-                "vote_share": cand['percentage'],
-                "elected": 1 if cand['elected'] else 0,
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.ids["wp_politeia_candidacies"] += 1
+            self.tables.insert("wp_politeia_candidacies",
+                               election_id, person_id, party_id, cand.votes, cand.percentage, cand.elected)
 
             # Membership
-            self.writers["wp_politeia_party_memberships"].writerow({
-                "id": self.ids["wp_politeia_party_memberships"],
-                "person_id": person_id,
-                "party_id": party_id,
-                "started_on": ELECTION_DATE,
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.ids["wp_politeia_party_memberships"] += 1
+            self.tables.insert("wp_politeia_party_memberships", person_id, party_id, ELECTION_DATE)
 
             # Office Term (if elected)
-            if cand['elected']:
-                self.writers["wp_politeia_office_terms"].writerow({
-                    "id": self.ids["wp_politeia_office_terms"],
-                    "person_id": person_id,
-                    "office_id": OFFICE_SENATOR,
-                    "jurisdiction_id": region_id,
-                    "started_on": TERM_START_DATE,
-                    "status": "ACTIVE",
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.ids["wp_politeia_office_terms"] += 1
+            if cand.elected:
+                self.tables.insert("wp_politeia_office_terms",
+                                   person_id, OFFICE_SENATOR, region_id, TERM_START_DATE, "ACTIVE")
         
-        print(f"  ✓ Processed {len(candidates)} candidates")
+        print(f"  ✓ Processed {len(record.candidates)} candidates")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the 2021 senator JSONs into the master CSVs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes parsing the files (default: one per core; 1 = no pool)")
+    args = parser.parse_args()
+
     merger = SenatorMerger()
     merger.load_state()
     merger.open_writers()
     try:
-        merger.process_directory()
+        merger.process_directory(args.workers)
         print("\n✅ Consolidation Complete!")
     finally:
         merger.close_writers()
+    sync_after_merge(DATA_DIR)
+    rollup_after_merge(DATA_DIR)
+    export_after_merge(DATA_DIR)
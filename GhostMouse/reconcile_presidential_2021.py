@@ -0,0 +1,238 @@
+"""
+2021 Presidential Reconciliation
+Cross-checks the two presidential sources: the commune results in
+scraped_data_2021_presidentes/<CODE>/region_<code>_data.json are summed per
+candidate per region and diffed against the regional totals in
+presidential_2021.json. Regions that don't add up are ranked by the size of
+the gap, each with the communes most likely to explain it, so a rescrape
+can target them instead of a manual audit:
+
+    not scraped         a commune of the region (data/gazetteer.csv) missing from the scrape
+    duplicated          the same commune listed twice
+    inconsistent        its candidates don't add up to its valid_votes, valid +
+                        blank + null != total_votes, or a percentage is off
+    fits the gap        the gap is a multiple of its own votes per candidate,
+                        e.g. a page counted twice or a half-loaded one
+
+Inconsistent communes are listed even where the regional totals agree.
+Everything past loading the JSONs is array work: one commune x candidate
+vote matrix, region sums with np.add.at, and the checks and least-squares
+fits for every commune at once. Communes of one region split their votes
+much alike, so a look-alike isn't enough: the fit has to leave almost
+nothing of the gap unexplained.
+
+REQUIRES:
+pip install numpy
+
+Usage:
+    python3 reconcile_presidential_2021.py
+    python3 reconcile_presidential_2021.py --json reconciliation.json   # also write the report
+"""
+import argparse
+import json
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gazetteer import commune_code, fold, get_gazetteer, lookup
+from person_resolver import name_key, name_tokens
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scraped_data_2021_presidentes")
+REGION_TOTALS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "presidential_2021.json")
+
+TOTAL_TOLERANCE = 1  # valid + blank + null vs total_votes, as in validate_tables.py
+PERCENT_TOLERANCE = 0.02  # sources round percentages to 2 decimals
+FIT_MIN = 0.97  # share of the gap a commune must explain to be named
+SUSPECTS_PER_REGION = 5
+
+Suspect = namedtuple("Suspect", ["commune", "reason", "score", "votes"])
+Discrepancy = namedtuple("Discrepancy", ["region_id", "region_name", "gap", "candidate_gaps", "stat_gaps",
+                                         "suspects"])
+
+def commune_key(name):
+    """Gazetteer code, or the folded name of a commune the gazetteer doesn't know"""
+    return commune_code(name) or fold(name)
+
+def region_file(code):
+    return os.path.join(SOURCE_DIR, code, f"region_{code.lower()}_data.json")
+
+class Reconciliation:
+    def __init__(self, totals_path=REGION_TOTALS):
+        with open(totals_path, 'r', encoding='utf-8') as f:
+            self.regions = json.load(f)
+        # Candidate columns in the order the region file lists them; keys survive accents/case
+        self.columns = {}
+        self.names = []
+        for region in self.regions:
+            for cand in region["candidates"]:
+                self.column(cand["candidate"])
+
+    def column(self, name):
+        """Candidate column of a name, adding one for a candidate not seen yet"""
+        key = name_key(name_tokens(name))
+        if key not in self.columns:
+            self.columns[key] = len(self.names)
+            self.names.append(name)
+        return self.columns[key]
+
+    def load(self):
+        """Commune x candidate arrays of both sources"""
+        communes, rows, stats, shares, region_of = [], [], [], [], []
+        for r, region in enumerate(self.regions):
+            path = region_file(region["region_id"])
+            entries = []
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            for entry in entries:
+                votes, percentages = {}, {}
+                for cand in entry.get("candidates", []):
+                    col = self.column(cand["name"])
+                    votes[col] = votes.get(col, 0) + int(cand.get("votes") or 0)
+                    percentages[col] = float(cand.get("percentage") or 0)
+                s = entry.get("stats") or {}
+                communes.append(entry.get("commune", ""))
+                rows.append(votes)
+                shares.append(percentages)
+                stats.append([int(s.get(f) or 0) for f in ("valid_votes", "blank_votes", "null_votes", "total_votes")])
+                region_of.append(r)
+
+        width = len(self.names)
+        self.communes = communes
+        self.region_of = np.array(region_of, dtype=np.int64)
+        self.votes = np.zeros((len(rows), width), dtype=np.int64)
+        self.shares = np.full((len(rows), width), np.nan)
+        for i, (votes, percentages) in enumerate(zip(rows, shares)):
+            self.votes[i, list(votes)] = list(votes.values())
+            self.shares[i, list(percentages)] = list(percentages.values())
+        self.stats = np.array(stats, dtype=np.int64).reshape(-1, 4)
+
+        self.region_votes = np.zeros((len(self.regions), width), dtype=np.int64)
+        for r, region in enumerate(self.regions):
+            for cand in region["candidates"]:
+                self.region_votes[r, self.column(cand["candidate"])] = int(cand["votes"])
+        self.region_stats = np.array([[int(region["stats"].get("valid_votes") or 0),
+                                       int(region["stats"].get("total_votes") or 0)] for region in self.regions],
+                                     dtype=np.int64).reshape(-1, 2)
+
+    def commune_issues(self):
+        """{commune index: reason} for communes that are wrong on their own"""
+        valid, blank, null, total = self.stats.T
+        candidate_sum = self.votes.sum(axis=1)
+        expected = np.divide(self.votes * 100.0, valid[:, None], out=np.zeros(self.votes.shape),
+                             where=valid[:, None] > 0)
+        share_off = np.nanmax(np.where(np.isnan(self.shares), 0, np.abs(expected - self.shares)), axis=1,
+                              initial=0) > PERCENT_TOLERANCE
+
+        issues = {}
+        for i in np.flatnonzero(share_off):
+            issues[int(i)] = "inconsistent: percentages don't match the votes"
+        for i in np.flatnonzero(np.abs(valid + blank + null - total) > TOTAL_TOLERANCE):
+            issues[int(i)] = f"inconsistent: valid + blank + null = {valid[i] + blank[i] + null[i]}, total {total[i]}"
+        for i in np.flatnonzero(candidate_sum != valid):
+            issues[int(i)] = f"inconsistent: candidates add up to {candidate_sum[i]}, valid_votes {valid[i]}"
+
+        # The same commune twice in one region (keyed by gazetteer code, else folded name)
+        keys = np.array([f"{r}:{commune_key(name)}" for r, name in zip(self.region_of.tolist(), self.communes)])
+        _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        seen_first = set(first[counts > 1].tolist())
+        for i in np.flatnonzero(np.isin(keys, keys[first[counts > 1]])):
+            if int(i) not in seen_first:
+                issues[int(i)] = "duplicated"
+        return issues
+
+    def missing(self, r):
+        """Gazetteer communes of region r that the scrape doesn't have"""
+        gazetteer = get_gazetteer()
+        place = lookup(self.regions[r]["region_id"], "REGION")
+        if place is None:
+            return []
+        scraped = {commune_key(self.communes[i]) for i in np.flatnonzero(self.region_of == r)}
+        return [gazetteer.places[code].name for code in gazetteer.communes_in(place.code) if code not in scraped]
+
+    def fit(self, gaps):
+        """
+        Per commune: (scale, score) of gap ~ scale * its votes, least squares
+        over the candidates. score is the share of the region's gap that
+        fit explains (0-1); an over-count larger than the commune's own votes
+        (scale < -1) can't come from it and scores 0.
+        """
+        gap = gaps[self.region_of].astype(np.float64)
+        votes = self.votes.astype(np.float64)
+        size = (votes * votes).sum(axis=1)
+        scale = np.divide((votes * gap).sum(axis=1), size, out=np.zeros(len(votes)), where=size > 0)
+        unexplained = np.abs(gap - scale[:, None] * votes).sum(axis=1)
+        total = np.abs(gap).sum(axis=1)
+        score = np.clip(1 - np.divide(unexplained, total, out=np.ones(len(votes)), where=total > 0), 0, 1)
+        return scale, np.where(scale < -1.01, 0, score)
+
+    def run(self):
+        """Discrepancies ranked by votes unaccounted for (largest first)"""
+        self.load()
+        sums = np.zeros_like(self.region_votes)
+        np.add.at(sums, self.region_of, self.votes)
+        gaps = self.region_votes - sums  # > 0: the communes are short of the regional total
+        stat_sums = np.zeros_like(self.region_stats)
+        np.add.at(stat_sums, self.region_of, self.stats[:, [0, 3]])
+        stat_gaps = self.region_stats - stat_sums
+        issues = self.commune_issues()
+        scales, scores = self.fit(gaps)
+
+        report = []
+        for r, region in enumerate(self.regions):
+            gap = int(np.abs(gaps[r]).sum())
+            members = np.flatnonzero(self.region_of == r)
+            suspects = [Suspect(name, "not scraped", 1.0, None) for name in self.missing(r)]
+            suspects += [Suspect(self.communes[i], issues[i], 1.0, int(self.votes[i].sum()))
+                         for i in members if i in issues]
+            if gap:
+                named = {s.commune for s in suspects}
+                alike = [i for i in members[np.argsort(-scores[members])]
+                         if self.communes[i] not in named and scores[i] >= FIT_MIN]
+                suspects += [Suspect(self.communes[i],
+                                     f"fits the gap: {'short' if scales[i] > 0 else 'over'} by {abs(scales[i]):.2f}x "
+                                     f"its votes ({scores[i]:.0%})",
+                                     round(float(scores[i]), 3), int(self.votes[i].sum())) for i in alike]
+            if not gap and not stat_gaps[r].any() and not suspects:
+                continue
+            report.append(Discrepancy(
+                region["region_id"], region["region_name"], gap,
+                {self.names[c]: int(gaps[r, c]) for c in np.flatnonzero(gaps[r])},
+                {"valid_votes": int(stat_gaps[r, 0]), "total_votes": int(stat_gaps[r, 1])},
+                suspects[:SUSPECTS_PER_REGION] if gap else suspects))
+        report.sort(key=lambda d: (-d.gap, -len(d.suspects)))
+        return report
+
+def print_report(report):
+    if not report:
+        print("✅ Every region's commune results add up to presidential_2021.json")
+        return
+    print(f"❌ {len(report)} region(s) don't reconcile (largest gap first):")
+    for rank, d in enumerate(report, 1):
+        print(f"\n{rank}. {d.region_name} ({d.region_id}): {d.gap} votes unaccounted for")
+        for name, gap in sorted(d.candidate_gaps.items(), key=lambda item: -abs(item[1])):
+            print(f"     {name:<28} {'communes short by' if gap > 0 else 'communes over by'} {abs(gap)}")
+        if any(d.stat_gaps.values()):
+            print(f"     stats: valid_votes {d.stat_gaps['valid_votes']:+}, total_votes {d.stat_gaps['total_votes']:+}")
+        if not d.suspects:
+            print("   ⚠️ No commune explains it; rescrape the whole region")
+        for s in d.suspects:
+            votes = f" ({s.votes} votes)" if s.votes is not None else ""
+            print(f"   → rescrape {s.commune}{votes}: {s.reason}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile the 2021 presidential commune results with the regional totals")
+    parser.add_argument("--json", default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = Reconciliation().run()
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([{**d._asdict(), "suspects": [s._asdict() for s in d.suspects]} for d in report],
+                      f, ensure_ascii=False, indent=1)
+        print(f"\n✓ Report written to {args.json}")
+    sys.exit(1 if report else 0)
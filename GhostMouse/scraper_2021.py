@@ -8,9 +8,16 @@ pip install pyautogui
 import asyncio
 import random
 import math
+import os
+import sys
 from playwright.async_api import async_playwright
 import pyautogui
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from emol_capture import ResultCapture
+from emol_wait import results_signature, wait_for_results_settled
+from snapshot_store import SnapshotStore, snapshot_page
+
 # Calibration constants for macOS Chrome (Approximate)
 # You might need to adjust these if the clicks missed!
 TOOLBAR_HEIGHT_ESTIMATE = 80 
@@ -134,6 +141,11 @@ async def main():
                 print("✅ Page opened successfully.")
             
             ghost = GhostClicker(page)
+
+            # Capture result payloads from the network (raw copies kept for re-parsing)
+            capture = ResultCapture(page, raw_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), "raw_2021_presidentes"))
+            capture.attach()
+            store = SnapshotStore()
             
             # Full Region List
             regions = ["XV", "I", "II", "III", "IV", "V", "RM", "VI", "VII", "XVI", "VIII", "IX", "XIV", "X", "XI", "XII"]
@@ -152,11 +164,14 @@ async def main():
                 
                 # 1. Click Region to expand menu
                 if await ghost.click_element(region_code):
-                    print("   Region Clicked. Waiting for menu expansion (3s)...")
-                    await asyncio.sleep(3)
+                    print("   Region Clicked. Waiting for menu expansion...")
                     
                     # 2. Find Communes in the menu
                     region_ul_selector = f"ul[data-region='{region_code.lower()}']"
+                    try:
+                        await page.wait_for_selector(f"{region_ul_selector} li[data-el='p']", state="visible", timeout=3000)
+                    except Exception:
+                        print("   ⚠️ Commune menu did not expand in time")
                     commune_lis = await page.locator(f"{region_ul_selector} li[data-el='p']").all()
                     print(f"   Found {len(commune_lis)} entries in menu.")
                     
@@ -178,11 +193,18 @@ async def main():
                                 target_x = vp_x + box['x'] + (box['width'] / 2)
                                 target_y = vp_y + box['y'] + (box['height'] / 2)
                                 
+                                previous = await results_signature(page)
                                 pyautogui.moveTo(target_x, target_y, duration=0.3)
+                                capture.begin(await li.get_attribute("data-zn"), li_text)
                                 pyautogui.click()
                                 
-                                print("   Click sent. Waiting for data (3s)...")
-                                await asyncio.sleep(3)
+                                print("   Click sent. Waiting for data (up to 3s)...")
+                                captured = await capture.wait_for_result(timeout=1)
+                                if not captured:
+                                    await wait_for_results_settled(page, previous=previous, timeout=2000)
+                                capture.save_raw(f"{region_code}_{li_text}")
+                                capture.snapshot(store, "2021_presidencial", region_code, li_text)
+                                await snapshot_page(store, page, "2021_presidencial", region_code, li_text)
                                 
                                 # 5. Extract Data
                                 commune_data = {
@@ -192,62 +214,77 @@ async def main():
                                     "stats": {}
                                 }
                                 
-                                # Candidates
-                                candidates = await page.query_selector_all("ul.res-ul-candidatos li")
-                                for cand_li in candidates:
-                                    name_el = await cand_li.query_selector("div.res-candidato b")
-                                    name = (await name_el.text_content()).strip() if name_el else "Unknown"
+                                if captured:
+                                    # Network payload arrived, no need to wait for the DOM
+                                    for cand in captured["candidates"]:
+                                        commune_data["candidates"].append({
+                                            "name": cand["name"] or "Unknown",
+                                            "party": cand["party"] or "Unknown",
+                                            "votes": cand["votes"],
+                                            "percentage": cand["percentage"],
+                                            "elected": False
+                                        })
+                                    stats = dict(captured["stats"])
+                                    if not stats["total_votes"]:
+                                        stats["total_votes"] = stats["valid_votes"] + stats["blank_votes"] + stats["null_votes"]
+                                    commune_data["stats"] = stats
+                                else:
+                                    # Candidates
+                                    candidates = await page.query_selector_all("ul.res-ul-candidatos li")
+                                    for cand_li in candidates:
+                                        name_el = await cand_li.query_selector("div.res-candidato b")
+                                        name = (await name_el.text_content()).strip() if name_el else "Unknown"
                                     
-                                    party_el = await cand_li.query_selector("div.res-candidato span abbr")
-                                    party = (await party_el.get_attribute("title")) if party_el else "Unknown"
-                                    if party == "Unknown":
-                                         party_el_txt = await cand_li.query_selector("div.res-candidato span")
-                                         party = (await party_el_txt.text_content()).strip() if party_el_txt else "Unknown"
+                                        party_el = await cand_li.query_selector("div.res-candidato span abbr")
+                                        party = (await party_el.get_attribute("title")) if party_el else "Unknown"
+                                        if party == "Unknown":
+                                             party_el_txt = await cand_li.query_selector("div.res-candidato span")
+                                             party = (await party_el_txt.text_content()).strip() if party_el_txt else "Unknown"
 
-                                    votes_el = await cand_li.query_selector("div.res-votos i")
-                                    votes_str = (await votes_el.text_content()).strip().replace(".", "") if votes_el else "0"
+                                        votes_el = await cand_li.query_selector("div.res-votos i")
+                                        votes_str = (await votes_el.text_content()).strip().replace(".", "") if votes_el else "0"
                                     
-                                    pct_el = await cand_li.query_selector("div.res-votos span")
-                                    pct_str = (await pct_el.text_content()).strip().replace(",", ".").replace("%", "") if pct_el else "0"
+                                        pct_el = await cand_li.query_selector("div.res-votos span")
+                                        pct_str = (await pct_el.text_content()).strip().replace(",", ".").replace("%", "") if pct_el else "0"
                                     
-                                    commune_data["candidates"].append({
-                                        "name": name,
-                                        "party": party,
-                                        "votes": int(votes_str),
-                                        "percentage": float(pct_str),
-                                        "elected": False 
-                                    })
+                                        commune_data["candidates"].append({
+                                            "name": name,
+                                            "party": party,
+                                            "votes": int(votes_str),
+                                            "percentage": float(pct_str),
+                                            "elected": False 
+                                        })
                                 
-                                # Stats
-                                valid_el = await page.query_selector("dl.res-resumen-votacion dt[data-voto='v'] i")
-                                valid = int((await valid_el.text_content()).strip().replace(".", "")) if valid_el else 0
+                                    # Stats
+                                    valid_el = await page.query_selector("dl.res-resumen-votacion dt[data-voto='v'] i")
+                                    valid = int((await valid_el.text_content()).strip().replace(".", "")) if valid_el else 0
                                 
-                                blank_el = await page.query_selector("dl.res-resumen-votacion dt[data-voto='b'] i")
-                                blank = int((await blank_el.text_content()).strip().replace(".", "")) if blank_el else 0
+                                    blank_el = await page.query_selector("dl.res-resumen-votacion dt[data-voto='b'] i")
+                                    blank = int((await blank_el.text_content()).strip().replace(".", "")) if blank_el else 0
                                 
-                                null_el = await page.query_selector("dl.res-resumen-votacion dt[data-voto='n'] i")
-                                null = int((await null_el.text_content()).strip().replace(".", "")) if null_el else 0
+                                    null_el = await page.query_selector("dl.res-resumen-votacion dt[data-voto='n'] i")
+                                    null = int((await null_el.text_content()).strip().replace(".", "")) if null_el else 0
                                 
-                                padron_el = await page.query_selector("ol.res-resumen-zona li[data-stat='p'] span.reset")
-                                padron_text = (await padron_el.text_content()).strip().replace(".", "") if padron_el else "0"
-                                padron = int(padron_text.split()[0])
+                                    padron_el = await page.query_selector("ol.res-resumen-zona li[data-stat='p'] span.reset")
+                                    padron_text = (await padron_el.text_content()).strip().replace(".", "") if padron_el else "0"
+                                    padron = int(padron_text.split()[0])
                                 
-                                total_votes = valid + blank + null
+                                    total_votes = valid + blank + null
                                 
-                                part_rate = 0.0
-                                if padron > 0:
-                                    part_rate = round((total_votes / padron) * 100, 2)
+                                    part_rate = 0.0
+                                    if padron > 0:
+                                        part_rate = round((total_votes / padron) * 100, 2)
                                     
-                                commune_data["stats"] = {
-                                    "valid_votes": valid,
-                                    "blank_votes": blank,
-                                    "null_votes": null,
-                                    "total_votes": total_votes,
-                                    "participation_rate": part_rate
-                                }
+                                    commune_data["stats"] = {
+                                        "valid_votes": valid,
+                                        "blank_votes": blank,
+                                        "null_votes": null,
+                                        "total_votes": total_votes,
+                                        "participation_rate": part_rate
+                                    }
                                 
                                 region_communes_data.append(commune_data)
-                                print(f"     Collected: {total_votes} total votes")
+                                print(f"     Collected: {commune_data['stats']['total_votes']} total votes")
                                 
                             else:
                                 print("     Could not get bounding box for commune")
@@ -273,8 +310,6 @@ async def main():
                     with open(output_path, "w", encoding="utf-8") as f:
                         json.dump(region_communes_data, f, indent=2, ensure_ascii=False)
                     print(f"✅ Saved Region {region_code} data to {output_path}")
-                
-                await asyncio.sleep(1)
 
             print(f"\n✅ All regions processed.")
 
@@ -1,6 +1,9 @@
 """
 GhostMouse Scraper for 2021 Diputados Elections
 Uses PyAutoGUI + Playwright to bypass 'isTrusted' checks by performing physical clicks.
+Pass --resume to skip distritos already in checkpoints/2021_diputados.jsonl;
+the journal is keyed by the distrito number shown on the page, and a run
+without --resume starts a new one.
 
 REQUIRES:
 pip install pyautogui playwright
@@ -13,6 +16,13 @@ import pyautogui
 import json
 import os
 import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from checkpoint_journal import CheckpointJournal, checkpoint_path
+from emol_capture import ResultCapture
+from emol_wait import results_signature, wait_for_results_settled
+from snapshot_store import SnapshotStore, snapshot_page
 
 # Calibration constants for macOS Chrome (Approximate)
 # You might need to adjust these if the clicks missed!
@@ -388,6 +398,15 @@ async def main():
             
             # Base path for output
             ghost_mouse_dir = os.path.dirname(os.path.abspath(__file__))
+
+            # Keep the raw network payload of every distrito for offline re-parsing
+            capture = ResultCapture(page, raw_dir=os.path.join(ghost_mouse_dir, "raw_2021_diputados"))
+            capture.attach()
+            store = SnapshotStore()
+
+            # Every extracted distrito is journaled; --resume skips those already done
+            resume = "--resume" in sys.argv
+            journal = CheckpointJournal(checkpoint_path("2021_diputados"), fresh=not resume)
             
             for region_code in target_regions:
                 print(f"\n{'='*60}")
@@ -431,8 +450,11 @@ async def main():
                     print(f"   ❌ Failed to click Region {region_code}. Skipping...")
                     continue
                 
-                print("   ✅ Region clicked. Waiting for distritos to load (4s)...")
-                await asyncio.sleep(4)
+                print("   ✅ Region clicked. Waiting for distritos to load (max 4s)...")
+                try:
+                    await page.wait_for_selector(f"ul[data-region='{region_code.lower()}'] li:has-text('Distrito')", state="visible", timeout=4000)
+                except Exception:
+                    print("   ⚠️ Distrito list did not appear in time")
                 
                 # Get region name
                 region_name_el = await page.query_selector("div#res-box-info h3")
@@ -460,6 +482,14 @@ async def main():
                     # Clean up text to just "Distrito X" for logging
                     short_name = distrito_text.split('.')[0] if '.' in distrito_text else distrito_text[:20]
                     print(f"\n   📍 Distrito {idx+1}/{len(distrito_links)}: {short_name}...")
+
+                    # Journal key: the distrito number the page lists, not the link's position
+                    listed = re.search(r'Distrito\s+(\d+)', distrito_text)
+                    unit = f"Distrito {listed.group(1)}" if listed else None
+                    if resume and unit and journal.is_done(region_code, unit):
+                        region_data["distritos"].append(journal.get(region_code, unit))
+                        print(f"      ↻ Already in checkpoint journal, skipping")
+                        continue
                     
                     # Click distrito
                     # We need the element's position to click it
@@ -471,16 +501,31 @@ async def main():
                         vp_x, vp_y = await ghost.get_viewport_offset()
                         
                         print(f"      Targeting: ({vp_x + cx}, {vp_y + cy})")
+                        previous = await results_signature(page)
                         pyautogui.moveTo(vp_x + cx, vp_y + cy, duration=0.5)
+                        capture.begin()
                         pyautogui.click()
                         
-                        print(f"      ✅ Clicked. Waiting for data (4s)...")
-                        await asyncio.sleep(4)
+                        print(f"      ✅ Clicked. Waiting for data to settle (max 4s)...")
+                        if not await wait_for_results_settled(page, previous=previous, timeout=4000):
+                            print(f"      ⚠️ Results did not settle, extracting anyway")
                         
                         # Extract data
                         distrito_data = await extract_distrito_data(page, region_code)
                         
+                        # The header says which distrito actually loaded
+                        if distrito_data and distrito_data["distrito_id"]:
+                            shown = f"Distrito {distrito_data['distrito_id']}"
+                            if unit and shown != unit:
+                                print(f"      ⚠️ Clicked {unit} but the page shows {shown}")
+                            unit = shown
+                        unit = unit or f"Distrito #{idx+1}"  # no number anywhere: list position
+                        capture.save_raw(f"{region_code}_{unit}")
+                        capture.snapshot(store, "2021_diputados", region_code, unit)
+                        await snapshot_page(store, page, "2021_diputados", region_code, unit)
+                        
                         if distrito_data:
+                            journal.record(region_code, unit, distrito_data)
                             region_data["distritos"].append(distrito_data)
                             print(f"      ✅ Extracted {len(distrito_data.get('pacts', []))} pacts")
                         else:
@@ -505,8 +550,6 @@ async def main():
                     print(f"   Total distritos: {len(region_data['distritos'])}")
                 else:
                     print(f"\n⚠️ No data collected for Region {region_code}")
-                
-                await asyncio.sleep(1)
 
             print(f"\n{'='*60}")
             print("✅ ALL REGIONS PROCESSED!")
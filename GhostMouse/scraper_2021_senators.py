@@ -12,6 +12,11 @@ from playwright.async_api import async_playwright
 import pyautogui
 import json
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from emol_wait import results_signature, wait_for_results_settled
+from snapshot_store import SnapshotStore, snapshot_page
 
 # Calibration constants for macOS Chrome (Approximate)
 # You might need to adjust these if the clicks missed!
@@ -133,6 +138,7 @@ async def main():
             
             # Base path for the project root
             ghost_mouse_dir = os.path.dirname(os.path.abspath(__file__))
+            store = SnapshotStore()
             
             for region_code in target_regions:
                 region_communes_data = []
@@ -141,9 +147,12 @@ async def main():
                 print(f"👻 GhostMouse: Processing Region {region_code}...")
                 
                 # 1. Click Region to select it
+                previous = await results_signature(page)
                 if await ghost.click_element(region_code):
-                    print("   Region Clicked. Waiting for data (3s)...")
-                    await asyncio.sleep(4) # Check if longer wait helps
+                    print("   Region Clicked. Waiting for data to settle (max 4s)...")
+                    if not await wait_for_results_settled(page, previous=previous, timeout=4000):
+                        print("   ⚠️ Results did not settle, extracting anyway")
+                    await snapshot_page(store, page, "2021_senadores", region_code, region_code)
                     
                     # For Senators, we scrape the Regional Total displayed.
                     # Communes might not be selectable or relevant in this view.
@@ -250,8 +259,6 @@ async def main():
                     with open(output_path, "w", encoding="utf-8") as f:
                         json.dump(region_communes_data, f, indent=2, ensure_ascii=False)
                     print(f"✅ Saved Region {region_code} data to {output_path}")
-                
-                await asyncio.sleep(1)
 
             print(f"\n✅ All regions processed.")
 
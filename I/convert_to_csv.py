@@ -6,6 +6,12 @@ import json
 import csv
 from datetime import datetime
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gazetteer import jurisdiction_values
+from party_normalizer import PartyRegistry
+from person_resolver import PersonResolver, split_name
 
 INPUT_FILE = "/Users/nicolas/Desktop/PoliteiaDB/I/region_i_data.json"
 OUTPUT_DIR = "/Users/nicolas/Desktop/PoliteiaDB/I"
@@ -27,8 +33,8 @@ ids = {
 }
 
 # Caches for deduplication
-cache_people = {}  # name -> id
-cache_parties = {}  # party_name -> id
+people = PersonResolver()  # name variants -> id
+parties = PartyRegistry()  # raw party strings -> id
 cache_jurisdictions = {}  # name -> id
 
 def now():
@@ -61,13 +67,14 @@ region_name = "Región de Tarapacá"
 region_id = ids["jurisdiction"]
 ids["jurisdiction"] += 1
 
+official_name, common_name, _, _, external_code = jurisdiction_values(region_name, "REGION")
 csv_writers["wp_politeia_jurisdictions"].writerow({
     "id": region_id,
-    "official_name": region_name,
-    "common_name": region_name,
+    "official_name": official_name,
+    "common_name": common_name,
     "type": "REGION",
     "parent_id": "",
-    "external_code": "",
+    "external_code": external_code,
     "created_at": now(),
     "updated_at": now()
 })
@@ -86,13 +93,15 @@ for commune_data in data:
     commune_id = ids["jurisdiction"]
     ids["jurisdiction"] += 1
     
+    # Official spelling and CUT code from the gazetteer
+    official_name, common_name, _, _, external_code = jurisdiction_values(commune_name, "COMMUNE")
     csv_writers["wp_politeia_jurisdictions"].writerow({
         "id": commune_id,
-        "official_name": commune_name,
-        "common_name": commune_name,
+        "official_name": official_name,
+        "common_name": common_name,
         "type": "COMMUNE",
         "parent_id": region_id,
-        "external_code": "",  # We don't have external codes for Region I
+        "external_code": external_code,
         "created_at": now(),
         "updated_at": now()
     })
@@ -137,18 +146,13 @@ for commune_data in data:
         elected = candidate['elected']
         
         # Get or create person
-        if name not in cache_people:
+        person_id = people.resolve(name)
+        if person_id is None:
             person_id = ids["person"]
             ids["person"] += 1
             
             # Split name
-            parts = name.strip().split()
-            if len(parts) >= 2:
-                given = " ".join(parts[:-1])
-                paternal = parts[-1]
-            else:
-                given = parts[0] if parts else "Unknown"
-                paternal = ""
+            given, paternal = split_name(name)
             
             csv_writers["wp_politeia_people"].writerow({
                 "id": person_id,
@@ -158,31 +162,26 @@ for commune_data in data:
                 "updated_at": now()
             })
             
-            cache_people[name] = person_id
-        else:
-            person_id = cache_people[name]
+            people.created(person_id, name)
         
         # Get or create party
-        if party_name not in cache_parties:
+        party_id = parties.resolve(party_name)
+        if party_id is None:
             party_id = ids["party"]
             ids["party"] += 1
             
-            # Extract short name (first word before -)
-            short_name = ""
-            if " - " in party_name:
-                short_name = party_name.split(" - ")[0].strip()
+            # Party without pact/status ("RN - Chile Vamos" -> Renovación Nacional, RN)
+            info = parties.parse(party_name)
             
             csv_writers["wp_politeia_political_parties"].writerow({
                 "id": party_id,
-                "official_name": party_name,
-                "short_name": short_name,
+                "official_name": info.party,
+                "short_name": info.short_name,
                 "created_at": now(),
                 "updated_at": now()
             })
             
-            cache_parties[party_name] = party_id
-        else:
-            party_id = cache_parties[party_name]
+            parties.created(party_id, party_name)
         
         # Create candidacy
         csv_writers["wp_politeia_candidacies"].writerow({
@@ -0,0 +1,278 @@
+"""
+Pipeline Benchmark
+Runs the merge/clean/verify stages on synthetic data (synthetic_data.py) in
+a scratch data directory and reports, per stage, wall time, rows/sec and
+peak RSS. Every stage runs in its own fresh process so its peak RSS is its
+own, and stages run in pipeline order on the same tables:
+
+    merge_regions        2024 alcaldes into empty tables (merge_regions.Merger)
+    load_state_index     Merger.load_current_state from the state index
+    load_state_scan      Merger.load_current_state with the index removed (full scan)
+    merge_regions_again  same files with --force: every row matched on its natural key
+    consolidate_2021     presidential communes (GhostMouse/consolidate_2021.py)
+    consolidate_senators GhostMouse/consolidate_senators_2021.py
+    consolidate_diputados GhostMouse/consolidate_diputados_2021.py (streamed districts)
+    verify_data          verify_all_data.verify_data
+    validate_tables      validate_tables.validate
+    split_partitions     partitions.PartitionStore.split (election partitions, once)
+    rollups              rollups.Rollups.refresh (party rollups of every election)
+    clean_2021           GhostMouse/clean_2021.clean_csvs (drops the 2021 partitions again)
+
+"rows" is the number of table rows the stage wrote or removed, or read for
+the read-only stages. Each run is appended to benchmarks/results.jsonl with
+the git commit, so runs can be compared across commits (--compare).
+
+Usage:
+    python3 benchmark.py                        # 1x national
+    python3 benchmark.py --scale 10 --compare   # and diff against the last 10x run
+    python3 benchmark.py --stages merge_regions load_state_scan
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GHOSTMOUSE_DIR = os.path.join(BASE_DIR, "GhostMouse")
+RESULTS_PATH = os.path.join(BASE_DIR, "benchmarks", "results.jsonl")
+
+STAGES = ["merge_regions", "load_state_index", "load_state_scan", "merge_regions_again",
+          "consolidate_2021", "consolidate_senators", "consolidate_diputados", "verify_data", "validate_tables",
+          "split_partitions", "rollups", "clean_2021"]
+
+def count_rows(data_dir):
+    """Rows across the master CSVs (lines minus headers)"""
+    total = 0
+    for name in os.listdir(data_dir):
+        if name.startswith("wp_politeia_") and name.endswith(".csv"):
+            with open(os.path.join(data_dir, name), 'rb') as f:
+                total += max(0, sum(1 for _ in f) - 1)
+    return total
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+def region_files(source_dir, shape):
+    """[(json_path, region name)] for one synthetic shape, north to south"""
+    from gazetteer import get_gazetteer
+    files = []
+    for place in get_gazetteer().places.values():
+        if place.type == "REGION":
+            path = os.path.join(source_dir, shape, place.region, f"region_{place.region.lower()}_data.json")
+            if os.path.exists(path):
+                files.append((path, place.name))
+    return files
+
+def merge_alcaldes(data_dir, source_dir, force=False, merge=True):
+    import merge_regions
+    merge_regions.DATA_DIR = data_dir
+    merge_regions.MERGE_STATE_FILE = os.path.join(data_dir, "merge_state.json")
+    merger = merge_regions.Merger(force=force)
+    merger.load_current_state()
+    if not merge:
+        return
+    merger.open_append_writers()
+    for path, region_name in region_files(source_dir, "alcaldes"):
+        merger.merge_region(path, region_name)
+    merger.close()
+
+def run_stage(stage, data_dir, source_dir):
+    """Runs one stage; returns rows read (None for stages that write)"""
+    if stage == "merge_regions":
+        merge_alcaldes(data_dir, source_dir)
+    elif stage == "load_state_scan":
+        index_path = os.path.join(data_dir, ".merge_index.json")
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        merge_alcaldes(data_dir, source_dir, merge=False)
+        return count_rows(data_dir)
+    elif stage == "load_state_index":
+        merge_alcaldes(data_dir, source_dir, merge=False)
+        return count_rows(data_dir)
+    elif stage == "merge_regions_again":
+        merge_alcaldes(data_dir, source_dir, force=True)
+        return count_rows(data_dir)
+    elif stage == "consolidate_2021":
+        import consolidate_2021
+        consolidate_2021.DATA_DIR = data_dir
+        merger = consolidate_2021.Merger()
+        merger.load_current_state()
+        merger.open_append_writers()
+        merger.merge_regions(region_files(source_dir, "presidentes"))
+        merger.close()
+    elif stage == "consolidate_senators":
+        import consolidate_senators_2021
+        consolidate_senators_2021.DATA_DIR = data_dir
+        consolidate_senators_2021.SOURCE_DIR = os.path.join(source_dir, "senators")
+        merger = consolidate_senators_2021.SenatorMerger()
+        merger.load_state()
+        merger.open_writers()
+        try:
+            merger.process_directory()
+        finally:
+            merger.close_writers()
+    elif stage == "consolidate_diputados":
+        import consolidate_diputados_2021
+        consolidate_diputados_2021.DATA_DIR = data_dir
+        consolidate_diputados_2021.SOURCE_DIR = os.path.join(source_dir, "diputados")
+        merger = consolidate_diputados_2021.DiputadosMerger()
+        merger.load_state()
+        merger.open_writers()
+        try:
+            merger.process_directory()
+        finally:
+            merger.close_writers()
+    elif stage == "verify_data":
+        import verify_all_data
+        verify_all_data.DATA_DIR = data_dir
+        verify_all_data.verify_data()
+        return count_rows(data_dir)
+    elif stage == "validate_tables":
+        from validate_tables import validate
+        validate(data_dir)
+        return count_rows(data_dir)
+    elif stage == "split_partitions":
+        from partitions import PartitionStore
+        PartitionStore(data_dir).split()
+        return count_rows(data_dir)
+    elif stage == "rollups":
+        from rollups import Rollups
+        Rollups(data_dir).refresh(full=True)
+        return count_rows(data_dir)
+    elif stage == "clean_2021":
+        import clean_2021
+        clean_2021.DATA_DIR = data_dir
+        clean_2021.clean_csvs()
+    else:
+        raise ValueError(f"Unknown stage {stage}")
+    return None
+
+def stage_process(stage, data_dir, source_dir, queue, verbose):
+    """Child process body: times one stage and reports back through `queue`"""
+    sys.path.insert(0, BASE_DIR)
+    sys.path.insert(0, GHOSTMOUSE_DIR)
+    before = count_rows(data_dir)
+    out = sys.stdout if verbose else open(os.devnull, 'w')
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        rows = run_stage(stage, data_dir, source_dir)
+        wall = time.perf_counter() - start
+    if rows is None:
+        rows = abs(count_rows(data_dir) - before)
+    queue.put({"wall_s": round(wall, 4), "rows": rows,
+               "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+               "peak_rss_mb": round(peak_rss_mb(), 1)})
+
+def run_in_process(stage, data_dir, source_dir, verbose=False):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=stage_process, args=(stage, data_dir, source_dir, queue, verbose))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Stage {stage} failed (exit code {process.exitcode})")
+    return queue.get()
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BASE_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_results(path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_results(records, path=RESULTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def previous_run(records, scale, run_id):
+    """Records of the latest earlier run at the same scale, by stage"""
+    earlier = [r for r in records if r["scale"] == scale and r["run"] != run_id]
+    if not earlier:
+        return {}
+    last = earlier[-1]["run"]
+    return {r["stage"]: r for r in earlier if r["run"] == last}
+
+def benchmark(scale=1, seed=None, stages=STAGES, work_dir=None, keep=False, verbose=False):
+    """Runs the stages; returns one record per stage"""
+    from synthetic_data import DEFAULT_SEED, generate
+    seed = DEFAULT_SEED if seed is None else seed
+    work_dir = work_dir or tempfile.mkdtemp(prefix="politeia_bench_")
+    source_dir = os.path.join(work_dir, "source")
+    data_dir = os.path.join(work_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+
+    print(f"Generating {scale}x synthetic data in {source_dir}...")
+    start = time.perf_counter()
+    generate(source_dir, scale, seed)
+    print(f"  done in {time.perf_counter() - start:.1f}s")
+
+    run_id = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    common = {"run": run_id, "commit": git_commit(), "scale": scale, "seed": seed,
+              "python": platform.python_version(), "platform": platform.platform()}
+    records = []
+    try:
+        for stage in stages:
+            result = run_in_process(stage, data_dir, source_dir, verbose)
+            records.append({**common, "stage": stage, **result})
+            print(f"  {stage:<22} {result['wall_s']:>9.3f}s {result['rows']:>10} rows "
+                  f"{result['rows_per_s'] or 0:>12,.0f} rows/s {result['peak_rss_mb']:>8.1f} MB")
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return records
+
+def print_comparison(records, previous):
+    if not previous:
+        print("\n(no earlier run at this scale to compare with)")
+        return
+    print(f"\nCompared with {next(iter(previous.values()))['run']} ({next(iter(previous.values()))['commit']}):")
+    for record in records:
+        before = previous.get(record["stage"])
+        if not before or not before["wall_s"]:
+            continue
+        change = (record["wall_s"] - before["wall_s"]) / before["wall_s"] * 100
+        rss = record["peak_rss_mb"] - before["peak_rss_mb"]
+        print(f"  {record['stage']:<22} {before['wall_s']:>9.3f}s -> {record['wall_s']:>9.3f}s "
+              f"({change:+.1f}%), peak RSS {rss:+.1f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic data")
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the country (1, 10, 100, ...)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the synthetic data")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to run (in order)")
+    parser.add_argument("--work-dir", default=None, help="Scratch directory (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch data")
+    parser.add_argument("--verbose", action="store_true", help="Show the stages' own output")
+    parser.add_argument("--compare", action="store_true", help="Diff against the last run at the same scale")
+    parser.add_argument("--no-save", action="store_true", help=f"Don't append to {RESULTS_PATH}")
+    args = parser.parse_args()
+
+    records = benchmark(args.scale, args.seed, args.stages, args.work_dir, args.keep, args.verbose)
+    history = load_results()
+    if not args.no_save:
+        save_results(records)
+        print(f"\n✓ Results appended to {RESULTS_PATH}")
+    if args.compare:
+        print_comparison(records, previous_run(history, args.scale, records[0]["run"] if records else None))
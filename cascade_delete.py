@@ -0,0 +1,187 @@
+"""
+Cascading Delete
+Removes whole elections (their partitions, see partitions.py) together with
+the people, parties and jurisdictions that existed only for them, so a
+cleaned election stops leaving rows that every later merge loads back into
+its caches.
+
+Reference counts per person, party and jurisdiction are built in one pass
+over the partitioned tables, following the REFERENCES columns of
+politeia_sqlite.SCHEMA (candidacies, memberships and terms point at people
+and parties; elections, results and terms at jurisdictions; a jurisdiction
+at its parent). Dropping a partition subtracts only that partition's rows.
+A row whose count falls to zero is an orphan, and collecting an orphan
+jurisdiction releases its parent in turn. Rows that nothing referenced
+before the delete are left alone.
+
+Each shared table with orphans is rewritten once, and the deleted people
+are removed from the person match cache and its review list, so a reused
+id can't inherit an old name.
+
+Usage:
+    python3 cascade_delete.py 2021-11-21             # every office on that date
+    python3 cascade_delete.py 2021-11-21 --office 3  # the senate races only
+    python3 cascade_delete.py 2021-11-21 --dry-run   # counts only
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import Counter
+
+from partitions import DATA_DIR, PARTITIONED_TABLES, SHARED_TABLES, PartitionStore
+from person_resolver import match_cache_path, review_cache_path, write_json
+from politeia_sqlite import foreign_keys
+
+class CascadeDelete:
+    def __init__(self, store):
+        self.store = store
+        self.refs = {table: Counter() for table in SHARED_TABLES}  # shared table -> id -> references
+        self.parents = {}  # (shared table, id) -> [(parent table, parent id)]
+        # (table, column, parent table) for every reference into a shared table
+        self.edges = [(table, column, parent) for table, column, parent, _ in foreign_keys()
+                      if parent in SHARED_TABLES]
+
+    def count_file(self, path, table, sign=1):
+        """Adds (or subtracts) the references of one CSV; returns the ids it touched"""
+        touched = set()
+        edges = [(column, parent) for t, column, parent in self.edges if t == table]
+        if not edges or not os.path.exists(path):
+            return touched
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            col = {c: i for i, c in enumerate(next(reader, []))}
+            positions = [(col[column], parent) for column, parent in edges if column in col]
+            for row in reader:
+                for i, parent in positions:
+                    if row[i]:
+                        self.refs[parent][row[i]] += sign
+                        touched.add((parent, row[i]))
+                        if table in SHARED_TABLES and sign > 0:
+                            self.parents.setdefault((table, row[0]), []).append((parent, row[i]))
+        return touched
+
+    def build(self):
+        """One pass over every partition and the shared tables"""
+        for key in self.store.manifest["partitions"]:
+            for table in PARTITIONED_TABLES:
+                self.count_file(self.store.partition_path(key, table), table)
+        for table in SHARED_TABLES:
+            self.count_file(self.store.combined_path(table), table)
+
+    def plan(self, keys):
+        """{shared table: ids to collect} once the partitions in `keys` are gone"""
+        touched = set()
+        for key in keys:
+            for table in PARTITIONED_TABLES:
+                touched |= self.count_file(self.store.partition_path(key, table), table, -1)
+
+        orphans = {table: set() for table in SHARED_TABLES}
+        pending = [ref for ref in touched if self.refs[ref[0]][ref[1]] <= 0]
+        while pending:
+            table, row_id = pending.pop()
+            if row_id in orphans[table]:
+                continue
+            orphans[table].add(row_id)
+            # A collected row releases what it points at (a commune its region)
+            for parent, parent_id in self.parents.get((table, row_id), []):
+                self.refs[parent][parent_id] -= 1
+                if self.refs[parent][parent_id] <= 0:
+                    pending.append((parent, parent_id))
+        return orphans
+
+    def delete(self, keys, collect=True, dry_run=False):
+        """Drops the partitions and collects orphans; returns {table: rows removed}"""
+        removed = Counter()
+        for key in keys:
+            for table, stats in self.store.manifest["partitions"][key]["tables"].items():
+                removed[table] += stats["rows"]
+        orphans = {}
+        if collect:
+            self.build()
+            orphans = self.plan(keys)
+            for table, ids in orphans.items():
+                if ids:
+                    removed[table] += len(ids)
+        if dry_run:
+            return dict(removed)
+
+        for key in keys:
+            self.store.drop(key)
+        self.store.stitch()
+        for table, ids in orphans.items():
+            if ids:
+                self.remove_rows(table, ids)
+        if orphans.get("wp_politeia_people"):
+            self.prune_matches({int(i) for i in orphans["wp_politeia_people"]})
+        return dict(removed)
+
+    def remove_rows(self, table, ids):
+        path = self.store.combined_path(table)
+        tmp_path = path + ".tmp"
+        with open(path, 'r', encoding='utf-8', newline='') as f_in, \
+             open(tmp_path, 'w', encoding='utf-8', newline='') as f_out:
+            reader = csv.reader(f_in)
+            writer = csv.writer(f_out)
+            writer.writerow(next(reader))
+            writer.writerows(row for row in reader if row and row[0] not in ids)
+        os.replace(tmp_path, path)
+
+    def prune_matches(self, person_ids):
+        """Drops entries of deleted people from the person match cache and its review list"""
+        match_path = match_cache_path(self.store.data_dir)
+        prune_json(match_path, lambda pid: pid in person_ids)
+        prune_json(review_cache_path(match_path), lambda entry: entry["person_id"] in person_ids, indent=1)
+
+def prune_json(path, deleted, indent=None):
+    """Rewrites a {name: value} JSON without the entries `deleted(value)` flags"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    kept = {name: value for name, value in entries.items() if not deleted(value)}
+    if len(kept) != len(entries):
+        write_json(path, kept, indent=indent)
+
+def remove_elections(election_date, office_id=None, data_dir=DATA_DIR, collect=True, dry_run=False):
+    """
+    Removes every election of a date (and office) with its dependent rows
+    and, with collect=True, the people/parties/jurisdictions left
+    unreferenced. Partitions data_dir first if needed. Returns {table: rows}.
+
+    A dry run writes nothing, so it needs partitions that are already up to
+    date (after any merge); otherwise it returns None.
+    """
+    store = PartitionStore(data_dir)
+    if dry_run:
+        if not store.up_to_date():
+            print("  ❌ Partitions missing or behind the combined CSVs; run partitions.py --split before a dry run")
+            return None
+    elif not store.partitioned:
+        print("  - Partitioning the tables by election (one-time full pass)...")
+        store.split()
+    else:
+        store.sync()  # rows appended since the last merge
+    keys = store.keys(election_date, office_id)
+    if not keys:
+        return {}
+    return CascadeDelete(store).delete(keys, collect, dry_run)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete elections and everything only they referenced")
+    parser.add_argument("election_date", help="e.g. 2021-11-21")
+    parser.add_argument("--office", default=None, help="Only this office_id")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the master CSVs")
+    parser.add_argument("--keep-orphans", action="store_true", help="Don't collect unreferenced people/parties/places")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be removed")
+    args = parser.parse_args()
+
+    removed = remove_elections(args.election_date, args.office, args.data_dir,
+                               collect=not args.keep_orphans, dry_run=args.dry_run)
+    if removed is None:
+        sys.exit(1)
+    if not removed:
+        print(f"⚠️ No elections on {args.election_date}" + (f" for office {args.office}" if args.office else ""))
+    for table, rows in removed.items():
+        print(f"  {'Would remove' if args.dry_run else 'Removed'} {rows} rows from {table}.csv")
@@ -0,0 +1,76 @@
+"""
+Scrape Checkpoint Journal
+Append-only JSONL log with one line per finished commune/distrito, flushed to
+disk immediately, so an interrupted run can resume where it stopped instead
+of losing everything scraped since the last region file was written.
+
+Line format: {"region": "V", "unit": "Viña del Mar", "at": "...", "data": {...}}
+The latest line for a (region, unit) wins. A run that doesn't resume starts
+a fresh journal (fresh=True); the previous one is kept as <name>.prev.jsonl,
+so a later resume never mixes rows of two runs.
+"""
+import json
+import os
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_DIR = os.path.join(BASE_DIR, "checkpoints")
+
+def checkpoint_path(name, directory=CHECKPOINT_DIR):
+    """checkpoints/<name>.jsonl"""
+    return os.path.join(directory, f"{name}.jsonl")
+
+class CheckpointJournal:
+    def __init__(self, path, fresh=False):
+        self.path = path
+        self.done = {}  # (region, unit) -> data
+        self._needs_newline = False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if fresh:
+            self.rotate()
+        self._load()
+
+    def rotate(self):
+        """Moves an earlier run's journal aside to <name>.prev.jsonl"""
+        if os.path.exists(self.path):
+            root, ext = os.path.splitext(self.path)
+            os.replace(self.path, f"{root}.prev{ext}")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                self._needs_newline = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash mid-write leaves a truncated last line; ignore it
+                    continue
+                self.done[(entry["region"], entry["unit"])] = entry["data"]
+
+    def is_done(self, region, unit):
+        return (region, unit) in self.done
+
+    def get(self, region, unit):
+        return self.done.get((region, unit))
+
+    def count(self, region):
+        return sum(1 for r, _ in self.done if r == region)
+
+    def record(self, region, unit, data):
+        """Appends one finished unit and forces it to disk"""
+        entry = {
+            "region": region,
+            "unit": unit,
+            "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "data": data
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            if self._needs_newline:
+                f.write("\n")
+                self._needs_newline = False
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done[(region, unit)] = data
@@ -0,0 +1,263 @@
+"""
+Emol Network Capture
+Hooks Playwright responses and websocket frames to grab the result payload
+Emol loads after each click, so data is available as soon as it arrives
+instead of after the odometer animation finishes.
+
+A payload only counts for the commune that was clicked: begin() takes its
+data-zn and name, and a response must carry that zone id in its URL or
+that zone id / name in its body. Anything else still loading across the
+click (the default Santiago view after goto, a late answer for the
+previous commune) is ignored.
+"""
+import asyncio
+import json
+import os
+import re
+
+from emol_extract import parse_int, parse_pct
+from gazetteer import fold
+
+# Responses worth inspecting (the results API, e.g. ".../111.json")
+RESULT_URL_PATTERN = re.compile(r"emol\.com/.*(\.json|resultados)", re.IGNORECASE)
+
+# Known key spellings in Emol payloads (first match wins)
+CANDIDATE_FIELDS = {
+    'name': ("nombre", "name", "candidato"),
+    'party': ("partido", "pacto", "party", "sigla"),
+    'votes': ("votos", "votes", "votacion"),
+    'percentage': ("porcentaje", "percentage", "pct"),
+    'elected': ("electo", "ganador", "elected")
+}
+
+STATS_FIELDS = {
+    'valid_votes': ("validos", "votos_validos", "valid_votes"),
+    'blank_votes': ("blancos", "votos_blancos", "blank_votes"),
+    'null_votes': ("nulos", "votos_nulos", "null_votes"),
+    'total_votes': ("emitidos", "total_votos", "total_votes"),
+    'participation_rate': ("participacion", "participation_rate")
+}
+
+# Keys that identify which zone (commune) a payload is about
+ZONE_FIELDS = {
+    'zone_id': ("zn", "zona", "id_zona", "zone_id", "codigo_zona"),
+    'name': ("comuna", "nombre_zona", "zona_nombre", "glosa", "titulo", "title")
+}
+
+def _pick(obj, keys):
+    lowered = {str(k).lower(): v for k, v in obj.items()}
+    for key in keys:
+        if key in lowered:
+            return lowered[key]
+    return None
+
+def _as_int(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    return parse_int(str(value)) if value is not None else 0
+
+def _as_pct(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return parse_pct(str(value)) if value is not None else 0.0
+
+def _is_candidate(obj):
+    return isinstance(obj, dict) and _pick(obj, CANDIDATE_FIELDS['name']) is not None \
+        and _pick(obj, CANDIDATE_FIELDS['votes']) is not None
+
+def _find_candidates(data):
+    """Depth-first search for the first list of candidate-like dicts"""
+    if isinstance(data, list):
+        if data and any(_is_candidate(item) for item in data):
+            return data
+        for item in data:
+            found = _find_candidates(item)
+            if found is not None:
+                return found
+    elif isinstance(data, dict):
+        for value in data.values():
+            found = _find_candidates(value)
+            if found is not None:
+                return found
+    return None
+
+def _find_stats(data):
+    """Depth-first search for the dict holding the vote summary"""
+    if isinstance(data, dict):
+        if _pick(data, STATS_FIELDS['valid_votes']) is not None:
+            return data
+        for value in data.values():
+            found = _find_stats(value)
+            if found is not None:
+                return found
+    elif isinstance(data, list):
+        for item in data:
+            found = _find_stats(item)
+            if found is not None:
+                return found
+    return None
+
+def _find_zone(data, field, depth=0):
+    """Values of a ZONE_FIELDS key outside the candidate list (shallow search)"""
+    found = []
+    if depth > 3 or _is_candidate(data):
+        return found
+    if isinstance(data, dict):
+        value = _pick(data, ZONE_FIELDS[field])
+        if isinstance(value, (str, int)) and not isinstance(value, bool):
+            found.append(str(value).strip())
+        for value in data.values():
+            found += _find_zone(value, field, depth + 1)
+    elif isinstance(data, list):
+        for item in data:
+            found += _find_zone(item, field, depth + 1)
+    return found
+
+def payload_matches(url, data, zone_id=None, name=None):
+    """
+    True if a payload is about zone `zone_id` / commune `name`: the zone id
+    in the URL (".../111.json", "?zn=111") or a zone id or name in the body.
+    With neither given every payload matches.
+    """
+    if zone_id is None and name is None:
+        return True
+    if zone_id is not None:
+        if re.search(rf"(?<![\w]){re.escape(str(zone_id))}(?=\.json|[/?&#]|$)", url or ""):
+            return True
+        if str(zone_id) in _find_zone(data, 'zone_id'):
+            return True
+    if name is not None:
+        return fold(name) in {fold(value) for value in _find_zone(data, 'name')}
+    return False
+
+def parse_payload(data):
+    """
+    Maps a raw Emol payload to the {'candidates', 'stats'} shape used by
+    emol_extract. Returns None if the payload holds no candidate list.
+    """
+    raw_candidates = _find_candidates(data)
+    if raw_candidates is None:
+        return None
+
+    candidates = []
+    for cand in raw_candidates:
+        if not _is_candidate(cand):
+            continue
+        elected = _pick(cand, CANDIDATE_FIELDS['elected'])
+        candidates.append({
+            'name': str(_pick(cand, CANDIDATE_FIELDS['name']) or "").strip(),
+            'party': str(_pick(cand, CANDIDATE_FIELDS['party']) or "").strip(),
+            'votes': _as_int(_pick(cand, CANDIDATE_FIELDS['votes'])),
+            'percentage': _as_pct(_pick(cand, CANDIDATE_FIELDS['percentage'])),
+            'elected': elected not in (None, False, 0, "0", "", "false", "no")
+        })
+
+    raw_stats = _find_stats(data) or {}
+    stats = {}
+    for field, keys in STATS_FIELDS.items():
+        value = _pick(raw_stats, keys) if raw_stats else None
+        stats[field] = _as_pct(value) if field == 'participation_rate' else _as_int(value)
+
+    return {'header': "", 'candidates': candidates, 'stats': stats}
+
+class ResultCapture:
+    """Collects result payloads seen on the network for the current page"""
+
+    def __init__(self, page, raw_dir=None, url_pattern=RESULT_URL_PATTERN):
+        self.page = page
+        self.raw_dir = raw_dir
+        self.url_pattern = url_pattern
+        self.payloads = []  # (source, url, data) since the last begin(), for the clicked zone only
+        self.ignored = 0  # payloads since begin() that belong to another zone
+        self.zone_id = None
+        self.name = None
+        self._arrived = asyncio.Event()
+
+        if self.raw_dir:
+            os.makedirs(self.raw_dir, exist_ok=True)
+
+    def attach(self):
+        self.page.on("response", self._on_response)
+        self.page.on("websocket", self._on_websocket)
+
+    def detach(self):
+        self.page.remove_listener("response", self._on_response)
+        self.page.remove_listener("websocket", self._on_websocket)
+
+    def begin(self, zone_id=None, name=None):
+        """
+        Call right before the click that triggers a new result view, with the
+        clicked li's data-zn and/or commune name so stale payloads are ignored
+        """
+        self.payloads = []
+        self.ignored = 0
+        self.zone_id = zone_id
+        self.name = name
+        self._arrived.clear()
+
+    def _store(self, source, url, data):
+        if not payload_matches(url, data, self.zone_id, self.name):
+            self.ignored += 1
+            return
+        self.payloads.append((source, url, data))
+        if parse_payload(data) is not None:
+            self._arrived.set()
+
+    async def _on_response(self, response):
+        if not self.url_pattern.search(response.url):
+            return
+        if "json" not in (response.headers.get("content-type") or "") and not response.url.endswith(".json"):
+            return
+        try:
+            data = await response.json()
+        except Exception:
+            return
+        self._store("http", response.url, data)
+
+    def _on_websocket(self, ws):
+        ws.on("framereceived", lambda payload: self._on_frame(ws.url, payload))
+
+    def _on_frame(self, url, payload):
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8", errors="ignore")
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        self._store("ws", url, data)
+
+    async def wait_for_result(self, timeout=12):
+        """Returns the newest parsed payload, or None if nothing usable arrived"""
+        try:
+            await asyncio.wait_for(self._arrived.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        for source, url, data in reversed(self.payloads):
+            parsed = parse_payload(data)
+            if parsed is not None:
+                return parsed
+        return None
+
+    def snapshot(self, store, election, region, unit):
+        """Adds the payloads captured since begin() to a SnapshotStore"""
+        if store is None or not self.payloads:
+            return None
+        return store.put(election, region, unit, [
+            {"source": source, "url": url, "data": data}
+            for source, url, data in self.payloads
+        ], kind="json")
+
+    def save_raw(self, key):
+        """Persists every payload captured since begin() as <raw_dir>/<key>.json"""
+        if not self.raw_dir or not self.payloads:
+            return None
+
+        safe_key = re.sub(r"[^\w.-]+", "_", str(key))
+        path = os.path.join(self.raw_dir, f"{safe_key}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([
+                {"source": source, "url": url, "data": data}
+                for source, url, data in self.payloads
+            ], f, indent=2, ensure_ascii=False)
+        return path
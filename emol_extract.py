@@ -0,0 +1,163 @@
+"""
+Shared Emol Result Extractor
+Reads the candidate list and vote summary of the currently displayed result
+view in a single page.evaluate call instead of one CDP round-trip per element.
+"""
+from emol_html import parse_html, query, query_all
+from emol_wait import wait_for_results_settled
+from scrape_telemetry import NO_TELEMETRY
+
+# Runs inside the page. Returns raw text only; number parsing stays in Python
+# so every script applies the same cleaning rules.
+EXTRACT_RESULTS_JS = """(year) => {
+    const text = (root, sel) => {
+        const el = root.querySelector(sel);
+        return el ? el.textContent.trim() : "";
+    };
+    const candidates = Array.from(document.querySelectorAll("ul.res-ul-candidatos li")).map(li => ({
+        name: text(li, "div.res-candidato > b"),
+        party: text(li, "div.res-candidato > span"),
+        votes: text(li, "div.res-votos i"),
+        percentage: text(li, "div.res-votos span"),
+        elected: (li.getAttribute("class") || "").includes("ganador")
+    }));
+    return {
+        header: text(document, ".res-box-content h3"),
+        candidates: candidates,
+        stats: {
+            valid_votes: text(document, 'dl.res-resumen-votacion dt[data-voto="v"] i'),
+            blank_votes: text(document, 'dl.res-resumen-votacion dt[data-voto="b"] i'),
+            null_votes: text(document, 'dl.res-resumen-votacion dt[data-voto="n"] i'),
+            total_votes: text(document, `ol.res-participacion li[data-year="${year}"] span[data-part="vot"]`),
+            participation_rate: text(document, `ol.res-participacion li[data-year="${year}"] b[data-part="pcj"]`)
+        }
+    };
+}"""
+
+def parse_int(text):
+    """'12.345' -> 12345 (0 if not a number)"""
+    digits = (text or "").strip().replace(".", "")
+    return int(digits) if digits.isdigit() else 0
+
+def parse_pct(text):
+    """'45,3%' -> 45.3 (0.0 if not a number)"""
+    cleaned = (text or "").strip().replace(",", ".").replace("%", "")
+    try:
+        return float(cleaned)
+    except ValueError:
+        return 0.0
+
+def parse_results(payload):
+    """Converts the raw payload of EXTRACT_RESULTS_JS into typed values"""
+    candidates = []
+    for cand in payload.get('candidates', []):
+        candidates.append({
+            'name': cand.get('name', ""),
+            'party': cand.get('party', ""),
+            'votes': parse_int(cand.get('votes')),
+            'percentage': parse_pct(cand.get('percentage')),
+            'elected': bool(cand.get('elected'))
+        })
+
+    stats = payload.get('stats', {})
+    return {
+        'header': payload.get('header', ""),
+        'candidates': candidates,
+        'stats': {
+            'valid_votes': parse_int(stats.get('valid_votes')),
+            'blank_votes': parse_int(stats.get('blank_votes')),
+            'null_votes': parse_int(stats.get('null_votes')),
+            'total_votes': parse_int(stats.get('total_votes')),
+            'participation_rate': parse_pct(stats.get('participation_rate'))
+        }
+    }
+
+async def extract_results(page, year="2024"):
+    """Extracts candidates and stats of the current view in one round-trip"""
+    payload = await page.evaluate(EXTRACT_RESULTS_JS, year)
+    return parse_results(payload)
+
+def extract_results_from_html(html, year="2024"):
+    """Same payload as EXTRACT_RESULTS_JS, read from saved HTML (no browser)"""
+    doc = parse_html(html)
+
+    def text(root, sel):
+        el = query(root, sel)
+        return el.text_content().strip() if el else ""
+
+    candidates = []
+    for li in query_all(doc, "ul.res-ul-candidatos li"):
+        candidates.append({
+            'name': text(li, "div.res-candidato > b"),
+            'party': text(li, "div.res-candidato > span"),
+            'votes': text(li, "div.res-votos i"),
+            'percentage': text(li, "div.res-votos span"),
+            'elected': "ganador" in (li.get_attribute("class") or "")
+        })
+
+    return parse_results({
+        'header': text(doc, ".res-box-content h3"),
+        'candidates': candidates,
+        'stats': {
+            'valid_votes': text(doc, 'dl.res-resumen-votacion dt[data-voto="v"] i'),
+            'blank_votes': text(doc, 'dl.res-resumen-votacion dt[data-voto="b"] i'),
+            'null_votes': text(doc, 'dl.res-resumen-votacion dt[data-voto="n"] i'),
+            'total_votes': text(doc, f'ol.res-participacion li[data-year="{year}"] span[data-part="vot"]'),
+            'participation_rate': text(doc, f'ol.res-participacion li[data-year="{year}"] b[data-part="pcj"]')
+        }
+    })
+
+async def extract_commune_data(page, commune_name, telemetry=NO_TELEMETRY):
+    """Extract data from the currently loaded commune page (phases timed in `telemetry`)"""
+    print(f"\n{'='*60}")
+    print(f"Extracting data for: {commune_name}")
+    print(f"{'='*60}")
+
+    # Wait for candidate list to be visible
+    try:
+        with telemetry.span("wait_candidates", commune_name):
+            await page.wait_for_selector("ul.res-ul-candidatos", state="visible", timeout=5000)
+        print("✓ Candidate list found")
+    except:
+        print("✗ Candidate list not visible")
+        return None
+
+    # Don't read the odometers mid-animation
+    with telemetry.span("settle", commune_name):
+        if not await wait_for_results_settled(page, timeout=5000):
+            telemetry.count("not_settled")
+
+    with telemetry.span("extract", commune_name):
+        results = await extract_results(page)
+    return commune_record(commune_name, results)
+
+def commune_record(commune_name, results):
+    """Builds (and prints) the region JSON entry for one commune"""
+    data = {
+        'commune': commune_name,
+        'candidates': [],
+        'stats': results['stats']
+    }
+
+    print(f"Found {len(results['candidates'])} candidates:")
+    for cand in results['candidates']:
+        candidate = {
+            'name': cand['name'] or "Unknown",
+            'party': cand['party'] or "Unknown",
+            'votes': cand['votes'],
+            'percentage': cand['percentage'],
+            'elected': cand['elected']
+        }
+        data['candidates'].append(candidate)
+
+        status = "🏆 ELECTED" if candidate['elected'] else ""
+        print(f"  • {candidate['name']:30} {candidate['votes']:>6} votes ({candidate['percentage']:>5}%) {status}")
+
+    print(f"\nStatistics:")
+    print(f"  Valid: {data['stats']['valid_votes']:,}")
+    print(f"  Blank: {data['stats']['blank_votes']:,}")
+    print(f"  Null: {data['stats']['null_votes']:,}")
+    print(f"  Total: {data['stats']['total_votes']:,}")
+    print(f"  Participation: {data['stats']['participation_rate']}%")
+
+    return data
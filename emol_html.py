@@ -0,0 +1,139 @@
+"""
+Offline HTML Reader
+Minimal DOM + CSS selector support (stdlib only) so saved result pages can be
+parsed with the same selectors the in-page extractor uses, without a browser.
+
+Supported selectors: tag, .class, [attr="value"], descendant (space) and
+child (>) combinators, e.g. 'ol.res-participacion li[data-year="2024"] span'.
+"""
+import re
+from html.parser import HTMLParser
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+COMPOUND_RE = re.compile(r"^([\w-]+|\*)?((?:\.[\w-]+)*)((?:\[[\w-]+(?:=(?:\"[^\"]*\"|'[^']*'|[^\]]*))?\])*)$")
+ATTR_RE = re.compile(r"\[([\w-]+)(?:=(?:\"([^\"]*)\"|'([^']*)'|([^\]]*)))?\]")
+
+class Node:
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs or {})
+        self.parent = parent
+        self.children = []  # Node or str
+
+    @property
+    def classes(self):
+        return (self.attrs.get("class") or "").split()
+
+    def get_attribute(self, name):
+        return self.attrs.get(name)
+
+    def text_content(self):
+        parts = []
+        for child in self.children:
+            parts.append(child if isinstance(child, str) else child.text_content())
+        return "".join(parts)
+
+    def descendants(self):
+        for child in self.children:
+            if isinstance(child, Node):
+                yield child
+                yield from child.descendants()
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document")
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, [(k, v or "") for k, v in attrs], self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(Node(tag, [(k, v or "") for k, v in attrs], self.current))
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open tag; ignore stray end tags
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+def parse_html(html):
+    """Returns the document root Node"""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+def _parse_compound(text):
+    match = COMPOUND_RE.match(text)
+    if not match:
+        raise ValueError(f"Unsupported selector part: {text}")
+    tag, classes, attrs = match.groups()
+    return {
+        "tag": None if tag in (None, "*") else tag.lower(),
+        "classes": [c for c in classes.split(".") if c],
+        "attrs": [(m.group(1), next((g for g in m.groups()[1:] if g is not None), None))
+                  for m in ATTR_RE.finditer(attrs)]
+    }
+
+def _parse_selector(selector):
+    """'a > b c' -> [(None, a), ('>', b), (' ', c)]"""
+    parts = []
+    combinator = None
+    for token in selector.replace(">", " > ").split():
+        if token == ">":
+            combinator = ">"
+            continue
+        parts.append((combinator if parts else None, _parse_compound(token)))
+        combinator = " "
+    return parts
+
+def _matches_compound(node, compound):
+    if compound["tag"] and node.tag != compound["tag"]:
+        return False
+    classes = node.classes
+    if any(c not in classes for c in compound["classes"]):
+        return False
+    for name, value in compound["attrs"]:
+        if name not in node.attrs:
+            return False
+        if value is not None and node.attrs[name] != value:
+            return False
+    return True
+
+def _matches(node, parts, scope):
+    """Right-to-left match of `parts` ending at `node`, never leaving `scope`"""
+    combinator, compound = parts[-1]
+    if not _matches_compound(node, compound):
+        return False
+    if len(parts) == 1:
+        return True
+
+    rest = parts[:-1]
+    ancestor = node.parent
+    while ancestor is not None and ancestor is not scope:
+        if _matches(ancestor, rest, scope):
+            return True
+        if combinator == ">":
+            return False
+        ancestor = ancestor.parent
+    return False
+
+def query_all(root, selector):
+    """Like element.querySelectorAll(selector), in document order"""
+    parts = _parse_selector(selector)
+    return [node for node in root.descendants() if _matches(node, parts, root)]
+
+def query(root, selector):
+    """Like element.querySelector(selector)"""
+    found = query_all(root, selector)
+    return found[0] if found else None
@@ -0,0 +1,81 @@
+"""
+Result Readiness Detection
+Replaces fixed sleeps with a MutationObserver that resolves once the result
+view (candidate list, vote summary, odometer counters) stops changing.
+"""
+
+RESULT_ROOTS = ".res-box-content, ul.res-ul-candidatos, dl.res-resumen-votacion, ol.res-participacion"
+
+SIGNATURE_JS = """() => {
+    const part = (sel) => {
+        const el = document.querySelector(sel);
+        return el ? el.textContent : "";
+    };
+    return part(".res-box-content h3") + "|" + part("ul.res-ul-candidatos") + "|" + part("dl.res-resumen-votacion");
+}"""
+
+SETTLE_JS = """({roots, expected, previous, quietMs, timeoutMs}) => new Promise(resolve => {
+    const start = performance.now();
+    const text = (sel) => {
+        const el = document.querySelector(sel);
+        return el ? el.textContent : "";
+    };
+    const signature = () => text(".res-box-content h3") + "|" + text("ul.res-ul-candidatos") + "|" + text("dl.res-resumen-votacion");
+    const ready = () => {
+        if (!document.querySelector("ul.res-ul-candidatos li")) return false;
+        if (expected && !text(".res-box-content h3").toLowerCase().includes(expected.toLowerCase())) return false;
+        if (previous !== null && signature() === previous) return false;
+        return true;
+    };
+    const relevant = (node) => {
+        const el = node.nodeType === Node.ELEMENT_NODE ? node : node.parentElement;
+        return el && el.closest(roots);
+    };
+
+    let quietTimer = null;
+    let deadline = null;
+    let observer = null;
+    const finish = (settled) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve({settled: settled, elapsed_ms: Math.round(performance.now() - start)});
+    };
+    const arm = () => {
+        clearTimeout(quietTimer);
+        if (ready()) quietTimer = setTimeout(() => finish(true), quietMs);
+    };
+
+    observer = new MutationObserver((mutations) => {
+        if (mutations.some(m => relevant(m.target))) arm();
+    });
+    observer.observe(document.body, {subtree: true, childList: true, characterData: true});
+    deadline = setTimeout(() => finish(false), timeoutMs);
+    arm();
+})"""
+
+async def results_signature(page):
+    """Snapshot of the result view; pass it as `previous` to detect the next update"""
+    return await page.evaluate(SIGNATURE_JS)
+
+async def wait_for_results_settled(page, expected_header=None, previous=None, quiet_ms=300, timeout=10000):
+    """
+    Waits until the candidate list and vote totals are final.
+
+    Resolves once the result view has candidates, the header contains
+    `expected_header` (if given), the content differs from `previous` (if
+    given) and no result node has changed for `quiet_ms`. Gives up after
+    `timeout` ms. Returns True if the view settled, False on timeout.
+    """
+    try:
+        outcome = await page.evaluate(SETTLE_JS, {
+            "roots": RESULT_ROOTS,
+            "expected": expected_header,
+            "previous": previous,
+            "quietMs": quiet_ms,
+            "timeoutMs": timeout
+        })
+    except Exception as e:
+        print(f"  Warning: Readiness check failed: {e}")
+        return False
+    return bool(outcome and outcome.get("settled"))
@@ -0,0 +1,176 @@
+"""
+Columnar Export (Parquet)
+Writes each master table to export/parquet/<table>.parquet so analysis
+doesn't re-parse the CSVs as text on every load:
+- IDs, vote counts and flags as int32, rates/shares as float64
+- low-cardinality strings (types, party names, status, dates, timestamps)
+  dictionary-encoded
+- election-scoped tables sorted and split into one row group per
+  (election_date, office_id); the groups are listed in the file metadata
+  under b"politeia.row_groups" so read_election() only reads the ones it needs
+
+Runs as the last step of merge_regions.py and the GhostMouse consolidators
+(export_after_merge); skipped with a note when pyarrow is not installed.
+
+REQUIRES:
+pip install pyarrow
+
+Usage:
+    python3 export_parquet.py                     # data/*.csv -> export/parquet/
+    python3 export_parquet.py --from-sqlite       # read data/politeia.db instead
+    python3 export_parquet.py --output /tmp/pq    # another output directory
+"""
+import argparse
+import json
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from politeia_sqlite import DATA_DIR, DEFAULT_DB, SCHEMA, SqliteStore, column_types, table_columns, table_rows
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARQUET_DIR = os.path.join(BASE_DIR, "export", "parquet")
+
+ROW_GROUP_SIZE = 50000  # tables without a partition key
+ROW_GROUPS_KEY = b"politeia.row_groups"
+
+# Strings with few distinct values (the rest stay plain strings)
+DICTIONARY_COLUMNS = {
+    "wp_politeia_jurisdictions": ["type"],
+    "wp_politeia_political_parties": ["official_name", "short_name"],
+    "wp_politeia_elections": ["election_date", "title"],
+    "wp_politeia_party_memberships": ["started_on"],
+    "wp_politeia_office_terms": ["started_on", "status"]
+}
+TIMESTAMP_COLUMNS = ["created_at", "updated_at"]
+
+def arrow_schema(table):
+    types = column_types(table)
+    dictionary = DICTIONARY_COLUMNS.get(table, []) + TIMESTAMP_COLUMNS
+    fields = []
+    for column in table_columns(table):
+        if types[column] == "INTEGER":
+            arrow_type = pa.int32()
+        elif types[column] == "REAL":
+            arrow_type = pa.float64()
+        elif column in dictionary:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+def convert(value, sql_type):
+    """CSV text -> Python value for Arrow ('' -> null)"""
+    if value is None or value == "":
+        return None
+    if sql_type == "INTEGER":
+        return int(float(value)) if "." in str(value) else int(value)
+    if sql_type == "REAL":
+        return float(value)
+    return str(value)
+
+def load_table(table, source):
+    """{column: [values]} with values already converted"""
+    columns = table_columns(table)
+    types = column_types(table)
+    data = {c: [] for c in columns}
+    for row in table_rows(table, source):
+        for column, value in zip(columns, row):
+            data[column].append(convert(value, types[column]))
+    return data
+
+def partition_keys(table, data, elections):
+    """
+    (election_date, office_id) per row for the election-scoped tables, or
+    None for tables written in plain ROW_GROUP_SIZE row groups.
+    `elections` maps election id -> (election_date, office_id).
+    """
+    if table == "wp_politeia_elections":
+        return list(zip(data["election_date"], data["office_id"]))
+    if table in ("wp_politeia_election_results", "wp_politeia_candidacies"):
+        return [elections.get(e, (None, None)) for e in data["election_id"]]
+    if table == "wp_politeia_office_terms":
+        return list(zip(data["started_on"], data["office_id"]))
+    return None
+
+def write_table(table, data, path, keys=None):
+    """Writes one table; returns the number of rows"""
+    schema = arrow_schema(table)
+    rows = len(data["id"])
+
+    if keys is None:
+        arrow_table = pa.Table.from_pydict(data, schema=schema)
+        pq.write_table(arrow_table, path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+        return rows
+
+    # Stable sort by partition key (nulls last), then one row group per key
+    order = sorted(range(rows), key=lambda i: (keys[i][0] is None, keys[i][0] or "", keys[i][1] or 0, i))
+    groups = []
+    for i in order:
+        if not groups or groups[-1][0] != keys[i]:
+            groups.append((keys[i], []))
+        groups[-1][1].append(i)
+
+    metadata = {ROW_GROUPS_KEY: json.dumps([[k[0], k[1], len(idx)] for k, idx in groups]).encode("utf-8")}
+    with pq.ParquetWriter(path, schema.with_metadata(metadata), compression="zstd") as writer:
+        for _, idx in groups:
+            chunk = {c: [values[i] for i in idx] for c, values in data.items()}
+            writer.write_table(pa.Table.from_pydict(chunk, schema=schema), row_group_size=len(idx))
+    return rows
+
+def export_tables(source=DATA_DIR, output_dir=PARQUET_DIR):
+    """Exports every table; returns {table: rows}"""
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    elections = {}
+    for table in SCHEMA:  # elections come before results/candidacies
+        start = time.perf_counter()
+        data = load_table(table, source)
+        if table == "wp_politeia_elections":
+            elections = {e: (d, o) for e, d, o in zip(data["id"], data["election_date"], data["office_id"])}
+
+        path = os.path.join(output_dir, f"{table}.parquet")
+        counts[table] = write_table(table, data, path, partition_keys(table, data, elections))
+        print(f"  {table}: {counts[table]} rows, {os.path.getsize(path) / 1024:.0f} KB "
+              f"({time.perf_counter() - start:.2f}s)")
+    return counts
+
+def export_after_merge(source=DATA_DIR, output_dir=PARQUET_DIR):
+    """Last step of the merge/consolidate scripts"""
+    if pa is None:
+        print("  (pyarrow not installed; skipping Parquet export)")
+        return None
+    print(f"\nExporting Parquet to {output_dir}...")
+    return export_tables(source, output_dir)
+
+def read_election(path, election_date, office_id=None, columns=None):
+    """Reads only the row groups of one election date (and office)"""
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.schema_arrow.metadata or {}
+    if ROW_GROUPS_KEY not in metadata:
+        raise ValueError(f"{path} has no election row groups")
+    groups = json.loads(metadata[ROW_GROUPS_KEY])
+    wanted = [i for i, (date, office, _) in enumerate(groups)
+              if date == election_date and (office_id is None or office == office_id)]
+    return parquet_file.read_row_groups(wanted, columns=columns)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the master tables to Parquet")
+    parser.add_argument("--from-sqlite", action="store_true", help=f"Read {DEFAULT_DB} instead of the CSVs")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the master CSVs")
+    parser.add_argument("--output", default=PARQUET_DIR, help="Output directory")
+    args = parser.parse_args()
+
+    if pa is None:
+        raise SystemExit("❌ pyarrow is not installed (pip install pyarrow)")
+
+    source = SqliteStore(DEFAULT_DB) if args.from_sqlite else args.data_dir
+    start = time.perf_counter()
+    counts = export_tables(source, args.output)
+    print(f"✓ Exported {sum(counts.values())} rows to {args.output} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,177 @@
+"""
+Bulk SQL Export for WordPress
+Streams the master tables into a MySQL/MariaDB dump with chunked multi-row
+INSERTs, or into tab-separated files plus a LOAD DATA script. Tables are
+written parents first (jurisdictions -> parties -> people -> elections ->
+results/candidacies/memberships/terms), so the load never trips a foreign key.
+
+Usage:
+    python3 export_sql.py                          # data/*.csv -> export/politeia_dump.sql
+    python3 export_sql.py --format load-data       # export/*.tsv + export/load_data.sql
+    python3 export_sql.py --from-sqlite            # read data/politeia.db instead of the CSVs
+    python3 export_sql.py --prefix wp2_            # WordPress table prefix other than wp_
+    python3 export_sql.py --check                  # load the dump into SQLite and compare counts
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from politeia_sqlite import DATA_DIR, DEFAULT_DB, SCHEMA, SqliteStore, column_types, table_columns, table_rows
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPORT_DIR = os.path.join(BASE_DIR, "export")
+
+# SCHEMA is already in FK order; kept explicit here because the loader relies on it
+EXPORT_ORDER = list(SCHEMA)
+
+def target_name(table, prefix="wp_"):
+    """wp_politeia_people -> <prefix>politeia_people"""
+    return prefix + table[len("wp_"):]
+
+def sql_literal(value, sql_type, dialect="mysql"):
+    """One value as a SQL literal ('' -> NULL, numbers unquoted)"""
+    if value is None or value == "":
+        return "NULL"
+    if sql_type in ("INTEGER", "REAL"):
+        try:
+            float(value)
+            return str(value)
+        except ValueError:
+            pass
+    text = str(value).replace("'", "''")
+    if dialect == "mysql":
+        text = text.replace("\\", "\\\\")
+    return f"'{text}'"
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def write_inserts(source, output_path, prefix="wp_", chunk_size=500, dialect="mysql"):
+    """Writes one dump file with multi-row INSERTs; returns {table: rows}"""
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    counts = {}
+    with open(output_path, "w", encoding="utf-8") as f:
+        if dialect == "mysql":
+            f.write("SET NAMES utf8mb4;\nSET autocommit = 0;\nSTART TRANSACTION;\n\n")
+        else:
+            f.write("BEGIN;\n\n")
+
+        for table in EXPORT_ORDER:
+            columns = table_columns(table)
+            types = column_types(table)
+            col_types = [types[c] for c in columns]
+            head = f"INSERT INTO {target_name(table, prefix)} ({', '.join(columns)}) VALUES\n"
+
+            counts[table] = 0
+            f.write(f"-- {target_name(table, prefix)}\n")
+            for chunk in chunked(table_rows(table, source), chunk_size):
+                values = ",\n".join(
+                    "(" + ", ".join(sql_literal(v, t, dialect) for v, t in zip(row, col_types)) + ")"
+                    for row in chunk
+                )
+                f.write(head + values + ";\n")
+                counts[table] += len(chunk)
+            f.write("\n")
+
+        f.write("COMMIT;\n")
+    return counts
+
+def tsv_field(value):
+    """LOAD DATA default escaping: \\N for NULL, backslash-escaped tab/newline"""
+    if value is None or value == "":
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+def write_load_data(source, output_dir, prefix="wp_"):
+    """Writes <table>.tsv files plus load_data.sql; returns {table: rows}"""
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    statements = ["SET NAMES utf8mb4;", "SET autocommit = 0;", "START TRANSACTION;", ""]
+
+    for table in EXPORT_ORDER:
+        tsv_path = os.path.join(output_dir, f"{target_name(table, prefix)}.tsv")
+        counts[table] = 0
+        with open(tsv_path, "w", encoding="utf-8", newline="") as f:
+            for row in table_rows(table, source):
+                f.write("\t".join(tsv_field(v) for v in row) + "\n")
+                counts[table] += 1
+
+        statements.append(
+            f"LOAD DATA LOCAL INFILE '{os.path.basename(tsv_path)}'\n"
+            f"    INTO TABLE {target_name(table, prefix)}\n"
+            f"    CHARACTER SET utf8mb4\n"
+            f"    FIELDS TERMINATED BY '\\t'\n"
+            f"    LINES TERMINATED BY '\\n'\n"
+            f"    ({', '.join(table_columns(table))});"
+        )
+
+    statements += ["", "COMMIT;"]
+    with open(os.path.join(output_dir, "load_data.sql"), "w", encoding="utf-8") as f:
+        f.write("\n".join(statements) + "\n")
+    return counts
+
+def check_against_sqlite(source, counts, output_dir=EXPORT_DIR, chunk_size=500):
+    """
+    Stand-in for a MariaDB load: replays a SQLite-dialect dump into an
+    in-memory DB built from the same schema and compares row counts.
+    """
+    dump_path = os.path.join(output_dir, "politeia_dump.sqlite.sql")
+    write_inserts(source, dump_path, chunk_size=chunk_size, dialect="sqlite")
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON")
+    for table, columns in SCHEMA.items():
+        conn.execute(f"CREATE TABLE {table} ({columns})")
+    with open(dump_path, "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+    ok = True
+    for table in EXPORT_ORDER:
+        loaded = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        status = "✓" if loaded == counts[table] else "❌"
+        ok = ok and loaded == counts[table]
+        print(f"  {status} {table}: {loaded}/{counts[table]} rows loaded")
+    violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+    if violations:
+        print(f"  ❌ {len(violations)} foreign key violation(s)")
+        ok = False
+    conn.close()
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the master tables as a bulk SQL load")
+    parser.add_argument("--format", choices=["inserts", "load-data"], default="inserts")
+    parser.add_argument("--from-sqlite", action="store_true", help=f"Read {DEFAULT_DB} instead of the CSVs")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the master CSVs")
+    parser.add_argument("--output", default=EXPORT_DIR, help="Output directory")
+    parser.add_argument("--prefix", default="wp_", help="WordPress table prefix")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per INSERT statement")
+    parser.add_argument("--check", action="store_true", help="Verify the dump by loading it into SQLite")
+    args = parser.parse_args()
+
+    source = SqliteStore(DEFAULT_DB) if args.from_sqlite else args.data_dir
+    start = time.perf_counter()
+
+    if args.format == "inserts":
+        output_path = os.path.join(args.output, "politeia_dump.sql")
+        counts = write_inserts(source, output_path, args.prefix, args.chunk_size)
+    else:
+        output_path = os.path.join(args.output, "load_data.sql")
+        counts = write_load_data(source, args.output, args.prefix)
+
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - start
+    for table, count in counts.items():
+        print(f"  {target_name(table, args.prefix)}: {count} rows")
+    print(f"✓ Exported {total} rows to {output_path} in {elapsed:.2f}s")
+
+    if args.check and not check_against_sqlite(source, counts, args.output, args.chunk_size):
+        raise SystemExit(1)
@@ -0,0 +1,226 @@
+"""
+Jurisdiction Gazetteer
+One authoritative list of Chile's regions, provinces and communes
+(data/gazetteer.csv), replacing the hand-typed COMMUNE_CODES maps:
+
+    code         CUT code (INE/SUBDERE), zero-padded: region 01, province 011, commune 01101
+    name         official name
+    type         REGION / PROVINCE / COMMUNE
+    parent_code  province of a commune, region of a province
+    region       roman region code used for the repo's folders (RM, XV, ...)
+    district     diputados district (1-28) of a commune
+    emol_id      Emol sidebar data-zn, learned while scraping (record_emol_ids)
+    servel_id    SERVEL's own commune id, where known
+    aliases      other spellings seen in the sources, "|"-separated
+
+The file is read once per process. Lookups go through an accent/case/
+punctuation-folded index, so "Llay-Llay", "LLAILLAY" and "Llaillay" or
+"Región Metropolitana de Santiago" and "RM" cost one dict hit each.
+
+District 14 (Maipo/Talagante/Melipilla) is filled in by hand: the 2021 RM
+diputados scrape lists district 13 twice instead.
+
+Usage:
+    python3 gazetteer.py                 # counts per type and region
+    python3 gazetteer.py "Til Til"       # look names up
+"""
+import csv
+import os
+import sys
+from collections import namedtuple
+
+from person_resolver import name_tokens
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GAZETTEER_PATH = os.path.join(BASE_DIR, "data", "gazetteer.csv")
+
+COLUMNS = ["code", "name", "type", "parent_code", "region", "district", "emol_id", "servel_id", "aliases"]
+Place = namedtuple("Place", COLUMNS)
+
+# A bare name matching several places ("Valparaíso") resolves in this order
+TYPE_PRIORITY = ["COMMUNE", "REGION", "PROVINCE"]
+
+def fold(name):
+    """Lookup key: 'Región de O’Higgins' -> 'region de ohiggins'"""
+    return " ".join(name_tokens((name or "").replace("’", "'")))
+
+class Gazetteer:
+    def __init__(self, path=GAZETTEER_PATH):
+        self.path = path
+        self.places = {}  # code -> Place
+        self.index = {}   # (type, folded name) -> code
+        self.children = {}  # parent code -> [codes]
+        self.emol = {}    # emol_id -> code
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                self.add(Place(**{c: row.get(c, "") for c in COLUMNS}))
+
+    def add(self, place):
+        self.places[place.code] = place
+        for name in [place.name] + [a for a in place.aliases.split("|") if a]:
+            self.index.setdefault((place.type, fold(name)), place.code)
+        if place.parent_code:
+            self.children.setdefault(place.parent_code, []).append(place.code)
+        if place.emol_id:
+            self.emol[place.emol_id] = place.code
+
+    def lookup(self, name, type_=None):
+        """Place for a name (any known spelling), or None"""
+        key = fold(name)
+        for t in ([type_] if type_ else TYPE_PRIORITY):
+            code = self.index.get((t, key))
+            if code is not None:
+                return self.places[code]
+        return None
+
+    def by_emol_id(self, emol_id):
+        code = self.emol.get(str(emol_id))
+        return self.places[code] if code else None
+
+    def parent(self, place):
+        return self.places.get(place.parent_code) if place else None
+
+    def region_of(self, place):
+        """Region Place of a commune/province (itself for a region)"""
+        while place is not None and place.type != "REGION":
+            place = self.parent(place)
+        return place
+
+    def communes_in(self, code):
+        """Commune codes below a region or province code"""
+        found = []
+        for child in self.children.get(code, []):
+            if self.places[child].type == "COMMUNE":
+                found.append(child)
+            else:
+                found.extend(self.communes_in(child))
+        return found
+
+    def communes_in_district(self, district):
+        return [p.code for p in self.places.values() if p.type == "COMMUNE" and p.district == str(district)]
+
+    def record_emol_ids(self, communes):
+        """
+        Stores the data-zn of each (name, emol_id) pair read from the Emol
+        sidebar and rewrites the file if anything changed. Returns the names
+        that are not in the gazetteer.
+        """
+        changed, unknown = False, []
+        for name, emol_id in communes:
+            place = self.lookup(name, "COMMUNE")
+            if place is None:
+                unknown.append(name)
+                continue
+            if place.emol_id != str(emol_id):
+                self.places[place.code] = place._replace(emol_id=str(emol_id))
+                self.emol[str(emol_id)] = place.code
+                changed = True
+        if changed:
+            self.save()
+        return unknown
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(self.places.values())
+        os.replace(tmp_path, self.path)
+
+_GAZETTEER = None
+
+def get_gazetteer():
+    """The shared instance (data/gazetteer.csv is read on first use)"""
+    global _GAZETTEER
+    if _GAZETTEER is None:
+        _GAZETTEER = Gazetteer()
+    return _GAZETTEER
+
+def lookup(name, type_=None):
+    return get_gazetteer().lookup(name, type_)
+
+def commune_code(name):
+    """CUT code of a commune name, or '' if unknown (the external_code column)"""
+    place = lookup(name, "COMMUNE")
+    return place.code if place else ""
+
+def canonical_name(name, type_=None):
+    """Official spelling of a place name (unknown names kept as given)"""
+    place = lookup(name, type_)
+    return place.name if place else name
+
+def jurisdiction_key(name, type_=None):
+    """Key equal for every spelling of one place: its code, else the folded name"""
+    place = lookup(name, type_)
+    return place.code if place else fold(name)
+
+def region_of(name, type_="COMMUNE"):
+    return get_gazetteer().region_of(lookup(name, type_))
+
+def district_of(name):
+    place = lookup(name, "COMMUNE")
+    return int(place.district) if place and place.district else None
+
+def jurisdiction_values(name, type_, parent_id=""):
+    """(official_name, common_name, type, parent_id, external_code) for a new jurisdictions row"""
+    place = lookup(name, type_)
+    if place is None:
+        return name, name, type_, parent_id, ""
+    return place.name, name, type_, parent_id, place.code
+
+class JurisdictionCache:
+    """
+    Jurisdiction rows of one set of tables. `names` is the old
+    cache_jurisdictions (stored name -> id); get() also finds a row stored
+    under another spelling of the same place, so "Llay-Llay" and "Llaillay"
+    or "Región Metropolitana" and "Región Metropolitana de Santiago" stop
+    creating separate rows. The first (lowest id) row of a place wins.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.keys = {}
+
+    def add(self, jurisdiction_id, name, type_=None):
+        jurisdiction_id = int(jurisdiction_id)
+        self.names[name] = jurisdiction_id
+        self.keys.setdefault(jurisdiction_key(name, type_), jurisdiction_id)
+
+    def load(self, names):
+        """Restores `names` saved in a merge state file"""
+        self.names, self.keys = {}, {}
+        for name, jurisdiction_id in names.items():
+            self.add(jurisdiction_id, name)
+
+    def created(self, jurisdiction_id, name, type_=None):
+        """Records the row the caller just inserted for `name`"""
+        self.add(jurisdiction_id, canonical_name(name, type_), type_)
+        self.names[name] = int(jurisdiction_id)
+
+    def get(self, name, type_=None):
+        jurisdiction_id = self.names.get(name)
+        if jurisdiction_id is None:
+            jurisdiction_id = self.keys.get(jurisdiction_key(name, type_))
+            if jurisdiction_id is not None:
+                self.names[name] = jurisdiction_id
+        return jurisdiction_id
+
+if __name__ == "__main__":
+    gazetteer = get_gazetteer()
+    if len(sys.argv) > 1:
+        for name in sys.argv[1:]:
+            place = gazetteer.lookup(name)
+            if place is None:
+                print(f"  {name}: not found")
+                continue
+            region = gazetteer.region_of(place)
+            district = f", district {place.district}" if place.district else ""
+            print(f"  {name}: {place.name} ({place.type} {place.code}, {region.name}{district})")
+    else:
+        counts = {}
+        for place in gazetteer.places.values():
+            counts[place.type] = counts.get(place.type, 0) + 1
+        print(", ".join(f"{n} {t.lower()}s" for t, n in counts.items()))
+        for code, place in gazetteer.places.items():  # north to south, as in the file
+            if place.type == "REGION":
+                print(f"  {place.region:>4} {place.name}: {len(gazetteer.communes_in(code))} communes")
@@ -1,13 +1,35 @@
 """
 Merge Region Data Script
 Consolidates JSON data from regions into the master CSV files in PoliteiaDB/data
+Reads every <CODE>/region_<code>_data.json that scrape_regions.py writes
+(all of scrape_regions.REGION_NAMES, RM included).
+
+The merge is idempotent: rows are matched on their natural keys (election =
+office + jurisdiction + date, candidacy = election + person, ...), so only new
+rows are appended and only changed rows are rewritten. Region JSONs whose
+content hash matches the last merge are skipped (see MERGE_STATE_FILE).
+
+Pass --sqlite to merge into data/politeia.db (see politeia_sqlite.py) instead
+of the CSVs; the whole run is then one transaction.
 """
+import hashlib
 import json
 import csv
 import os
-from datetime import datetime
+import sys
+
+from state_index import StateIndex
+from table_writer import TableSet
+from export_parquet import export_after_merge
+from partitions import PartitionStore, sync_after_merge
+from rollups import rollup_after_merge
+from scrape_regions import REGION_NAMES, region_output_path
+from gazetteer import JurisdictionCache, jurisdiction_values
+from party_normalizer import PartyRegistry, alias_cache_path
+from person_resolver import PersonResolver, match_cache_path, split_name
 
 DATA_DIR = "/Users/nicolas/Desktop/PoliteiaDB/data"
+MERGE_STATE_FILE = os.path.join(DATA_DIR, "merge_state.json")
 
 # CSV Tables and Columns
 TABLES = {
@@ -25,83 +47,229 @@ OFFICE_ALCALDE = 1
 ELECTION_DATE = "2024-10-27"
 TERM_START_DATE = "2024-12-06"
 
-def now():
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def comparable(values):
+    """Values as numbers where they parse ("0" == "0.0", "45.3" == "45.30")"""
+    out = []
+    for value in values:
+        try:
+            out.append(float(value))
+        except (TypeError, ValueError):
+            out.append("" if value is None else str(value))
+    return tuple(out)
+
+def file_hash(path):
+    """sha256 of a source file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 class Merger:
-    def __init__(self):
+    def __init__(self, force=False, store=None):
+        self.force = force  # merge even if the source file is unchanged
+        self.store = store  # politeia_sqlite.SqliteStore, or None for the CSVs
         self.ids = {}
-        self.cache_people = {}  # "Given Paternal" -> id
-        self.cache_parties = {} # "Party Name" -> id
-        self.cache_jurisdictions = {} # "Name" -> id
-        self.writers = {}
-        self.files = {}
+        # Name variants -> person id (match cache kept per destination, like the source hashes)
+        self.people = PersonResolver(store.path + ".person_matches.json" if store else match_cache_path(DATA_DIR))
+        self.parties = PartyRegistry(alias_cache_path(DATA_DIR))  # raw party strings -> id
+        self.jurisdictions = JurisdictionCache()  # any spelling of a place -> id
+        # Natural keys of existing rows -> id (and compared values)
+        self.cache_elections = {}  # (office_id, jurisdiction_id, election_date) -> id
+        self.cache_results = {}  # election_id -> (id, values)
+        self.cache_candidacies = {}  # (election_id, person_id) -> (id, values)
+        self.cache_memberships = {}  # (person_id, party_id, started_on) -> id
+        self.cache_office_terms = {}  # (person_id, office_id, jurisdiction_id, started_on) -> id
+        self.updates = {}  # table -> {id: changed columns}
+        self.deletes = {}  # table -> ids of rows to remove
+        self.source_hashes = {}
+        self.tables = None  # table_writer.TableSet
         
     def load_current_state(self):
-        print("Loading current state from master CSVs...")
-        
+        self.index = StateIndex(DATA_DIR, TABLES, "merge_index")
+        state = self.index.load() if self.store is None else None
+        if self.store is not None:
+            print(f"Loading current state from {self.store.path}...")
+            self.scan_tables()
+        elif state is not None:
+            print("Loading current state from the state index...")
+            self.restore_state(state)
+            for table in TABLES:
+                print(f"  {table}: Next ID {self.ids[table]}")
+        else:
+            print("Loading current state from master CSVs...")
+            self.scan_tables()
+        self.people.load_matches()
+
+        if os.path.exists(self.merge_state_file()):
+            with open(self.merge_state_file(), 'r', encoding='utf-8') as f:
+                self.source_hashes = json.load(f)
+
+    def merge_state_file(self):
+        """Source hashes are tracked per destination (CSVs or a SQLite DB)"""
+        return self.store.path + ".merge_state.json" if self.store else MERGE_STATE_FILE
+
+    def read_table(self, table):
+        """Existing rows of a table as dicts of strings"""
+        if self.store is not None:
+            yield from self.store.iter_rows(table)
+            return
+        file_path = os.path.join(DATA_DIR, f"{table}.csv")
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                yield from csv.DictReader(f)
+
+    def scan_tables(self):
         # 1. Load Max IDs and Caches
         for table in TABLES:
-            file_path = os.path.join(DATA_DIR, f"{table}.csv")
             max_id = 0
             
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        # Update Max ID
-                        curr_id = int(row['id'])
-                        if curr_id > max_id:
-                            max_id = curr_id
-                            
-                        # Populate Caches
-                        if table == "wp_politeia_people":
-                            full_name = f"{row['given_names']} {row['paternal_surname']}".strip()
-                            self.cache_people[full_name] = curr_id
-                            
-                        elif table == "wp_politeia_political_parties":
-                            self.cache_parties[row['official_name']] = curr_id
-                            
-                        elif table == "wp_politeia_jurisdictions":
-                            self.cache_jurisdictions[row['official_name']] = curr_id
-                            
+            for row in self.read_table(table):
+                # Update Max ID
+                curr_id = int(row['id'])
+                if curr_id > max_id:
+                    max_id = curr_id
+                    
+                # Populate Caches
+                if table == "wp_politeia_people":
+                    full_name = f"{row['given_names']} {row['paternal_surname']}".strip()
+                    self.people.add(curr_id, full_name)
+                    
+                elif table == "wp_politeia_political_parties":
+                    self.parties.add(curr_id, row['official_name'])
+                    
+                elif table == "wp_politeia_jurisdictions":
+                    self.jurisdictions.add(curr_id, row['official_name'], row['type'])
+
+                elif table == "wp_politeia_elections":
+                    key = (row['office_id'], row['jurisdiction_id'], row['election_date'])
+                    self.cache_elections[key] = curr_id
+
+                elif table == "wp_politeia_election_results":
+                    self.cache_results[row['election_id']] = (curr_id, (
+                        row['valid_votes'], row['blank_votes'], row['null_votes'],
+                        row['total_votes'], row['participation_rate']))
+
+                elif table == "wp_politeia_candidacies":
+                    key = (row['election_id'], row['person_id'])
+                    self.cache_candidacies[key] = (curr_id, (
+                        row['party_id'], row['votes'], row['vote_share'], row['elected']))
+
+                elif table == "wp_politeia_party_memberships":
+                    key = (row['person_id'], row['party_id'], row['started_on'])
+                    self.cache_memberships[key] = curr_id
+
+                elif table == "wp_politeia_office_terms":
+                    key = (row['person_id'], row['office_id'], row['jurisdiction_id'], row['started_on'])
+                    self.cache_office_terms[key] = curr_id
+                    
             self.ids[table] = max_id + 1
             print(f"  {table}: Next ID {self.ids[table]}")
 
+    def export_state(self):
+        """Caches as JSON-friendly lists (tuple keys don't survive json)"""
+        return {
+            "ids": self.ids,
+            "people": self.people.names,
+            "parties": self.parties.names,
+            "jurisdictions": self.jurisdictions.names,
+            "elections": [[*k, v] for k, v in self.cache_elections.items()],
+            "results": [[k, v[0], list(v[1])] for k, v in self.cache_results.items()],
+            "candidacies": [[*k, v[0], list(v[1])] for k, v in self.cache_candidacies.items()],
+            "memberships": [[*k, v] for k, v in self.cache_memberships.items()],
+            "office_terms": [[*k, v] for k, v in self.cache_office_terms.items()]
+        }
+
+    def restore_state(self, state):
+        self.ids = state["ids"]
+        for name, person_id in state["people"].items():
+            self.people.add(person_id, name)
+        for name, party_id in state["parties"].items():
+            self.parties.add(party_id, name)
+        self.jurisdictions.load(state["jurisdictions"])
+        self.cache_elections = {tuple(e[:3]): e[3] for e in state["elections"]}
+        self.cache_results = {r[0]: (r[1], tuple(r[2])) for r in state["results"]}
+        self.cache_candidacies = {tuple(c[:2]): (c[2], tuple(c[3])) for c in state["candidacies"]}
+        self.cache_memberships = {tuple(m[:3]): m[3] for m in state["memberships"]}
+        self.cache_office_terms = {tuple(t[:4]): t[4] for t in state["office_terms"]}
+
     def open_append_writers(self):
-        for table, cols in TABLES.items():
-            f = open(os.path.join(DATA_DIR, f"{table}.csv"), "a", newline="", encoding="utf-8")
-            w = csv.DictWriter(f, fieldnames=cols)
-            self.files[table] = f
-            self.writers[table] = w
+        if self.store is not None:
+            self.tables = TableSet(self.store.open_writers(TABLES), ids=self.ids)
+            self.store.begin()
+            return
+        self.tables = TableSet.open_csv(DATA_DIR, TABLES, ids=self.ids)
 
     def close(self):
-        for f in self.files.values():
-            f.close()
+        self.tables.close()
+        self.people.save_matches()
+        self.parties.save_aliases()
+        self.people.report()
+        if self.store is not None:
+            for table, changes in self.updates.items():
+                for row_id, values in changes.items():
+                    self.store.update_row(table, int(row_id), values)
+            for table, row_ids in self.deletes.items():
+                for row_id in row_ids:
+                    self.store.delete_row(table, int(row_id))
+            self.store.commit()
+            self.updates = {}
+            self.deletes = {}
+        else:
+            self.apply_updates()
+            self.index.save(self.export_state())
+
+        # Only remember source hashes once every row is on disk
+        with open(self.merge_state_file(), 'w', encoding='utf-8') as f:
+            json.dump(self.source_hashes, f, indent=2, ensure_ascii=False)
+
+    def queue_update(self, table, row_id, values):
+        """Changed columns of an existing row, written by apply_updates()"""
+        values = {k: str(v) for k, v in values.items()}
+        values["updated_at"] = self.tables.timestamp
+        self.updates.setdefault(table, {}).setdefault(str(row_id), {}).update(values)
+
+    def queue_delete(self, table, row_id):
+        """An existing row that no longer holds, removed by apply_updates()"""
+        self.deletes.setdefault(table, set()).add(str(row_id))
+        self.updates.get(table, {}).pop(str(row_id), None)
+
+    def apply_updates(self):
+        """
+        Rewrites only the tables that have changed or removed rows (one pass
+        each), editing their partitions in place so the next sync stays
+        incremental
+        """
+        store = PartitionStore(DATA_DIR)
+        for table in sorted(set(self.updates) | set(self.deletes)):
+            changes = self.updates.get(table, {})
+            removed = self.deletes.get(table, set())
+            if not changes and not removed:
+                continue
+            store.update_rows(table, changes, removed)
+            done = [f"{label} {len(ids)} row(s)" for label, ids in (("Updated", changes), ("Removed", removed)) if ids]
+            print(f"  {table}: {', '.join(done)}")
+        self.updates = {}
+        self.deletes = {}
 
     def merge_region(self, json_file, region_name):
+        source_key = os.path.abspath(json_file)
+        source_hash = file_hash(json_file)
+        if not self.force and self.source_hashes.get(source_key) == source_hash:
+            print(f"\n↷ Skipping {json_file} (unchanged since last merge)")
+            return
+
         print(f"\nMerging {json_file}...")
         
         with open(json_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
+        counts = {"new": 0, "updated": 0, "unchanged": 0}
             
         # 1. Ensure Region Jurisdiction
-        if region_name in self.cache_jurisdictions:
-            region_id = self.cache_jurisdictions[region_name]
-        else:
-            region_id = self.ids["wp_politeia_jurisdictions"]
-            self.writers["wp_politeia_jurisdictions"].writerow({
-                "id": region_id,
-                "official_name": region_name,
-                "common_name": region_name,
-                "type": "REGION",
-                "parent_id": "",
-                "external_code": "",
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.cache_jurisdictions[region_name] = region_id
-            self.ids["wp_politeia_jurisdictions"] += 1
+        region_id = self.jurisdictions.get(region_name, "REGION")
+        if region_id is None:
+            region_id = self.tables.insert("wp_politeia_jurisdictions", *jurisdiction_values(region_name, "REGION"))
+            self.jurisdictions.created(region_id, region_name, "REGION")
             print(f"  Created Region: {region_name} (ID {region_id})")
 
         # 2. Process Communes
@@ -109,50 +277,43 @@ class Merger:
             commune_name = commune_data['commune']
             
             # Jurisdiction (Commune)
-            if commune_name in self.cache_jurisdictions:
-                commune_id = self.cache_jurisdictions[commune_name]
-            else:
-                commune_id = self.ids["wp_politeia_jurisdictions"]
-                self.writers["wp_politeia_jurisdictions"].writerow({
-                    "id": commune_id,
-                    "official_name": commune_name,
-                    "common_name": commune_name,
-                    "type": "COMMUNE",
-                    "parent_id": region_id,
-                    "external_code": "",
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.cache_jurisdictions[commune_name] = commune_id
-                self.ids["wp_politeia_jurisdictions"] += 1
+            commune_id = self.jurisdictions.get(commune_name, "COMMUNE")
+            if commune_id is None:
+                commune_id = self.tables.insert("wp_politeia_jurisdictions",
+                                                *jurisdiction_values(commune_name, "COMMUNE", region_id))
+                self.jurisdictions.created(commune_id, commune_name, "COMMUNE")
             
-            # Election
-            election_id = self.ids["wp_politeia_elections"]
-            self.writers["wp_politeia_elections"].writerow({
-                "id": election_id,
-                "office_id": OFFICE_ALCALDE,
-                "jurisdiction_id": commune_id,
-                "election_date": ELECTION_DATE,
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.ids["wp_politeia_elections"] += 1
+            # Election (natural key: office + jurisdiction + date)
+            election_key = (str(OFFICE_ALCALDE), str(commune_id), ELECTION_DATE)
+            if election_key in self.cache_elections:
+                election_id = self.cache_elections[election_key]
+            else:
+                election_id = self.tables.insert("wp_politeia_elections",
+                                                 OFFICE_ALCALDE, commune_id, ELECTION_DATE)
+                self.cache_elections[election_key] = election_id
             
-            # Results
+            # Results (one per election)
             stats = commune_data['stats']
-            self.writers["wp_politeia_election_results"].writerow({
-                "id": self.ids["wp_politeia_election_results"],
-                "election_id": election_id,
-                "jurisdiction_id": commune_id,
+            result_values = {
                 "valid_votes": stats.get('valid_votes', 0),
                 "blank_votes": stats.get('blank_votes', 0),
                 "null_votes": stats.get('null_votes', 0),
                 "total_votes": stats.get('total_votes', 0),
-                "participation_rate": stats.get('participation_rate', 0),
-                "created_at": now(),
-                "updated_at": now()
-            })
-            self.ids["wp_politeia_election_results"] += 1
+                "participation_rate": stats.get('participation_rate', 0)
+            }
+            existing = self.cache_results.get(str(election_id))
+            compared = tuple(str(v) for v in result_values.values())
+            if existing is None:
+                result_id = self.tables.insert("wp_politeia_election_results",
+                                               election_id, commune_id, *result_values.values())
+                self.cache_results[str(election_id)] = (result_id, compared)
+                counts["new"] += 1
+            elif comparable(existing[1]) != comparable(compared):
+                self.queue_update("wp_politeia_election_results", existing[0], result_values)
+                self.cache_results[str(election_id)] = (existing[0], compared)
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
             
             # Candidates
             for cand in commune_data['candidates']:
@@ -160,137 +321,90 @@ class Merger:
                 party_name = cand['party']
                 
                 # Person
-                if name in self.cache_people:
-                    person_id = self.cache_people[name]
-                else:
-                    person_id = self.ids["wp_politeia_people"]
-                    parts = name.strip().split()
-                    if len(parts) >= 2:
-                        given = " ".join(parts[:-1])
-                        paternal = parts[-1]
-                    else:
-                        given = parts[0] if parts else "Unknown"
-                        paternal = ""
-                        
-                    self.writers["wp_politeia_people"].writerow({
-                        "id": person_id,
-                        "given_names": given,
-                        "paternal_surname": paternal,
-                        "created_at": now(),
-                        "updated_at": now()
-                    })
-                    self.cache_people[name] = person_id
-                    self.ids["wp_politeia_people"] += 1
+                person_id = self.people.resolve(name)
+                if person_id is None:
+                    given, paternal = split_name(name)
+                    person_id = self.tables.insert("wp_politeia_people", given, paternal)
+                    self.people.created(person_id, name)
                     
                 # Party
-                if party_name in self.cache_parties:
-                    party_id = self.cache_parties[party_name]
-                else:
-                    party_id = self.ids["wp_politeia_political_parties"]
-                    short = party_name.split(" - ")[0].strip() if " - " in party_name else ""
-                    
-                    self.writers["wp_politeia_political_parties"].writerow({
-                        "id": party_id,
-                        "official_name": party_name,
-                        "short_name": short,
-                        "created_at": now(),
-                        "updated_at": now()
-                    })
-                    self.cache_parties[party_name] = party_id
-                    self.ids["wp_politeia_political_parties"] += 1
+                party_id = self.parties.resolve(party_name)
+                if party_id is None:
+                    info = self.parties.parse(party_name)
+                    party_id = self.tables.insert("wp_politeia_political_parties", info.party, info.short_name)
+                    self.parties.created(party_id, party_name)
                     
-                # Candidacy
-                self.writers["wp_politeia_candidacies"].writerow({
-                    "id": self.ids["wp_politeia_candidacies"],
-                    "election_id": election_id,
-                    "person_id": person_id,
+                # Candidacy (natural key: election + person)
+                candidacy_values = {
                     "party_id": party_id,
                     "votes": cand['votes'],
                     "vote_share": cand['percentage'],
-                    "elected": 1 if cand['elected'] else 0,
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.ids["wp_politeia_candidacies"] += 1
+                    "elected": 1 if cand['elected'] else 0
+                }
+                candidacy_key = (str(election_id), str(person_id))
+                existing = self.cache_candidacies.get(candidacy_key)
+                compared = tuple(str(v) for v in candidacy_values.values())
+                previous_party = existing[1][0] if existing else None
+                if existing is None:
+                    candidacy_id = self.tables.insert("wp_politeia_candidacies",
+                                                      election_id, person_id, *candidacy_values.values())
+                    self.cache_candidacies[candidacy_key] = (candidacy_id, compared)
+                    counts["new"] += 1
+                elif comparable(existing[1]) != comparable(compared):
+                    self.queue_update("wp_politeia_candidacies", existing[0], candidacy_values)
+                    self.cache_candidacies[candidacy_key] = (existing[0], compared)
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
                 
-                # Membership
-                self.writers["wp_politeia_party_memberships"].writerow({
-                    "id": self.ids["wp_politeia_party_memberships"],
-                    "person_id": person_id,
-                    "party_id": party_id,
-                    "started_on": ELECTION_DATE,
-                    "created_at": now(),
-                    "updated_at": now()
-                })
-                self.ids["wp_politeia_party_memberships"] += 1
+                # Membership (a candidacy that changed party moves its membership along)
+                membership_key = (str(person_id), str(party_id), ELECTION_DATE)
+                old_membership_key = (str(person_id), str(previous_party), ELECTION_DATE)
+                if membership_key not in self.cache_memberships:
+                    if previous_party is not None and old_membership_key in self.cache_memberships:
+                        membership_id = self.cache_memberships.pop(old_membership_key)
+                        self.queue_update("wp_politeia_party_memberships", membership_id, {"party_id": party_id})
+                        self.cache_memberships[membership_key] = membership_id
+                    else:
+                        self.cache_memberships[membership_key] = self.tables.insert(
+                            "wp_politeia_party_memberships", person_id, party_id, ELECTION_DATE)
                 
-                # Office Term
-                if cand['elected']:
-                    self.writers["wp_politeia_office_terms"].writerow({
-                        "id": self.ids["wp_politeia_office_terms"],
-                        "person_id": person_id,
-                        "office_id": OFFICE_ALCALDE,
-                        "jurisdiction_id": commune_id,
-                        "started_on": TERM_START_DATE,
-                        "status": "ACTIVE",
-                        "created_at": now(),
-                        "updated_at": now()
-                    })
-                    self.ids["wp_politeia_office_terms"] += 1
+                # Office Term (dropped again if a re-merge says not elected)
+                term_key = (str(person_id), str(OFFICE_ALCALDE), str(commune_id), TERM_START_DATE)
+                if cand['elected'] and term_key not in self.cache_office_terms:
+                    self.cache_office_terms[term_key] = self.tables.insert(
+                        "wp_politeia_office_terms", person_id, OFFICE_ALCALDE, commune_id, TERM_START_DATE, "ACTIVE")
+                elif not cand['elected'] and term_key in self.cache_office_terms:
+                    self.queue_delete("wp_politeia_office_terms", self.cache_office_terms.pop(term_key))
         
-        print(f"✓ Merged {len(data)} communes from {region_name}")
+        self.source_hashes[source_key] = source_hash
+        print(f"✓ Merged {len(data)} communes from {region_name} "
+              f"({counts['new']} new, {counts['updated']} updated, {counts['unchanged']} unchanged rows)")
 
 if __name__ == "__main__":
-    merger = Merger()
+    store = None
+    if "--sqlite" in sys.argv:
+        from politeia_sqlite import SqliteStore
+        store = SqliteStore(os.path.join(DATA_DIR, "politeia.db"))
+
+    merger = Merger(force="--force" in sys.argv, store=store)
     merger.load_current_state()
     merger.open_append_writers()
-    
-    # Merge Region I
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/I/region_i_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/I/region_i_data.json", "Región de Tarapacá")
-        
-    # Merge Region II
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/II/region_ii_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/II/region_ii_data.json", "Región de Antofagasta")
-    # Merge Region III
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/III/region_iii_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/III/region_iii_data.json", "Región de Atacama")
-    # Merge Region IV
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/IV/region_iv_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/IV/region_iv_data.json", "Región de Coquimbo")
-    # Merge Region V
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/V/region_v_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/V/region_v_data.json", "Región de Valparaíso")
-    # Merge Region VI
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/VI/region_vi_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/VI/region_vi_data.json", "Región del Libertador General Bernardo O'Higgins")
-    # Merge Region VII
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/VII/region_vii_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/VII/region_vii_data.json", "Región del Maule")
-    # Merge Region VIII
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/VIII/region_viii_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/VIII/region_viii_data.json", "Región del Biobío")
-    # Merge Region IX
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/IX/region_ix_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/IX/region_ix_data.json", "Región de la Araucanía")
-    # Merge Region X
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/X/region_x_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/X/region_x_data.json", "Región de Los Lagos")
-    # Merge Region XI
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/XI/region_xi_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/XI/region_xi_data.json", "Región de Aysén del General Carlos Ibáñez del Campo")
-    # Merge Region XII
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/XII/region_xii_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/XII/region_xii_data.json", "Región de Magallanes y de la Antártica Chilena")
-    # Merge Region XIV
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/XIV/region_xiv_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/XIV/region_xiv_data.json", "Región de Los Ríos")
-    # Merge Region XVI
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/XVI/region_xvi_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/XVI/region_xvi_data.json", "Región de Ñuble")
-    # Merge Region XV
-    if os.path.exists("/Users/nicolas/Desktop/PoliteiaDB/XV/region_xv_data.json"):
-        merger.merge_region("/Users/nicolas/Desktop/PoliteiaDB/XV/region_xv_data.json", "Región de Arica y Parinacota")
-        
+    # Every region scrape_regions.py writes (RM included), north to south
+    for code, region_name in REGION_NAMES.items():
+        json_file = region_output_path(code)
+        if os.path.exists(json_file):
+            merger.merge_region(json_file, region_name)
+        else:
+            print(f"\n⚠️ No {code}/{os.path.basename(json_file)}, skipping {region_name}")
+
     merger.close()
-    print("\n✓ All regions merged into master CSVs!")
+    if store is None:
+        sync_after_merge(DATA_DIR)
+        rollup_after_merge(DATA_DIR)
+    export_after_merge(store if store is not None else DATA_DIR)
+    if store is not None:
+        store.close()
+        print("\n✓ All regions merged into the SQLite DB (run politeia_sqlite.py export for CSVs)")
+    else:
+        print("\n✓ All regions merged into master CSVs!")
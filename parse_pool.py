@@ -0,0 +1,194 @@
+"""
+Parallel Parse Stage
+Phase one of the two-phase consolidators (GhostMouse/consolidate_2021.py,
+GhostMouse/consolidate_senators_2021.py): every source JSON is loaded,
+validated and normalized in a process pool, so phase two, the merger, only
+resolves names to IDs and writes rows, single-threaded and in file order.
+
+Normalizing needs no table state, so it all happens here: numbers
+("12.345" -> 12345, "45,3" -> 45.3), split_name and name_tokens of every
+candidate, and parse_party of every party string. Files come back in input
+order and phase two makes the same inserts in the same order as before, so
+the CSVs are byte-identical for any number of workers (workers=1 parses in
+this process).
+
+A file that fails validation is reported and skipped before any of its rows
+are written, instead of stopping the merge halfway through it.
+
+parse_district normalizes one diputados district the same way for
+GhostMouse/consolidate_diputados_2021.py, which streams districts instead
+of parsing whole files up front.
+"""
+import json
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from party_normalizer import parse_party
+from person_resolver import name_tokens, split_name
+
+STAT_FIELDS = ["valid_votes", "blank_votes", "null_votes", "total_votes", "participation_rate"]
+FILE_NOT_FOUND = "file not found"
+
+Candidate = namedtuple("Candidate", ["name", "tokens", "given", "paternal", "party", "party_info",
+                                     "votes", "percentage", "elected"])
+Record = namedtuple("Record", ["name", "stats", "candidates"])  # stats in STAT_FIELDS order
+District = namedtuple("District", ["number", "communes", "seats", "stats", "candidates"])
+ParsedFile = namedtuple("ParsedFile", ["path", "records", "error"])
+
+class SourceError(ValueError):
+    pass
+
+_PARTIES = {}  # raw party string -> PartyInfo, per process (a few hundred distinct strings)
+
+def party_info(raw):
+    info = _PARTIES.get(raw)
+    if info is None:
+        info = _PARTIES[raw] = parse_party(raw)
+    return info
+
+THOUSANDS = re.compile(r"\d{1,3}(\.\d{3})+")
+
+def number(value, field, integer=False):
+    """Source number -> int/float; numbers already parsed are returned as they are"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        text = value.strip().rstrip("%").strip()
+        if integer and THOUSANDS.fullmatch(text):
+            return int(text.replace(".", ""))
+        try:
+            return int(text) if integer else float(text.replace(",", "."))
+        except ValueError:
+            pass
+    raise SourceError(f"{field}: not a number ({value!r})")
+
+def parse_candidate(cand, where):
+    if not isinstance(cand, dict):
+        raise SourceError(f"{where}: candidate is not an object")
+    name = cand.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise SourceError(f"{where}: candidate without a name")
+    party = cand.get("party")
+    if party is not None and not isinstance(party, str):
+        raise SourceError(f"{where}: party of {name} is not a string")
+    given, paternal = split_name(name)
+    return Candidate(name, name_tokens(name), given, paternal, party, party_info(party),
+                     number(cand.get("votes"), f"{where}: votes of {name}", integer=True),
+                     number(cand.get("percentage"), f"{where}: percentage of {name}"),
+                     1 if cand.get("elected") else 0)
+
+def parse_record(entry, where):
+    """One {"commune", "candidates", "stats"} entry -> Record"""
+    if not isinstance(entry, dict):
+        raise SourceError(f"{where}: not an object")
+    name = entry.get("commune")
+    if not isinstance(name, str) or not name.strip():
+        raise SourceError(f"{where}: no 'commune/region' name found")
+    where = f"{where} ({name})"
+    candidates = entry.get("candidates", [])
+    if not isinstance(candidates, list):
+        raise SourceError(f"{where}: candidates is not a list")
+    stats = entry.get("stats") or {}
+    return Record(name,
+                  tuple(number(stats.get(f, 0), f"{where}: {f}", integer=f != "participation_rate")
+                        for f in STAT_FIELDS),
+                  [parse_candidate(cand, where) for cand in candidates])
+
+# Diputados: "AA. Chile Podemos +" -> "Chile Podemos +"; the "IND." list is candidates outside any pact
+PACT_PREFIX = re.compile(r"^(?P<code>[A-Z]{1,3})\.\s*")
+NO_PACT = "Independiente fuera de pacto"
+DISTRICT_STATS = {"valid_votes": "votos_validos", "blank_votes": "votos_blancos",
+                  "null_votes": "votos_nulos", "total_votes": "total_sufragios"}
+
+def pact_name(raw):
+    match = PACT_PREFIX.match(raw)
+    if match is None:
+        return raw.strip()
+    return NO_PACT if match.group("code") == "IND" else raw[match.end():].strip()
+
+def diputado_party(partido, condicion, pact):
+    """
+    ("UDI", "Independiente", "Chile Podemos +") -> "IND ( UDI ) - Chile Podemos +",
+    the raw form parse_party splits into party, coalition and status
+    """
+    party = " ".join((partido or "IND").split())
+    independent = (condicion or "").strip().lower() == "independiente"
+    if independent and not party.upper().startswith("IND"):
+        party = f"IND ( {party} )"
+    if not pact or party.lower().startswith("independiente en cupo"):
+        return party
+    return f"{party} - {pact}"
+
+def parse_district(entry, where):
+    """
+    One diputados {"distrito_id", "comunas", "pactos", "resumen_votacion"}
+    entry -> District. Without resumen_votacion the valid votes are the sum
+    of the candidates' and the other counts are 0.
+    """
+    if not isinstance(entry, dict):
+        raise SourceError(f"{where}: not an object")
+    number_ = number(entry.get("distrito_id"), f"{where}: distrito_id", integer=True)
+    where = f"{where} (distrito {number_})"
+    pacts = entry.get("pactos", [])
+    if not isinstance(pacts, list):
+        raise SourceError(f"{where}: pactos is not a list")
+    candidates = []
+    for pact in pacts:
+        if not isinstance(pact, dict) or not isinstance(pact.get("candidatos", []), list):
+            raise SourceError(f"{where}: malformed pacto")
+        coalition = pact_name(pact.get("pacto_nombre") or "")
+        for cand in pact.get("candidatos", []):
+            if not isinstance(cand, dict):
+                raise SourceError(f"{where}: candidate is not an object")
+            party = diputado_party(cand.get("partido"), cand.get("condicion"), coalition)
+            candidates.append(parse_candidate({"name": cand.get("nombre"), "party": party,
+                                               "votes": cand.get("votos_totales"),
+                                               "percentage": cand.get("porcentaje_votos"),
+                                               "elected": cand.get("electo")}, where))
+    summary = entry.get("resumen_votacion") or {"votos_validos": sum(c.votes for c in candidates)}
+    stats = [number(summary.get(key, 0), f"{where}: {key}", integer=True) for key in DISTRICT_STATS.values()]
+    stats[3] = stats[3] or sum(stats[:3])
+    return District(number_, list(entry.get("comunas") or []),
+                    number(entry.get("escaños_totales", 0), f"{where}: escaños_totales", integer=True),
+                    tuple(stats) + (0,), candidates)  # no electorate in the source: participation 0
+
+def parse_results_file(path, first_only=False):
+    """
+    ParsedFile for a region JSON (a list of commune entries, or a single
+    entry). first_only keeps just the first entry, as the senator files
+    hold one race each. Problems are returned in `error`, never raised, so
+    one bad file doesn't take the pool down.
+    """
+    if not os.path.exists(path):
+        return ParsedFile(path, None, FILE_NOT_FOUND)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            raise SourceError("expected a list of entries")
+        if first_only:
+            data = data[:1]
+        records = [parse_record(entry, f"entry {i + 1}") for i, entry in enumerate(data)]
+    except ValueError as e:  # bad JSON or SourceError
+        return ParsedFile(path, None, str(e))
+    return ParsedFile(path, records, None)
+
+def parse_senator_file(path):
+    return parse_results_file(path, first_only=True)
+
+def parse_files(parse, paths, workers=None):
+    """
+    [parse(path)] for every path, in input order. `parse` must be a
+    module-level function (it is pickled to the workers); workers=None uses
+    every core, workers=1 runs in this process.
+    """
+    paths = list(paths)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [parse(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse, paths))
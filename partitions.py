@@ -0,0 +1,428 @@
+"""
+Election Partitions
+Keeps the election-scoped tables physically split by (office_id,
+election_date), so removing or replacing one election is a directory delete
+instead of rewriting every table:
+
+    data/partitions/manifest.json
+    data/partitions/3_2021-11-21/wp_politeia_elections.csv
+                                 wp_politeia_election_results.csv
+                                 wp_politeia_candidacies.csv
+                                 wp_politeia_party_memberships.csv
+                                 wp_politeia_office_terms.csv
+    data/partitions/unassigned/...   rows no election accounts for
+
+Results and candidacies follow their election_id. Memberships and terms have
+no election_id: each one is matched to the candidacy it was created for (same
+person, party and election date for a membership; an elected candidacy of the
+same person, office and jurisdiction for a term), in id order.
+
+People, parties and jurisdictions are shared by every election and stay in
+data/ as before.
+
+The combined data/wp_politeia_*.csv files everything else reads are stitched
+from the partitions (a merge by id, so they come out byte-identical). The
+mergers keep appending to them; sync() then routes only the appended rows
+(read from the offset recorded in the manifest) into their partitions.
+Rows a re-merge changes or removes go through update_rows(), which edits the
+combined file and the partitions holding them alike. If a combined file was
+rewritten by something else, the partitions are rebuilt from it.
+
+Usage:
+    python3 partitions.py --split               # partition data/ (once)
+    python3 partitions.py                       # list partitions
+    python3 partitions.py --drop 3 2021-11-21   # remove one election, restitch
+    python3 partitions.py --stitch              # rebuild the combined CSVs
+"""
+import argparse
+import csv
+import heapq
+import io
+import json
+import os
+import shutil
+from collections import defaultdict, deque
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+MANIFEST_NAME = "manifest.json"
+UNASSIGNED = "unassigned"
+
+# Routing order matters: elections first, candidacies before the rows matched to them
+PARTITIONED_TABLES = [
+    "wp_politeia_elections",
+    "wp_politeia_election_results",
+    "wp_politeia_candidacies",
+    "wp_politeia_party_memberships",
+    "wp_politeia_office_terms"
+]
+SHARED_TABLES = ["wp_politeia_jurisdictions", "wp_politeia_political_parties", "wp_politeia_people"]
+
+TAIL_BYTES = 256  # end of a combined file kept in the manifest to notice rewrites
+
+def partition_key(office_id, election_date):
+    return f"{office_id}_{election_date}"
+
+class Router:
+    """Assigns rows of the partitioned tables to partition keys"""
+
+    def __init__(self):
+        self.elections = {}  # election_id -> (key, office_id, jurisdiction_id, election_date)
+        self.memberships = defaultdict(deque)  # (person, party, date) -> keys of unmatched candidacies
+        self.terms = defaultdict(deque)  # (person, office, jurisdiction) -> keys of unmatched elected candidacies
+
+    def route(self, table, row, col):
+        if table == "wp_politeia_elections":
+            key = partition_key(row[col["office_id"]], row[col["election_date"]])
+            self.elections[row[0]] = (key, row[col["office_id"]], row[col["jurisdiction_id"]],
+                                      row[col["election_date"]])
+            return key
+        if table == "wp_politeia_election_results":
+            election = self.elections.get(row[col["election_id"]])
+            return election[0] if election else UNASSIGNED
+        if table == "wp_politeia_candidacies":
+            election = self.elections.get(row[col["election_id"]])
+            if election is None:
+                return UNASSIGNED
+            key, office_id, jurisdiction_id, election_date = election
+            person_id = row[col["person_id"]]
+            self.memberships[(person_id, row[col["party_id"]], election_date)].append(key)
+            if row[col["elected"]] in ("1", "True", "true"):
+                self.terms[(person_id, office_id, jurisdiction_id)].append(key)
+            return key
+        if table == "wp_politeia_party_memberships":
+            queue = self.memberships.get((row[col["person_id"]], row[col["party_id"]], row[col["started_on"]]))
+            return queue.popleft() if queue else UNASSIGNED
+        if table == "wp_politeia_office_terms":
+            queue = self.terms.get((row[col["person_id"]], row[col["office_id"]], row[col["jurisdiction_id"]]))
+            return queue.popleft() if queue else UNASSIGNED
+        raise ValueError(f"{table} is not partitioned")
+
+class PartitionStore:
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.root = os.path.join(data_dir, "partitions")
+        self.manifest_path = os.path.join(self.root, MANIFEST_NAME)
+        self.manifest = self.load()
+
+    @property
+    def partitioned(self):
+        return self.manifest is not None
+
+    def load(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def combined_path(self, table):
+        return os.path.join(self.data_dir, f"{table}.csv")
+
+    def partition_path(self, key, table):
+        return os.path.join(self.root, key, f"{table}.csv")
+
+    def keys(self, election_date=None, office_id=None):
+        """Partition keys, optionally of one election date and/or office"""
+        return [key for key, info in self.manifest["partitions"].items()
+                if (election_date is None or info["election_date"] == election_date)
+                and (office_id is None or str(info["office_id"]) == str(office_id))]
+
+    # --- Building -----------------------------------------------------------
+
+    def split(self):
+        """(Re)builds every partition from the combined CSVs"""
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root)
+        self.manifest = {"version": 1, "partitions": {}, "combined": {}}
+        moved = self.absorb(full=True)
+        self.save()
+        return moved
+
+    def sync(self):
+        """
+        Routes rows appended to the combined CSVs since the last split/sync/
+        stitch into their partitions. Does nothing if data/ isn't partitioned.
+        """
+        if not self.partitioned:
+            return None
+        for table in PARTITIONED_TABLES:
+            if not self.unchanged_prefix(table):
+                print(f"  ⚠️ {table}.csv was rewritten outside the mergers; rebuilding the partitions")
+                return self.split()
+        moved = self.absorb(full=False)
+        self.save()
+        return moved
+
+    def up_to_date(self):
+        """True if the partitions hold every combined row (nothing to sync)"""
+        if not self.partitioned:
+            return False
+        for table in PARTITIONED_TABLES:
+            seen = self.manifest["combined"].get(table)
+            if not self.unchanged_prefix(table):
+                return False
+            if seen is not None and os.path.getsize(self.combined_path(table)) != seen["size"]:
+                return False
+        return True
+
+    def unchanged_prefix(self, table):
+        """True if the combined file still starts with what the manifest saw"""
+        seen = self.manifest["combined"].get(table)
+        path = self.combined_path(table)
+        if seen is None:
+            return not os.path.exists(path)  # a table that appeared since
+        if not os.path.exists(path) or os.path.getsize(path) < seen["size"]:
+            return False
+        with open(path, 'rb') as f:
+            f.seek(max(0, seen["size"] - TAIL_BYTES))
+            return f.read(seen["size"] - f.tell()).hex() == seen["tail"]
+
+    def remember(self, table):
+        """Records the combined file's current size and tail"""
+        path = self.combined_path(table)
+        if not os.path.exists(path):
+            self.manifest["combined"].pop(table, None)
+            return
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            f.seek(max(0, size - TAIL_BYTES))
+            tail = f.read()
+        self.manifest["combined"][table] = {"size": size, "tail": tail.hex(), "header": self.header(table)}
+
+    def header(self, table):
+        with open(self.combined_path(table), 'r', encoding='utf-8', newline='') as f:
+            return next(csv.reader(f), [])
+
+    def new_rows(self, table, full):
+        """(header, rows) of the combined file past the recorded offset"""
+        path = self.combined_path(table)
+        if not os.path.exists(path):
+            return None, []
+        seen = self.manifest["combined"].get(table)
+        offset = 0 if full or seen is None else seen["size"]
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            text = f.read().decode("utf-8")
+        reader = csv.reader(io.StringIO(text, newline=''))
+        header = next(reader, None) if offset == 0 else seen["header"]
+        return header, list(reader)
+
+    def known_elections(self, router):
+        """Feeds the elections already in partitions to `router`"""
+        for key in self.manifest["partitions"]:
+            path = self.partition_path(key, "wp_politeia_elections")
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8', newline='') as f:
+                    reader = csv.reader(f)
+                    header = next(reader)
+                    col = {c: i for i, c in enumerate(header)}
+                    for row in reader:
+                        router.route("wp_politeia_elections", row, col)
+
+    def absorb(self, full):
+        """Appends new combined rows to their partitions; returns {table: rows moved}"""
+        router = Router()
+        if not full:
+            self.known_elections(router)
+        moved = {}
+        for table in PARTITIONED_TABLES:
+            header, rows = self.new_rows(table, full)
+            if header is None:
+                continue
+            col = {c: i for i, c in enumerate(header)}
+            by_key = defaultdict(list)
+            for row in rows:
+                if row:
+                    by_key[router.route(table, row, col)].append(row)
+            for key, key_rows in by_key.items():
+                self.append(key, table, header, key_rows)
+            moved[table] = len(rows)
+            self.remember(table)
+        return moved
+
+    def append(self, key, table, header, rows):
+        info = self.manifest["partitions"].get(key)
+        if info is None:
+            office_id, _, election_date = key.partition("_")
+            info = self.manifest["partitions"][key] = {
+                "office_id": None if key == UNASSIGNED else int(office_id),
+                "election_date": None if key == UNASSIGNED else election_date,
+                "tables": {}
+            }
+        path = self.partition_path(key, table)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        is_new = not os.path.exists(path)
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(header)
+            writer.writerows(rows)
+        stats = info["tables"].setdefault(table, {"rows": 0, "min_id": None, "max_id": None})
+        ids = [int(row[0]) for row in rows]
+        stats["rows"] += len(rows)
+        stats["min_id"] = min(ids + ([stats["min_id"]] if stats["min_id"] is not None else []))
+        stats["max_id"] = max(ids + ([stats["max_id"]] if stats["max_id"] is not None else []))
+
+    # --- Updating rows in place ----------------------------------------------
+
+    def update_rows(self, table, changes, removed=()):
+        """
+        Rewrites a combined CSV with changed ({id: {column: value}}) and
+        removed rows. When the table is partitioned and in step with the
+        manifest, the partition files holding those ids get the same edits
+        and the recorded offset moves with the rewritten prefix, so the next
+        sync() still only routes the rows appended after it.
+        """
+        removed = set(removed)
+        path = self.combined_path(table)
+        seen = self.manifest["combined"].get(table) if self.partitioned else None
+        in_step = seen is not None and table in PARTITIONED_TABLES and self.unchanged_prefix(table)
+        with open(path, 'rb') as f:
+            content = f.read()
+        offset = seen["size"] if in_step else 0
+
+        reader = csv.reader(io.StringIO(content[:offset].decode("utf-8") if offset else content.decode("utf-8"),
+                                        newline=''))
+        header = next(reader)
+        col = {c: i for i, c in enumerate(header)}
+        prefix = edit_rows([header, *reader], col, changes, removed)
+        rest = b""
+        if offset:
+            rest = edit_rows(csv.reader(io.StringIO(content[offset:].decode("utf-8"), newline='')),
+                             col, changes, removed)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(prefix + rest)
+        os.replace(tmp_path, path)
+        if not in_step:
+            return
+
+        ids = set(changes) | removed
+        for key, info in self.manifest["partitions"].items():
+            stats = info["tables"].get(table)
+            if stats is None or not any(stats["min_id"] <= int(i) <= stats["max_id"] for i in ids):
+                continue
+            part_path = self.partition_path(key, table)
+            with open(part_path, 'r', encoding='utf-8', newline='') as f:
+                rows = list(csv.reader(f))
+            kept = edit_rows(rows, {c: i for i, c in enumerate(rows[0])}, changes, removed)
+            with open(part_path + ".tmp", 'wb') as f:
+                f.write(kept)
+            os.replace(part_path + ".tmp", part_path)
+            stats["rows"] -= sum(1 for row in rows[1:] if row and row[0] in removed)
+        self.manifest["combined"][table] = {"size": len(prefix), "tail": prefix[-TAIL_BYTES:].hex(),
+                                            "header": seen["header"]}
+        self.save()
+
+    # --- Removing and stitching ----------------------------------------------
+
+    def drop(self, key):
+        """Removes one partition (directory + manifest entry); returns its row counts"""
+        info = self.manifest["partitions"].pop(key, None)
+        if info is None:
+            return None
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+        self.save()
+        return {table: stats["rows"] for table, stats in info["tables"].items()}
+
+    def stitch(self):
+        """Rewrites the combined CSVs from the partitions (merged by id)"""
+        for table in PARTITIONED_TABLES:
+            header = (self.manifest["combined"].get(table) or {}).get("header")
+            files = [open(self.partition_path(key, table), 'r', encoding='utf-8', newline='')
+                     for key in self.manifest["partitions"]
+                     if os.path.exists(self.partition_path(key, table))]
+            try:
+                readers = []
+                for f in files:
+                    reader = csv.reader(f)
+                    header = next(reader, header)
+                    readers.append(reader)
+                if header is None:
+                    continue
+                path = self.combined_path(table)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8', newline='') as out:
+                    writer = csv.writer(out)
+                    writer.writerow(header)
+                    writer.writerows(heapq.merge(*readers, key=lambda row: int(row[0])))
+                os.replace(tmp_path, path)
+            finally:
+                for f in files:
+                    f.close()
+            self.remember(table)
+        self.save()
+
+    def remove_elections(self, election_date, office_id=None, stitch=True):
+        """
+        Drops every partition of an election date (and office); the combined
+        CSVs are restitched unless stitch=False (e.g. several drops in a row).
+        Returns {table: rows removed}.
+        """
+        removed = defaultdict(int)
+        for key in self.keys(election_date, office_id):
+            for table, rows in self.drop(key).items():
+                removed[table] += rows
+        if removed and stitch:
+            self.stitch()
+        return dict(removed)
+
+    def report(self):
+        for key, info in sorted(self.manifest["partitions"].items()):
+            counts = ", ".join(f"{stats['rows']} {table.replace('wp_politeia_', '')}"
+                               for table, stats in info["tables"].items())
+            print(f"  {key:<16} {counts}")
+
+def edit_rows(rows, col, changes, removed):
+    """CSV bytes of `rows` (the header passes through) with changes applied and removed ids left out"""
+    out = io.StringIO(newline='')
+    writer = csv.writer(out)
+    for row in rows:
+        if not row or row[0] in removed:
+            continue
+        for column, value in changes.get(row[0], {}).items():
+            row[col[column]] = value
+        writer.writerow(row)
+    return out.getvalue().encode("utf-8")
+
+def sync_after_merge(data_dir=DATA_DIR):
+    """Merge/consolidate scripts: route the rows they appended into partitions"""
+    moved = PartitionStore(data_dir).sync()
+    if moved:
+        print(f"  Partitions: routed {sum(moved.values())} new rows")
+    return moved
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partition the election tables by office and date")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the master CSVs")
+    parser.add_argument("--split", action="store_true", help="(Re)build the partitions from the combined CSVs")
+    parser.add_argument("--drop", nargs=2, metavar=("OFFICE_ID", "DATE"), help="Remove one election")
+    parser.add_argument("--stitch", action="store_true", help="Rebuild the combined CSVs from the partitions")
+    args = parser.parse_args()
+
+    store = PartitionStore(args.data_dir)
+    if args.split:
+        moved = store.split()
+        print(f"✓ Split {sum(moved.values())} rows into {len(store.manifest['partitions'])} partitions")
+    elif not store.partitioned:
+        raise SystemExit(f"❌ {args.data_dir} is not partitioned yet (run with --split)")
+    elif args.drop:
+        removed = store.remove_elections(args.drop[1], args.drop[0])
+        if not removed:
+            print(f"⚠️ No partition for office {args.drop[0]} on {args.drop[1]}")
+        else:
+            print(f"✓ Removed {', '.join(f'{n} rows from {t}' for t, n in removed.items())}")
+    elif args.stitch:
+        store.stitch()
+        print("✓ Combined CSVs rebuilt")
+    else:
+        store.sync()
+    if store.partitioned:
+        store.report()
@@ -0,0 +1,280 @@
+"""
+Party / Coalition Normalization
+Splits the raw party strings the sources give us into
+(party, short_name, coalition, status), as described in
+data/Political Party Cleaning.md:
+
+    "IND (  RN ) - Chile Vamos"                   -> Renovación Nacional, RN, Chile Vamos, IND
+    "RN - Chile Vamos"                            -> Renovación Nacional, RN, Chile Vamos, MILITANTE
+    "Independiente en cupo Renovación Nacional"   -> Renovación Nacional, RN, None, IND
+    "Convergencia Social - Apruebo Dignidad"      -> Convergencia Social, CS, Apruebo Dignidad, MILITANTE
+    "IND - Independiente fuera de pacto"          -> Independiente, IND, None, IND
+
+so one party gets one wp_politeia_political_parties row. PartyRegistry is
+what the mergers use: a raw string costs one dict hit once it has been seen
+(parses are memoized in data/.party_aliases.json across runs), and the
+patterns below only run for strings never seen before.
+
+The candidacy-level status/coalition columns proposed in the cleaning notes
+are not part of the WordPress schema yet; parse_party() exposes them for
+analysis and the alias file keeps them per raw string.
+
+Usage:
+    python3 party_normalizer.py            # report how the parties table collapses
+    python3 party_normalizer.py --apply    # merge duplicate parties in data/*.csv
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+
+from person_resolver import name_tokens
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+ALIAS_CACHE_NAME = ".party_aliases.json"
+
+PartyInfo = namedtuple("PartyInfo", ["party", "short_name", "coalition", "status"])
+
+STATUS_MEMBER = "MILITANTE"
+STATUS_INDEPENDENT = "IND"
+INDEPENDENT = "Independiente"
+
+# Acronym -> official name
+PARTIES = {
+    "AH": "Acción Humanista",
+    "AMA": "Amarillos por Chile",
+    "AVP": "Alianza Verde Popular",
+    "CIU": "Ciudadanos",
+    "COM": "Comunes",
+    "CS": "Convergencia Social",
+    "CU": "Centro Unido",
+    "DC": "Democracia Cristiana",
+    "DEM": "Demócratas",
+    "EVO": "Evópoli",
+    "FA": "Frente Amplio",
+    "FRVS": "Federación Regionalista Verde Social",
+    "IND": INDEPENDENT,
+    "NT": "Nuevo Tiempo",
+    "PC": "Partido Comunista",
+    "PCC": "Partido Conservador Cristiano",
+    "PDG": "Partido de la Gente",
+    "PEV": "Partido Ecologista Verde",
+    "PH": "Partido Humanista",
+    "PI": "Partido Igualdad",
+    "PL": "Partido Liberal",
+    "PNC": "Partido Nacional Ciudadano",
+    "PP": "Partido Popular",
+    "PPD": "Partido por la Democracia",
+    "PR": "Partido Radical",
+    "PRI": "Partido Regionalista Independiente Demócrata",
+    "PRO": "Partido Progresista",
+    "PS": "Partido Socialista",
+    "PSC": "Partido Social Cristiano",
+    "PTR": "Partido de Trabajadores Revolucionarios",
+    "RD": "Revolución Democrática",
+    "REP": "Partido Republicano",
+    "RN": "Renovación Nacional",
+    "UDI": "Unión Demócrata Independiente",
+    "UPA": "Unión Patriótica"
+}
+
+# Other spellings of a party (matched accent/case-insensitively)
+ALIASES = {
+    "Independent": INDEPENDENT,  # scrape_to_csv default for an empty party
+    "Republicanos": "Partido Republicano",
+    "Demócrata Cristiano": "Democracia Cristiana",
+    "Partido Demócrata Cristiano": "Democracia Cristiana",
+    "Evolución Política": "Evópoli"
+}
+
+# Coalition strings that mean "no pact"
+NO_COALITION = {"independiente fuera de pacto", "fuera de pacto"}
+
+def fold(text):
+    """Accent/case/spacing-insensitive lookup key"""
+    return " ".join(name_tokens(text))
+
+# Precompiled once; tried in order
+PATTERNS = [
+    # IND ( RN ) - Chile Vamos
+    (re.compile(r"^IND\s*\(\s*(?P<party>[^)]+?)\s*\)\s*(?:-\s*(?P<coalition>.+))?$"), STATUS_INDEPENDENT),
+    # Independiente en cupo Renovación Nacional
+    (re.compile(r"^Independiente\s+en\s+cupo\s+(?P<party>.+)$", re.IGNORECASE), STATUS_INDEPENDENT),
+    # RN - Chile Vamos / Convergencia Social - Apruebo Dignidad / IND - Independiente fuera de pacto
+    (re.compile(r"^(?P<party>.+?)\s+-\s+(?P<coalition>.+)$"), None),
+    # Renovación Nacional / RN
+    (re.compile(r"^(?P<party>.+)$"), None)
+]
+
+_LOOKUP = {}
+for _short, _name in PARTIES.items():
+    _LOOKUP[fold(_short)] = _name
+    _LOOKUP[fold(_name)] = _name
+for _alias, _name in ALIASES.items():
+    _LOOKUP[fold(_alias)] = _name
+_SHORT_NAMES = {name: short for short, name in PARTIES.items()}
+# Saved parses are only reused while the tables above are unchanged
+ALIAS_VERSION = hashlib.sha256(json.dumps([PARTIES, ALIASES, sorted(NO_COALITION)]).encode("utf-8")).hexdigest()[:12]
+
+def canonical_party(text):
+    """'rn' / 'Renovacion Nacional' -> 'Renovación Nacional' (unknown names kept as given)"""
+    text = " ".join(text.split())
+    return _LOOKUP.get(fold(text), text)
+
+def parse_party(raw):
+    """Raw source string -> PartyInfo (no caching; see PartyRegistry)"""
+    raw = " ".join((raw or "").split()) or INDEPENDENT
+    for pattern, status in PATTERNS:
+        match = pattern.match(raw)
+        if not match:
+            continue
+        party = canonical_party(match.group("party"))
+        coalition = match.groupdict().get("coalition")
+        if coalition and fold(coalition) in NO_COALITION:
+            coalition = None
+        if status is None:
+            status = STATUS_INDEPENDENT if party == INDEPENDENT else STATUS_MEMBER
+        return PartyInfo(party, _SHORT_NAMES.get(party, ""), coalition, status)
+
+class PartyRegistry:
+    """
+    Raw party string -> party id for one set of tables. Existing rows are
+    registered with add(); when several rows normalize to the same party,
+    the row already named exactly like the party wins, else the lowest id.
+    """
+
+    def __init__(self, alias_path=None):
+        self.alias_path = alias_path
+        self.names = {}    # official_name as stored -> id (the old cache_parties)
+        self.parties = {}  # canonical party -> id
+        self.raw = {}      # raw string -> id (hot-loop lookups)
+        self.parsed = {}   # raw string -> PartyInfo (persisted)
+        self._exact = set()  # parties whose id comes from a row named exactly like them
+        self.load_aliases()
+
+    def parse(self, raw, info=None):
+        """Cached parse_party(raw); `info` is that parse when the caller already has it"""
+        cached = self.parsed.get(raw)
+        if cached is None:
+            cached = info or parse_party(raw)
+            self.parsed[raw] = cached
+        return cached
+
+    def add(self, party_id, official_name):
+        party_id = int(party_id)
+        self.names[official_name] = party_id
+        party = self.parse(official_name).party
+        if party not in self.parties or (official_name == party and party not in self._exact):
+            self.parties[party] = party_id
+        if official_name == party:
+            self._exact.add(party)
+
+    def resolve(self, raw, info=None):
+        """Party id for a raw string, or None if the party has no row yet"""
+        party_id = self.raw.get(raw)
+        if party_id is None:
+            party_id = self.parties.get(self.parse(raw, info).party)
+            if party_id is not None:
+                self.raw[raw] = party_id
+        return party_id
+
+    def created(self, party_id, raw):
+        """Records the row the caller just inserted for parse(raw)"""
+        self.add(party_id, self.parse(raw).party)
+        self.raw[raw] = int(party_id)
+
+    def load_aliases(self):
+        if not self.alias_path or not os.path.exists(self.alias_path):
+            return
+        try:
+            with open(self.alias_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except ValueError:
+            return
+        if saved.get("version") != ALIAS_VERSION:
+            return  # PARTIES/ALIASES changed since: reparse everything
+        self.parsed = {raw: PartyInfo(*info) for raw, info in saved["parsed"].items()}
+
+    def save_aliases(self):
+        if not self.alias_path:
+            return
+        tmp_path = self.alias_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": ALIAS_VERSION,
+                       "parsed": {raw: list(info) for raw, info in sorted(self.parsed.items())}},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.alias_path)
+
+def alias_cache_path(data_dir):
+    return os.path.join(data_dir, ALIAS_CACHE_NAME)
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+def write_csv(path, fieldnames, rows):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+def normalize_tables(data_dir=DATA_DIR, apply=False):
+    """
+    Bulk pass over the parties table: prints which rows collapse into which
+    party and, with apply=True, repoints candidacies/memberships to the
+    surviving id, drops the duplicate party rows and writes canonical names.
+    Returns {old_id: new_id} for the rows that move.
+    """
+    parties_path = os.path.join(data_dir, "wp_politeia_political_parties.csv")
+    fieldnames, rows = read_csv(parties_path)
+    registry = PartyRegistry(alias_cache_path(data_dir))
+    for row in rows:
+        registry.add(row["id"], row["official_name"])
+
+    remap = {}
+    for row in rows:
+        info = registry.parse(row["official_name"])
+        target = registry.parties[info.party]
+        if target != int(row["id"]):
+            remap[int(row["id"])] = target
+        coalition = f" [{info.coalition}]" if info.coalition else ""
+        print(f"  {row['id']:>3} {row['official_name']:<65} -> {target:>3} {info.party} ({info.status}){coalition}")
+    print(f"\n{len(rows)} party rows -> {len(registry.parties)} parties ({len(remap)} duplicate rows)")
+    registry.save_aliases()
+
+    if not apply:
+        return remap
+
+    kept = []
+    for row in rows:
+        if int(row["id"]) in remap:
+            continue
+        info = registry.parse(row["official_name"])
+        row["official_name"], row["short_name"] = info.party, info.short_name
+        kept.append(row)
+    write_csv(parties_path, fieldnames, kept)
+
+    # Every row is kept; only party_id moves to the surviving party
+    for table in ("wp_politeia_candidacies", "wp_politeia_party_memberships"):
+        path = os.path.join(data_dir, f"{table}.csv")
+        fieldnames, table_rows = read_csv(path)
+        moved = 0
+        for row in table_rows:
+            new_id = remap.get(int(row["party_id"])) if row["party_id"] else None
+            if new_id is not None:
+                row["party_id"] = str(new_id)
+                moved += 1
+        write_csv(path, fieldnames, table_rows)
+        print(f"  {table}: {moved} rows repointed")
+    print("✓ Parties normalized")
+    return remap
+
+if __name__ == "__main__":
+    normalize_tables(DATA_DIR, apply="--apply" in sys.argv)
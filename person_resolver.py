@@ -0,0 +1,202 @@
+"""
+Person Entity Resolution
+Decides whether a scraped candidate name is a person already in
+wp_politeia_people instead of keying on the exact raw string, so
+"Joaquín Lavín" / "JOAQUIN LAVIN" / "Joaquín Lavín Infante" end up as one row.
+
+1. Exact: the raw name was seen before (persisted match cache) or its
+   normalized key (accents/case folded, tokens sorted) is already known.
+2. Blocking: otherwise only people sharing a surname token with the name
+   are scored, instead of every person in the table. The surnames are the
+   last two tokens past the first given name, particles aside, so a second
+   given name ("Juan Pablo Pérez González") is not a block.
+3. Scoring: a name that is another one minus its trailing tokens (no
+   maternal surname) scores SUBSET_SCORE; names with the same number of
+   tokens score the lowest difflib ratio of their token pairs (typos).
+   The best candidate wins if it reaches MATCH_THRESHOLD and no other
+   person scores within AMBIGUITY_MARGIN of it.
+4. Evidence: a typo-only match needs TYPO_MIN_TOKENS tokens (a maternal
+   surname) on both sides. "Cristián Contreras" and "Christian Contreras"
+   share one common surname and may well be two people, so such a pair is
+   not merged: the name gets its own row and the pair goes to the review
+   list for a human to confirm.
+
+The match cache (raw name -> person id) is saved to data/.person_matches.json
+so repeated merges only score names they have never seen; the review list
+sits next to it, named after it (data/.person_review.json).
+"""
+import json
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+MATCH_THRESHOLD = 0.94
+SUBSET_SCORE = 0.95
+AMBIGUITY_MARGIN = 0.02
+TYPO_MIN_TOKENS = 3  # given name + both surnames before a typo alone merges two names
+MATCH_CACHE_NAME = ".person_matches.json"
+REVIEW_NAME = ".person_review.json"
+
+# Surname particles: kept in the name, never used as a block
+PARTICLES = {"de", "del", "la", "las", "los", "y", "da", "dos", "van", "von", "mc"}
+
+def name_tokens(name):
+    """'Joaquín  LAVÍN-Infante' -> ('joaquin', 'lavin', 'infante')"""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return tuple(re.findall(r"[a-z0-9]+", text.replace("'", "")))
+
+def name_key(tokens):
+    """Order-insensitive exact key"""
+    return " ".join(sorted(tokens))
+
+def similarity(a, b):
+    """Score between two token tuples (1.0 = same normalized name)"""
+    if name_key(a) == name_key(b):
+        return 1.0
+    short, long = sorted((a, b), key=len)
+    if len(short) >= 2 and long[:len(short)] == short:
+        return SUBSET_SCORE
+    if len(a) != len(b):
+        return 0.0
+    # Typos: every token pair must be close (the weakest pair decides, so
+    # "Alejandra"/"Alejandro" or "José"/"Josué" stay apart)
+    return min(SequenceMatcher(None, x, y).ratio() for x, y in zip(a, b))
+
+def surname_tokens(tokens):
+    """Block tokens: the last two after the first given name, particles and initials aside"""
+    return [t for t in tokens[1:] if t not in PARTICLES and len(t) > 1][-2:]
+
+def split_name(name):
+    """'Given Names Surname' -> (given_names, paternal_surname), as the mergers store people"""
+    parts = name.strip().split()
+    if len(parts) >= 2:
+        return " ".join(parts[:-1]), parts[-1]
+    return (parts[0] if parts else "Unknown"), ""
+
+class PersonResolver:
+    def __init__(self, match_path=None, threshold=MATCH_THRESHOLD):
+        self.match_path = match_path
+        self.threshold = threshold
+        self.names = {}                 # full name as stored -> id (the old cache_people)
+        self.keys = {}                  # name_key -> id
+        self.tokens = {}                # id -> tokens of the stored name
+        self.blocks = defaultdict(set)  # surname token -> {id}
+        self.matches = {}               # raw scraped name -> id (persisted)
+        self.review = {}                # raw name -> {"person_id", "name", "score"} not merged (persisted)
+        self.stats = {"exact": 0, "matched": 0, "new": 0, "review": 0}
+
+    def add(self, person_id, name):
+        """Registers a person row (from a table scan or just inserted)"""
+        person_id = int(person_id)
+        tokens = name_tokens(name)
+        self.names[name] = person_id
+        self.keys.setdefault(name_key(tokens), person_id)
+        self.tokens[person_id] = tokens
+        for token in surname_tokens(tokens):
+            self.blocks[token].add(person_id)
+
+    def candidates(self, tokens):
+        found = set()
+        for token in surname_tokens(tokens):
+            found |= self.blocks.get(token, set())
+        return found
+
+    def resolve(self, name, tokens=None):
+        """
+        Person id for a scraped name, or None if it is a new person.
+        `tokens` is name_tokens(name) when the caller already has it.
+        """
+        if name in self.matches:
+            self.stats["exact"] += 1
+            return self.matches[name]
+        if name in self.names:
+            self.stats["exact"] += 1
+            return self.names[name]
+
+        tokens = tokens if tokens is not None else name_tokens(name)
+        person_id = self.keys.get(name_key(tokens))
+        if person_id is not None:
+            self.stats["matched"] += 1
+            self.matches[name] = person_id
+            return person_id
+
+        scored = sorted(((similarity(tokens, self.tokens[pid]), pid) for pid in self.candidates(tokens)),
+                        reverse=True)
+        if not scored or scored[0][0] < self.threshold:
+            return None
+        if len(scored) > 1 and scored[0][0] - scored[1][0] < AMBIGUITY_MARGIN:
+            # Two people fit equally well ("Juan Pérez" vs Pérez Soto / Pérez Rojas)
+            return None
+
+        score, person_id = scored[0]
+        if score < SUBSET_SCORE and min(len(tokens), len(self.tokens[person_id])) < TYPO_MIN_TOKENS:
+            # Only a spelling difference on a short name: not enough to merge
+            self.stats["review"] += 1
+            self.review[name] = {"person_id": person_id, "name": " ".join(self.tokens[person_id]),
+                                 "score": round(score, 3)}
+            return None
+
+        self.stats["matched"] += 1
+        self.matches[name] = person_id
+        return person_id
+
+    def created(self, person_id, name):
+        """Records a person the caller just inserted for `name`"""
+        self.stats["new"] += 1
+        self.add(person_id, name)
+
+    def load_matches(self):
+        """Reads the match cache, dropping ids that no longer exist"""
+        if not self.match_path or not os.path.exists(self.match_path):
+            return
+        try:
+            with open(self.match_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except ValueError:
+            return
+        self.matches = {name: pid for name, pid in saved.items() if pid in self.tokens}
+        review_path = self.review_path()
+        if os.path.exists(review_path):
+            try:
+                with open(review_path, 'r', encoding='utf-8') as f:
+                    self.review = {name: entry for name, entry in json.load(f).items()
+                                   if entry["person_id"] in self.tokens}
+            except ValueError:
+                pass
+
+    def review_path(self):
+        return review_cache_path(self.match_path)
+
+    def save_matches(self):
+        if not self.match_path:
+            return
+        write_json(self.match_path, self.matches)
+        if self.review:
+            write_json(self.review_path(), self.review, indent=1)
+
+    def report(self):
+        if self.stats["matched"]:
+            print(f"  People: {self.stats['matched']} name variant(s) resolved to existing people, "
+                  f"{self.stats['new']} new")
+        if self.stats["review"]:
+            print(f"  ⚠️ People: {self.stats['review']} spelling-only match(es) kept apart; "
+                  f"see {os.path.basename(self.review_path())}")
+
+def write_json(path, data, indent=None):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+def match_cache_path(data_dir):
+    return os.path.join(data_dir, MATCH_CACHE_NAME)
+
+def review_cache_path(match_path):
+    """Review list of a match cache: .person_matches.json -> .person_review.json, same prefix"""
+    if match_path.endswith(MATCH_CACHE_NAME):
+        return match_path[:-len(MATCH_CACHE_NAME)] + REVIEW_NAME
+    root, ext = os.path.splitext(match_path)
+    return f"{root}.review{ext}"
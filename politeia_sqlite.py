@@ -0,0 +1,364 @@
+"""
+SQLite Storage for the wp_politeia_* Master Tables
+Optional alternative to treating data/*.csv as the database: same eight
+tables and columns, with real primary keys, foreign keys + indexes and
+transactional batch writes. export_csvs() produces the CSVs the WordPress
+import still expects.
+
+Usage:
+    python3 politeia_sqlite.py import [data_dir]      # CSVs -> data/politeia.db
+    python3 politeia_sqlite.py export [data_dir]      # data/politeia.db -> CSVs
+    python3 politeia_sqlite.py clean-date 2021-11-21  # indexed version of clean_2021.py
+"""
+import csv
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+DEFAULT_DB = os.path.join(DATA_DIR, "politeia.db")
+
+# Column order matches the master CSVs (in FK order: parents first)
+SCHEMA = {
+    "wp_politeia_jurisdictions": """
+        id INTEGER PRIMARY KEY,
+        official_name TEXT NOT NULL,
+        common_name TEXT,
+        type TEXT,
+        parent_id INTEGER REFERENCES wp_politeia_jurisdictions(id),
+        external_code TEXT,
+        created_at TEXT,
+        updated_at TEXT""",
+    "wp_politeia_political_parties": """
+        id INTEGER PRIMARY KEY,
+        official_name TEXT NOT NULL,
+        short_name TEXT,
+        created_at TEXT,
+        updated_at TEXT""",
+    "wp_politeia_people": """
+        id INTEGER PRIMARY KEY,
+        given_names TEXT,
+        paternal_surname TEXT,
+        created_at TEXT,
+        updated_at TEXT""",
+    "wp_politeia_elections": """
+        id INTEGER PRIMARY KEY,
+        office_id INTEGER NOT NULL,
+        jurisdiction_id INTEGER NOT NULL REFERENCES wp_politeia_jurisdictions(id),
+        election_date TEXT NOT NULL,
+        title TEXT,
+        rounds INTEGER,
+        created_at TEXT,
+        updated_at TEXT""",
+    "wp_politeia_election_results": """
+        id INTEGER PRIMARY KEY,
+        election_id INTEGER NOT NULL REFERENCES wp_politeia_elections(id),
+        jurisdiction_id INTEGER REFERENCES wp_politeia_jurisdictions(id),
+        valid_votes INTEGER,
+        blank_votes INTEGER,
+        null_votes INTEGER,
+        total_votes INTEGER,
+        participation_rate REAL,
+        created_at TEXT,
+        updated_at TEXT""",
+    "wp_politeia_candidacies": """
+        id INTEGER PRIMARY KEY,
+        election_id INTEGER NOT NULL REFERENCES wp_politeia_elections(id),
+        person_id INTEGER NOT NULL REFERENCES wp_politeia_people(id),
+        party_id INTEGER REFERENCES wp_politeia_political_parties(id),
+        votes INTEGER,
+        vote_share REAL,
+        elected INTEGER,
+        created_at TEXT,
+        updated_at TEXT""",
+    "wp_politeia_party_memberships": """
+        id INTEGER PRIMARY KEY,
+        person_id INTEGER NOT NULL REFERENCES wp_politeia_people(id),
+        party_id INTEGER NOT NULL REFERENCES wp_politeia_political_parties(id),
+        started_on TEXT,
+        created_at TEXT,
+        updated_at TEXT""",
+    "wp_politeia_office_terms": """
+        id INTEGER PRIMARY KEY,
+        person_id INTEGER NOT NULL REFERENCES wp_politeia_people(id),
+        office_id INTEGER NOT NULL,
+        jurisdiction_id INTEGER REFERENCES wp_politeia_jurisdictions(id),
+        started_on TEXT,
+        status TEXT,
+        created_at TEXT,
+        updated_at TEXT"""
+}
+
+INDEXES = [
+    ("wp_politeia_jurisdictions", "official_name"),
+    ("wp_politeia_jurisdictions", "parent_id"),
+    ("wp_politeia_political_parties", "official_name"),
+    ("wp_politeia_elections", "jurisdiction_id"),
+    ("wp_politeia_elections", "election_date"),
+    ("wp_politeia_election_results", "election_id"),
+    ("wp_politeia_election_results", "jurisdiction_id"),
+    ("wp_politeia_candidacies", "election_id"),
+    ("wp_politeia_candidacies", "person_id"),
+    ("wp_politeia_candidacies", "party_id"),
+    ("wp_politeia_party_memberships", "person_id"),
+    ("wp_politeia_party_memberships", "party_id"),
+    ("wp_politeia_party_memberships", "started_on"),
+    ("wp_politeia_office_terms", "person_id"),
+    ("wp_politeia_office_terms", "jurisdiction_id"),
+    ("wp_politeia_office_terms", "started_on")
+]
+
+# Rows appended by the mergers' shorter column lists (their TABLES dict has no
+# elections.title/rounds), found in files whose header has the full set
+LEGACY_COLUMNS = {
+    "wp_politeia_elections": ["id", "office_id", "jurisdiction_id", "election_date", "created_at", "updated_at"]
+}
+
+def table_columns(table):
+    """Column names of a table, in CSV order"""
+    return [line.split()[0] for line in SCHEMA[table].strip().split(",\n")]
+
+def column_types(table):
+    """{column: 'INTEGER' | 'REAL' | 'TEXT'}"""
+    return {line.split()[0]: line.split()[1] for line in SCHEMA[table].strip().split(",\n")}
+
+FK_PATTERN = re.compile(r"REFERENCES (\w+)\(id\)")
+
+def foreign_keys():
+    """[(table, column, parent_table, not_null)] from the SCHEMA definitions"""
+    keys = []
+    for table, definition in SCHEMA.items():
+        for line in definition.strip().split(",\n"):
+            match = FK_PATTERN.search(line)
+            if match:
+                keys.append((table, line.split()[0], match.group(1), "NOT NULL" in line))
+    return keys
+
+def read_csv_rows(table, data_dir=DATA_DIR):
+    """
+    Yields the rows of <data_dir>/<table>.csv as lists in table_columns()
+    order ("" for missing values), repairing LEGACY_COLUMNS rows.
+    """
+    file_path = os.path.join(data_dir, f"{table}.csv")
+    if not os.path.exists(file_path):
+        return
+    columns = table_columns(table)
+    legacy = LEGACY_COLUMNS.get(table)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        for values in reader:
+            if legacy and len(legacy) < len(header) and not any(values[len(legacy):]):
+                # 6 values, either bare or padded out with empty fields
+                row = dict(zip(legacy, values))
+            else:
+                row = dict(zip(header, values))
+            yield [row.get(c, "") for c in columns]
+
+def table_rows(table, source):
+    """Rows (lists in table_columns order) from a data dir or a SqliteStore"""
+    if isinstance(source, SqliteStore):
+        for row in source.iter_rows(table):
+            yield list(row.values())
+    else:
+        yield from read_csv_rows(table, source)
+
+class SqliteTableWriter:
+    """
+    Same interface as table_writer.TableWriter: tuple rows in `columns`
+    order, buffered and inserted in batches
+    """
+
+    def __init__(self, store, table, columns=None, batch_size=1000):
+        self.store = store
+        self.table = table
+        self.columns = list(columns or table_columns(table))
+        self.batch_size = batch_size
+        self.pending = []
+        self.rows = 0
+        self.started = None
+        self.finished = None
+
+    def write(self, row):
+        if self.started is None:
+            self.started = time.perf_counter()
+        self.pending.append(tuple(row))
+        self.rows += 1
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def writerow(self, row):
+        self.write(row.get(c) for c in self.columns)
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        if self.pending:
+            self.store.insert_many(self.table, self.columns, self.pending)
+            self.pending = []
+
+    def close(self):
+        """Flushes; the rows are committed by the store, not here"""
+        self.flush()
+        self.finished = time.perf_counter()
+
+class SqliteStore:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Transactions are managed explicitly (begin/commit/rollback)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.writers = {}
+        self.create_schema()
+
+    def create_schema(self):
+        for table, columns in SCHEMA.items():
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+        for table, column in INDEXES:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+    def close(self):
+        self.conn.close()
+
+    # --- Transactions ---
+
+    def begin(self):
+        self.conn.execute("BEGIN")
+        # Writers flush per table, so child rows can land before their parent;
+        # check foreign keys at COMMIT instead of per statement
+        self.conn.execute("PRAGMA defer_foreign_keys = ON")
+
+    def commit(self):
+        """Flushes buffered writer rows and commits everything at once"""
+        for writer in self.writers.values():
+            writer.flush()
+        self.conn.execute("COMMIT")
+
+    def rollback(self):
+        for writer in self.writers.values():
+            writer.pending = []
+        self.conn.execute("ROLLBACK")
+
+    @contextmanager
+    def transaction(self):
+        """All-or-nothing block: commits on success, rolls back on error"""
+        self.begin()
+        try:
+            yield self
+        except Exception:
+            self.rollback()
+            raise
+        self.commit()
+
+    # --- Reads / writes ---
+
+    def open_writers(self, tables=None):
+        """
+        {table: SqliteTableWriter}; pass the caller's TABLES dict to give rows
+        in its column order (wrap in table_writer.TableSet like the CSVs)
+        """
+        tables = tables or {table: table_columns(table) for table in SCHEMA}
+        self.writers = {table: SqliteTableWriter(self, table, columns) for table, columns in tables.items()}
+        return self.writers
+
+    def insert_many(self, table, columns, rows):
+        placeholders = ", ".join("?" for _ in columns)
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            [tuple(None if v == "" else v for v in row) for row in rows]
+        )
+
+    def update_row(self, table, row_id, values):
+        assignments = ", ".join(f"{col} = ?" for col in values)
+        self.conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?", (*values.values(), row_id))
+
+    def delete_row(self, table, row_id):
+        self.conn.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+
+    def iter_rows(self, table):
+        """Rows as dicts of strings, exactly as csv.DictReader would yield them"""
+        columns = table_columns(table)
+        cursor = self.conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+        for values in cursor:
+            yield {c: "" if v is None else str(v) for c, v in zip(columns, values)}
+
+    def count(self, table):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    # --- Cleanup (indexed replacements for clean_2021.py) ---
+
+    def delete_elections(self, election_ids):
+        """Deletes elections plus their results and candidacies (children first)"""
+        ids = [(int(i),) for i in election_ids]
+        for table in ("wp_politeia_election_results", "wp_politeia_candidacies"):
+            self.conn.executemany(f"DELETE FROM {table} WHERE election_id = ?", ids)
+        self.conn.executemany("DELETE FROM wp_politeia_elections WHERE id = ?", ids)
+
+    def delete_by_date(self, table, date_col, target_date):
+        cursor = self.conn.execute(f"DELETE FROM {table} WHERE {date_col} = ?", (target_date,))
+        return cursor.rowcount
+
+    def clean_election_date(self, election_date, term_start_date=None):
+        """Same rules as clean_2021.clean_csvs(), as indexed DELETEs in one transaction"""
+        with self.transaction():
+            election_ids = [row[0] for row in self.conn.execute(
+                "SELECT id FROM wp_politeia_elections WHERE election_date = ?", (election_date,))]
+            self.delete_elections(election_ids)
+            print(f"  - Removed {len(election_ids)} elections (and their results/candidacies)")
+
+            removed = self.delete_by_date("wp_politeia_party_memberships", "started_on", election_date)
+            print(f"  - Removed {removed} rows from wp_politeia_party_memberships")
+            if term_start_date:
+                removed = self.delete_by_date("wp_politeia_office_terms", "started_on", term_start_date)
+                print(f"  - Removed {removed} rows from wp_politeia_office_terms")
+
+    # --- CSV import / export ---
+
+    def import_csvs(self, data_dir=DATA_DIR):
+        """Replaces the DB contents with the master CSVs (one transaction)"""
+        with self.transaction():
+            for table in reversed(list(SCHEMA)):
+                self.conn.execute(f"DELETE FROM {table}")
+            for table in SCHEMA:
+                if not os.path.exists(os.path.join(data_dir, f"{table}.csv")):
+                    continue
+                self.insert_many(table, table_columns(table), read_csv_rows(table, data_dir))
+                print(f"  {table}: {self.count(table)} rows imported")
+
+    def export_csvs(self, data_dir=DATA_DIR):
+        """Writes every table back to <data_dir>/<table>.csv (atomic per file)"""
+        os.makedirs(data_dir, exist_ok=True)
+        for table in SCHEMA:
+            file_path = os.path.join(data_dir, f"{table}.csv")
+            tmp_path = file_path + ".tmp"
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=table_columns(table))
+                writer.writeheader()
+                writer.writerows(self.iter_rows(table))
+            os.replace(tmp_path, file_path)
+            print(f"  {table}: {self.count(table)} rows exported")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export", "clean-date"):
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    store = SqliteStore()
+    try:
+        if command == "import":
+            store.import_csvs(sys.argv[2] if len(sys.argv) > 2 else DATA_DIR)
+        elif command == "export":
+            store.export_csvs(sys.argv[2] if len(sys.argv) > 2 else DATA_DIR)
+        elif command == "clean-date":
+            store.clean_election_date(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    finally:
+        store.close()
@@ -0,0 +1,297 @@
+"""
+Election Rollups
+Materialized vote and seat totals per party at three levels, per election
+(office_id, election_date, i.e. one partition of partitions.py), so
+"votes per party per region" is a file read instead of a candidacies ->
+elections -> jurisdictions join with a parent_id walk:
+
+    data/rollups/rollup_commune.csv    races held per commune (alcaldes, presidential)
+    data/rollups/rollup_region.csv     every race, summed up to its region
+    data/rollups/rollup_national.csv   every race, summed for the country
+    data/rollups/manifest.json         fingerprints of what each rollup was built from
+
+Columns: office_id, election_date, jurisdiction_id, jurisdiction, party_id,
+party, short_name, candidates, votes, vote_share (% of the level's candidate
+votes) and seats (elected candidacies). Coalitions aren't stored per
+candidacy yet (see party_normalizer.py), so the rollups stop at parties.
+
+The group-bys are numpy only: communes and regions come from an id-indexed
+parent array walked a few times for every jurisdiction at once, and each
+(jurisdiction, party) pair is one np.unique + np.bincount.
+
+Only elections whose partition files changed since the last build are read
+and recomputed (a sha1 of their elections and candidacies CSVs); the
+jurisdictions and parties files only force a full rebuild when they were
+rewritten rather than appended to. The mergers call rollup_after_merge once
+the rollups exist.
+
+REQUIRES:
+pip install numpy
+
+Usage:
+    python3 rollups.py            # build / refresh (partitions data/ first if needed)
+    python3 rollups.py --full     # recompute every election
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+
+try:
+    import numpy as np
+    from validate_tables import to_numbers
+except ImportError:
+    np = to_numbers = None
+
+from partitions import DATA_DIR, UNASSIGNED, PartitionStore
+
+LEVELS = ["commune", "region", "national"]
+ROLLUP_COLUMNS = ["office_id", "election_date", "jurisdiction_id", "jurisdiction", "party_id", "party",
+                  "short_name", "candidates", "votes", "vote_share", "seats"]
+NATIONAL_NAME = "Chile"
+SHARED = ["wp_politeia_jurisdictions", "wp_politeia_political_parties"]
+FINGERPRINT_TABLES = ["wp_politeia_elections", "wp_politeia_candidacies"]
+MAX_DEPTH = 6  # commune -> province -> region (districts sit right under their region)
+
+def read_columns(path, columns):
+    """{column: list of strings} of a CSV (empty lists if it doesn't exist)"""
+    values = {c: [] for c in columns}
+    if not os.path.exists(path):
+        return values
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        col = {c: i for i, c in enumerate(next(reader, []))}
+        positions = [(values[c], col[c]) for c in columns]
+        for row in reader:
+            if row:
+                for target, i in positions:
+                    target.append(row[i])
+    return values
+
+def sha1_file(paths, limit=None):
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read() if limit is None else f.read(limit))
+    return digest.hexdigest()
+
+class Jurisdictions:
+    """Id-indexed arrays of the jurisdictions table (index `none`: no such place)"""
+
+    def __init__(self, path):
+        data = read_columns(path, ["id", "official_name", "type", "parent_id"])
+        ids = to_numbers(data["id"]).astype(np.int64)
+        self.none = int(ids.max()) + 1 if ids.size else 1
+        parents = to_numbers(data["parent_id"])
+        self.parent = np.full(self.none + 1, self.none, dtype=np.int64)
+        self.parent[ids] = np.where(np.isnan(parents), self.none, parents).astype(np.int64)
+        self.type = np.full(self.none + 1, "", dtype=object)
+        self.type[ids] = np.array(data["type"], dtype=object)
+        self.names = dict(zip(ids.tolist(), data["official_name"]))
+
+        # Every place's commune (itself or none) and region (itself or an ancestor)
+        every = np.arange(self.none + 1)
+        self.commune = np.where(self.type == "COMMUNE", every, self.none)
+        region = every
+        for _ in range(MAX_DEPTH):
+            region = np.where(self.type[region] == "REGION", region, self.parent[region])
+        self.region = np.where(self.type[region] == "REGION", region, self.none)
+
+    def at(self, level, places):
+        if level == "commune":
+            return self.commune[places]
+        if level == "region":
+            return self.region[places]
+        return np.where(places == self.none, self.none, 0)  # national: one bucket, id 0
+
+class Rollups:
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.root = os.path.join(data_dir, "rollups")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.store = PartitionStore(data_dir)
+        self.manifest = self.load()
+
+    def load(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def level_path(self, level):
+        return os.path.join(self.root, f"rollup_{level}.csv")
+
+    # --- What changed ---------------------------------------------------------
+
+    def fingerprint(self, key):
+        return sha1_file([self.store.partition_path(key, table) for table in FINGERPRINT_TABLES])
+
+    def shared_mark(self, table):
+        path = os.path.join(self.data_dir, f"{table}.csv")
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        return {"size": size, "sha1": sha1_file([path])}
+
+    def shared_appended(self):
+        """True if the jurisdictions/parties files only grew since the last build"""
+        for table in SHARED:
+            seen = (self.manifest or {}).get("shared", {}).get(table)
+            path = os.path.join(self.data_dir, f"{table}.csv")
+            if seen is None or not os.path.exists(path) or os.path.getsize(path) < seen["size"]:
+                return False
+            if sha1_file([path], seen["size"]) != seen["sha1"]:
+                return False
+        return True
+
+    def stale(self, full=False):
+        """(keys to recompute, keys whose rollups go away)"""
+        keys = [key for key in self.store.manifest["partitions"] if key != UNASSIGNED]
+        built = (self.manifest or {}).get("elections", {})
+        removed = [key for key in built if key not in keys]
+        if full or not self.shared_appended():
+            return keys, removed
+        return [key for key in keys if built.get(key, {}).get("sha1") != self.fingerprint(key)], removed
+
+    # --- Computing ------------------------------------------------------------
+
+    def compute(self, key, places, parties):
+        """{level: [row]} of one election"""
+        info = self.store.manifest["partitions"][key]
+        elections = read_columns(self.store.partition_path(key, "wp_politeia_elections"), ["id", "jurisdiction_id"])
+        cands = read_columns(self.store.partition_path(key, "wp_politeia_candidacies"),
+                             ["election_id", "party_id", "votes", "elected"])
+        election_ids = to_numbers(elections["id"]).astype(np.int64)
+        election_places = to_numbers(elections["jurisdiction_id"])
+        election_place = np.full(int(election_ids.max(initial=0)) + 1, places.none, dtype=np.int64)
+        election_place[election_ids] = np.where(np.isnan(election_places), places.none,
+                                                election_places).astype(np.int64)
+
+        cand_elections = to_numbers(cands["election_id"]).astype(np.int64)
+        in_partition = cand_elections < election_place.size
+        place = np.where(in_partition, election_place[np.where(in_partition, cand_elections, 0)], places.none)
+        party = np.nan_to_num(to_numbers(cands["party_id"])).astype(np.int64)  # 0: no party
+        votes = np.nan_to_num(to_numbers(cands["votes"]))
+        elected = np.nan_to_num(to_numbers(cands["elected"]))
+        width = int(party.max(initial=0)) + 1
+
+        result = {}
+        for level in LEVELS:
+            bucket = places.at(level, place)
+            counted = bucket != places.none
+            pairs, inverse = np.unique(bucket[counted] * width + party[counted], return_inverse=True)
+            pair_votes = np.bincount(inverse, weights=votes[counted], minlength=pairs.size)
+            pair_seats = np.bincount(inverse, weights=elected[counted], minlength=pairs.size)
+            pair_cands = np.bincount(inverse, minlength=pairs.size)
+            pair_places, pair_parties = pairs // width, pairs % width
+            # Share of the level's candidate votes: one more bincount over the places
+            place_ids, place_index = np.unique(pair_places, return_inverse=True)
+            totals = np.bincount(place_index, weights=pair_votes, minlength=place_ids.size)[place_index]
+            shares = np.round(np.divide(pair_votes * 100, totals, out=np.zeros(pair_votes.size),
+                                        where=totals > 0), 2)
+
+            rows = []
+            for i in np.lexsort((-pair_votes, pair_places)):
+                place_id, party_id = int(pair_places[i]), int(pair_parties[i])
+                name, short = parties.get(party_id, ("", ""))
+                rows.append([info["office_id"], info["election_date"],
+                             "" if level == "national" else place_id,
+                             NATIONAL_NAME if level == "national" else places.names.get(place_id, ""),
+                             party_id or "", name, short, int(pair_cands[i]), int(pair_votes[i]),
+                             float(shares[i]), int(pair_seats[i])])
+            result[level] = rows
+        return result
+
+    def write_level(self, level, drop, rows):
+        """Rewrites one rollup file without the `drop` elections, plus `rows`"""
+        path = self.level_path(level)
+        kept = []
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                kept = [row for row in reader if row and f"{row[0]}_{row[1]}" not in drop]
+        merged = kept + [[str(value) for value in row] for row in rows]
+        merged.sort(key=lambda row: (int(row[0]), row[1], int(row[2] or 0), -int(row[8])))
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(ROLLUP_COLUMNS)
+            writer.writerows(merged)
+        os.replace(tmp_path, path)
+        return len(merged)
+
+    def refresh(self, full=False):
+        """Recomputes the stale elections; returns the keys recomputed"""
+        if not self.store.partitioned:
+            print("  - Partitioning the tables by election (one-time full pass)...")
+            self.store.split()
+        else:
+            self.store.sync()
+        changed, removed = self.stale(full)
+        if not changed and not removed:
+            print("✓ Rollups up to date")
+            return []
+
+        start = time.perf_counter()
+        places = Jurisdictions(os.path.join(self.data_dir, "wp_politeia_jurisdictions.csv"))
+        party_rows = read_columns(os.path.join(self.data_dir, "wp_politeia_political_parties.csv"),
+                                  ["id", "official_name", "short_name"])
+        parties = {int(i): (name, short) for i, name, short
+                   in zip(party_rows["id"], party_rows["official_name"], party_rows["short_name"])}
+
+        new_rows = {level: [] for level in LEVELS}
+        elections = {key: value for key, value in (self.manifest or {}).get("elections", {}).items()
+                     if key not in removed}
+        for key in changed:
+            computed = self.compute(key, places, parties)
+            for level in LEVELS:
+                new_rows[level].extend(computed[level])
+            elections[key] = {"sha1": self.fingerprint(key),
+                              "rows": {level: len(computed[level]) for level in LEVELS}}
+        drop = set(changed) | set(removed)
+        counts = {level: self.write_level(level, drop, new_rows[level]) for level in LEVELS}
+
+        self.manifest = {"version": 1, "elections": elections,
+                         "shared": {table: self.shared_mark(table) for table in SHARED}}
+        self.save()
+        print(f"✓ Rollups: {len(changed)} election(s) recomputed, {len(removed)} removed "
+              f"({time.perf_counter() - start:.2f}s); "
+              + ", ".join(f"{counts[level]} {level} rows" for level in LEVELS))
+        return changed
+
+def rollup_after_merge(data_dir=DATA_DIR):
+    """Merge/consolidate scripts: refresh the elections they touched, once rollups exist"""
+    rollups = Rollups(data_dir)
+    if rollups.manifest is None:
+        return None
+    if np is None:
+        print("  (numpy not installed; skipping rollups)")
+        return None
+    return rollups.refresh()
+
+def read_rollup(level, data_dir=DATA_DIR, election_date=None, office_id=None):
+    """Rows of one rollup level as dicts, optionally of one election date/office"""
+    with open(Rollups(data_dir).level_path(level), 'r', encoding='utf-8', newline='') as f:
+        return [row for row in csv.DictReader(f)
+                if (election_date is None or row["election_date"] == election_date)
+                and (office_id is None or row["office_id"] == str(office_id))]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the per-party vote/seat rollups")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the master CSVs")
+    parser.add_argument("--full", action="store_true", help="Recompute every election")
+    args = parser.parse_args()
+
+    if np is None:
+        raise SystemExit("❌ numpy is required: pip install numpy")
+    Rollups(args.data_dir).refresh(full=args.full)
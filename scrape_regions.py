@@ -0,0 +1,315 @@
+"""
+Unified Session Hijacking Scraper (2024 Alcaldes)
+Connects once to the user's debug Chrome, discovers every region's communes
+from the Emol sidebar and scrapes them all in a single browser session.
+
+Usage:
+    python3 scrape_regions.py V          # one region
+    python3 scrape_regions.py I II XV    # several regions
+    python3 scrape_regions.py all        # the whole country
+    python3 scrape_regions.py V --manual # you click each commune, ENTER to extract
+    python3 scrape_regions.py all --resume # skip communes already in the checkpoint journal
+    python3 scrape_regions.py all --replay # rebuild the JSONs from snapshots/ (no browser)
+
+Every phase of every commune is timed (scrape_telemetry.py) into
+telemetry/scrape_regions.trace.jsonl and .prom, with a report at the end.
+"""
+import argparse
+import asyncio
+import json
+import os
+from playwright.async_api import async_playwright
+
+from checkpoint_journal import CheckpointJournal, checkpoint_path
+from emol_extract import commune_record, extract_commune_data
+from emol_wait import results_signature, wait_for_results_settled
+from gazetteer import get_gazetteer
+from scrape_telemetry import NO_TELEMETRY, Telemetry
+from snapshot_store import SnapshotStore, read_results, snapshot_page
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_URL = "https://www.emol.com/especiales/2024/nacional/elecciones2024/resultados.asp"
+CDP_URL = "http://localhost:9222"
+SNAPSHOT_ELECTION = "2024_alcaldes"
+
+# Region Code -> Name (north to south, same order as the Emol sidebar)
+REGION_NAMES = {
+    "XV": "Región de Arica y Parinacota",
+    "I": "Región de Tarapacá",
+    "II": "Región de Antofagasta",
+    "III": "Región de Atacama",
+    "IV": "Región de Coquimbo",
+    "V": "Región de Valparaíso",
+    "RM": "Región Metropolitana",
+    "VI": "Región del Libertador General Bernardo O'Higgins",
+    "VII": "Región del Maule",
+    "XVI": "Región de Ñuble",
+    "VIII": "Región del Biobío",
+    "IX": "Región de la Araucanía",
+    "XIV": "Región de Los Ríos",
+    "X": "Región de Los Lagos",
+    "XI": "Región de Aysén del General Carlos Ibáñez del Campo",
+    "XII": "Región de Magallanes y de la Antártica Chilena"
+}
+
+# data-region values Emol has used for a region besides the lowercase code
+REGION_ALIASES = {
+    "RM": ("rm", "13")
+}
+
+# One round-trip: every ul.ul-region with its (name, data-zn) communes
+DISCOVER_JS = """() => Array.from(document.querySelectorAll("ul.ul-region")).map(ul => ({
+    region: (ul.getAttribute("data-region") || "").toLowerCase(),
+    text: ul.textContent,
+    communes: Array.from(ul.querySelectorAll("li[data-el='a']"))
+        .map(li => [li.textContent.trim(), li.getAttribute("data-zn")])
+        .filter(([name, code]) => name && code)
+}))"""
+
+def region_output_path(region_code):
+    """<repo>/<CODE>/region_<code>_data.json (what merge_regions.py reads)"""
+    return os.path.join(BASE_DIR, region_code, f"region_{region_code.lower()}_data.json")
+
+async def discover_communes(page):
+    """
+    Returns {region_code: [(commune_name, emol_id), ...]} for every region in
+    the sidebar, read in a single page.evaluate call.
+    """
+    try:
+        await page.wait_for_selector("ul.ul-region", state="attached", timeout=15000)
+    except Exception as e:
+        print(f"Error waiting for regions: {e}")
+        return {}
+
+    blocks = await page.evaluate(DISCOVER_JS)
+
+    by_attr = {}
+    for block in blocks:
+        by_attr[block["region"]] = [tuple(c) for c in block["communes"]]
+
+    communes = {}
+    for code in REGION_NAMES:
+        for attr in REGION_ALIASES.get(code, (code.lower(),)):
+            if by_attr.get(attr):
+                communes[code] = by_attr[attr]
+                break
+
+    # Same fallback as extract_rm_communes: find RM by its best-known communes
+    if "RM" not in communes:
+        for block in blocks:
+            if "Santiago" in block["text"] and "Puente Alto" in block["text"]:
+                communes["RM"] = [tuple(c) for c in block["communes"]]
+                break
+
+    for code, items in communes.items():
+        print(f"  {code}: {len(items)} communes")
+
+    # Keep the data-zn of every commune in data/gazetteer.csv
+    unknown = get_gazetteer().record_emol_ids([c for items in communes.values() for c in items])
+    if unknown:
+        print(f"  Warning: not in the gazetteer: {', '.join(unknown)}")
+    return communes
+
+async def find_emol_page(browser):
+    """Robust Tab Search: the Emol tab among all open pages"""
+    for ctx in browser.contexts:
+        for p_obj in ctx.pages:
+            if "emol.com" in p_obj.url:
+                await p_obj.bring_to_front()
+                return p_obj
+    return None
+
+async def open_commune(page, commune_name, emol_id, manual=False, telemetry=NO_TELEMETRY):
+    """Brings the commune's results on screen (JS click, or the user in manual mode)"""
+    if manual:
+        print(f"\n👉 Please click on '{commune_name}' in the sidebar, then press ENTER here...")
+        with telemetry.span("manual_click", commune_name):
+            input()
+        return True
+
+    previous = await results_signature(page)
+    try:
+        with telemetry.span("wait_sidebar", commune_name):
+            await page.wait_for_selector(f"li[data-zn='{emol_id}']", state="attached", timeout=10000)
+        with telemetry.span("click", commune_name):
+            await page.evaluate(f"document.querySelector(\"li[data-zn='{emol_id}']\").click()")
+    except Exception as e:
+        print(f"  Warning: Could not click commune {commune_name} (ID {emol_id}): {e}")
+        return False
+
+    with telemetry.span("settle", commune_name):
+        settled = await wait_for_results_settled(page, expected_header=commune_name, previous=previous, timeout=12000)
+    if not settled:
+        telemetry.count("not_settled")
+        print(f"  Warning: Results for {commune_name} did not settle.")
+    return True
+
+def save_region(region_code, all_data, total):
+    """Writes region_<code>_data.json"""
+    output_file = region_output_path(region_code)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(all_data, f, indent=2, ensure_ascii=False)
+
+    print(f"\n✓ Region {region_code}: {len(all_data)}/{total} communes saved to {output_file}")
+
+async def scrape_region(page, region_code, communes, manual=False, store=None, journal=None, resume=False,
+                        telemetry=NO_TELEMETRY):
+    """
+    Scrapes every commune of one region and writes its region_<code>_data.json.
+    Each extracted commune is appended to `journal` right away; with
+    resume=True communes already in the journal are taken from it unclicked.
+    """
+    print(f"\n{'='*60}")
+    print(f"REGION {region_code} - {REGION_NAMES[region_code]} ({len(communes)} communes)")
+    print(f"{'='*60}")
+    if resume and journal:
+        print(f"↻ Resuming: {journal.count(region_code)} commune(s) already in the journal")
+
+    all_data = []
+    for commune_name, emol_id in communes:
+        if resume and journal and journal.is_done(region_code, commune_name):
+            all_data.append(journal.get(region_code, commune_name))
+            telemetry.count("resumed")
+            continue
+
+        with telemetry.span("commune", commune_name, region=region_code):
+            data = await scrape_commune(page, region_code, commune_name, emol_id, manual, store, journal, telemetry)
+        if data:
+            all_data.append(data)
+            print(f"\n✓ Successfully extracted data for {commune_name}")
+        else:
+            print(f"\n✗ Failed to extract data for {commune_name}")
+
+    save_region(region_code, all_data, len(communes))
+    return all_data
+
+async def scrape_commune(page, region_code, commune_name, emol_id, manual, store, journal, telemetry):
+    """Opens and extracts one commune; returns its record, or None (counted once as skipped or failed)"""
+    if not await open_commune(page, commune_name, emol_id, manual, telemetry):
+        print(f"\n✗ Skipping {commune_name}")
+        telemetry.count("skipped")
+        return None
+
+    data = await extract_commune_data(page, commune_name, telemetry)
+    if not data:
+        telemetry.count("failed")
+        return None
+
+    # Only snapshot views we could read, so a replay sees the same communes
+    with telemetry.span("snapshot", commune_name):
+        await snapshot_page(store, page, SNAPSHOT_ELECTION, region_code, commune_name)
+    if journal:
+        with telemetry.span("journal", commune_name):
+            journal.record(region_code, commune_name, data)
+    return data
+
+def replay_regions(region_codes, store=None):
+    """
+    Rebuilds the region JSONs from cached page snapshots, without a browser.
+    Use after a parser fix, then re-run merge_regions.py.
+    """
+    store = store or SnapshotStore()
+    print("="*60)
+    print("REPLAY FROM SNAPSHOTS - " + ", ".join(region_codes))
+    print("="*60)
+
+    for region_code in region_codes:
+        entries = store.entries(SNAPSHOT_ELECTION, region=region_code)
+        if not entries:
+            print(f"\n⚠️ No snapshots for region {region_code}, skipping")
+            continue
+
+        all_data = []
+        for entry in entries:
+            results = read_results(store, entry)
+            if not results or not results['candidates']:
+                print(f"\n✗ No candidates in snapshot of {entry['unit']} ({entry['fetched_at']})")
+                continue
+            all_data.append(commune_record(entry['unit'], results))
+
+        save_region(region_code, all_data, len(entries))
+
+async def scrape_regions(region_codes, manual=False, snapshots=True, resume=False, telemetry=True):
+    """
+    Connect to user's existing Chrome browser once and scrape the given regions
+    """
+    store = SnapshotStore() if snapshots else None
+    tracer = Telemetry("scrape_regions", enabled=telemetry)
+    journal = CheckpointJournal(checkpoint_path(SNAPSHOT_ELECTION), fresh=not resume)
+    print("="*60)
+    print("SESSION HIJACKING SCRAPER - " + ", ".join(region_codes))
+    print("="*60)
+    print("\n📋 INSTRUCTIONS:")
+    print("\n1. Make sure Chrome is running with:")
+    print("   bash GhostMouse/start_chrome_debug.sh")
+    print(f"\n2. In the Chrome window go to {BASE_URL}")
+    print("   and click 'Alcaldes' (browse around a bit: scroll, move mouse)")
+    print("\n3. Come back here and press ENTER when ready...")
+
+    input()
+
+    print("\n🔌 Connecting to your Chrome browser...")
+
+    async with async_playwright() as p:
+        try:
+            browser = await p.chromium.connect_over_cdp(CDP_URL)
+            page = await find_emol_page(browser)
+            if not page:
+                print("❌ Emol tab not found. Please open the Emol website in the debug Chrome first.")
+                return
+
+            print(f"✓ Connected to page: {page.url}")
+
+            print("\nDiscovering communes from the sidebar...")
+            communes = await discover_communes(page)
+
+            for region_code in region_codes:
+                if not communes.get(region_code):
+                    print(f"\n⚠️ No communes found for region {region_code}, skipping")
+                    continue
+                await scrape_region(page, region_code, communes[region_code], manual, store, journal, resume, tracer)
+
+            print(f"\n\n{'='*60}")
+            print("✓ COMPLETE!")
+            print(f"{'='*60}")
+
+        except Exception as e:
+            print(f"\n❌ Error: {e}")
+            print("\nMake sure you:")
+            print("1. Started Chrome with --remote-debugging-port=9222")
+            print("2. Opened the Emol website in that Chrome window")
+            print("3. Are browsing as a human (not redirected)")
+        finally:
+            tracer.close()
+            if tracer.enabled and tracer.spans:
+                print(f"\nTelemetry: {tracer.trace_path}, {tracer.prom_path}")
+
+def parse_region_codes(values):
+    """['all'] -> every region; otherwise validated, upper-cased codes"""
+    if any(v.lower() == "all" for v in values):
+        return list(REGION_NAMES)
+
+    codes = []
+    for value in values:
+        code = value.upper()
+        if code not in REGION_NAMES:
+            raise SystemExit(f"Unknown region '{value}'. Use one of: {', '.join(REGION_NAMES)} or 'all'")
+        codes.append(code)
+    return codes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape 2024 mayoral results for one, several or all regions")
+    parser.add_argument("regions", nargs="+", help="Region codes (e.g. V XV RM) or 'all'")
+    parser.add_argument("--manual", action="store_true", help="Wait for you to click each commune instead of clicking it")
+    parser.add_argument("--resume", action="store_true", help="Skip communes already recorded in the checkpoint journal")
+    parser.add_argument("--replay", action="store_true", help="Parse cached snapshots instead of opening a browser")
+    parser.add_argument("--no-snapshots", action="store_true", help="Don't save page snapshots while scraping")
+    parser.add_argument("--no-telemetry", action="store_true", help="Don't write the timing trace and metrics")
+    args = parser.parse_args()
+    if args.replay:
+        replay_regions(parse_region_codes(args.regions))
+    else:
+        asyncio.run(scrape_regions(parse_region_codes(args.regions), manual=args.manual,
+                                   snapshots=not args.no_snapshots, resume=args.resume,
+                                   telemetry=not args.no_telemetry))
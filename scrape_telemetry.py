@@ -0,0 +1,206 @@
+"""
+Scrape Telemetry
+Timing spans around each phase of a scrape (page.goto, waiting for the
+sidebar, the click, waiting for the odometers, extraction, snapshot, CSV
+write), written as they finish to a JSONL trace:
+
+    {"at": "...", "scraper": "scrape_to_csv", "unit": "Maipú", "phase": "settle",
+     "seconds": 1.234, "status": "ok", "attempt": 1}
+
+At the end of a run write_prometheus() leaves a Prometheus text-format file
+(node_exporter textfile collector) with a latency histogram per phase and
+counters for retries, skips and failures, and report() prints the slowest
+communes and where the time went by phase.
+
+Files go to telemetry/<scraper>.trace.jsonl and telemetry/<scraper>.prom.
+
+Usage:
+    python3 scrape_telemetry.py telemetry/scrape_to_csv.trace.jsonl   # report of a past run
+"""
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TELEMETRY_DIR = os.path.join(BASE_DIR, "telemetry")
+
+# The span that wraps the browser work on one commune; every other phase
+# happens inside it except WRITE_PHASE, which the CSV writer task runs later
+UNIT_PHASE = "commune"
+WRITE_PHASE = "csv_write"
+# Histogram buckets (seconds)
+BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+METRIC_PREFIX = "politeia_scrape"
+
+def telemetry_paths(scraper, directory=TELEMETRY_DIR):
+    """(trace path, prometheus path) for one scraper"""
+    return (os.path.join(directory, f"{scraper}.trace.jsonl"),
+            os.path.join(directory, f"{scraper}.prom"))
+
+class Telemetry:
+    """
+    Collects spans and counters for one run. Telemetry(enabled=False) keeps
+    the same interface but records nothing (replays, tests).
+    """
+
+    def __init__(self, scraper="scrape", directory=TELEMETRY_DIR, enabled=True):
+        self.scraper = scraper
+        self.enabled = enabled
+        self.spans = []  # {"unit", "phase", "seconds", "status", ...}
+        self.counters = defaultdict(int)  # event -> count
+        self.trace_path, self.prom_path = telemetry_paths(scraper, directory)
+        self.trace = None
+        if enabled:
+            os.makedirs(directory, exist_ok=True)
+            self.trace = open(self.trace_path, "w", encoding="utf-8")
+
+    @contextmanager
+    def span(self, phase, unit=None, **attrs):
+        """Times the block; an exception marks the span as an error and propagates"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.record(phase, unit, time.perf_counter() - start, status, **attrs)
+
+    def record(self, phase, unit, seconds, status="ok", **attrs):
+        """Adds a finished span (also for phases timed elsewhere)"""
+        if not self.enabled:
+            return
+        span = {"at": datetime.now().isoformat(timespec="milliseconds"), "scraper": self.scraper,
+                "unit": unit, "phase": phase, "seconds": round(seconds, 4), "status": status, **attrs}
+        self.spans.append(span)
+        self.trace.write(json.dumps(span, ensure_ascii=False) + "\n")
+        self.trace.flush()
+
+    def count(self, event, n=1):
+        """Bumps a counter (retry, skipped, failed, ...)"""
+        if self.enabled:
+            self.counters[event] += n
+
+    def close(self, report=True):
+        """Closes the trace, writes the Prometheus file and prints the report"""
+        if not self.enabled:
+            return
+        self.trace.close()
+        self.write_prometheus()
+        if report:
+            self.report()
+
+    def write_prometheus(self, path=None):
+        path = path or self.prom_path
+        lines = [
+            f"# HELP {METRIC_PREFIX}_phase_seconds Duration of one scrape phase",
+            f"# TYPE {METRIC_PREFIX}_phase_seconds histogram"
+        ]
+        by_phase = defaultdict(list)
+        for span in self.spans:
+            by_phase[span["phase"]].append(span["seconds"])
+        for phase, values in sorted(by_phase.items()):
+            labels = f'scraper="{self.scraper}",phase="{phase}"'
+            for bucket in BUCKETS:
+                lines.append(f'{METRIC_PREFIX}_phase_seconds_bucket{{{labels},le="{bucket}"}} '
+                             f'{sum(1 for v in values if v <= bucket)}')
+            lines.append(f'{METRIC_PREFIX}_phase_seconds_bucket{{{labels},le="+Inf"}} {len(values)}')
+            lines.append(f"{METRIC_PREFIX}_phase_seconds_sum{{{labels}}} {sum(values):.4f}")
+            lines.append(f"{METRIC_PREFIX}_phase_seconds_count{{{labels}}} {len(values)}")
+
+        errors = defaultdict(int)
+        for span in self.spans:
+            if span["status"] != "ok":
+                errors[span["phase"]] += 1
+        lines += [f"# HELP {METRIC_PREFIX}_phase_errors_total Phases that raised",
+                  f"# TYPE {METRIC_PREFIX}_phase_errors_total counter"]
+        for phase, n in sorted(errors.items()):
+            lines.append(f'{METRIC_PREFIX}_phase_errors_total{{scraper="{self.scraper}",phase="{phase}"}} {n}')
+
+        lines += [f"# HELP {METRIC_PREFIX}_events_total Retries, skips and failures",
+                  f"# TYPE {METRIC_PREFIX}_events_total counter"]
+        for event, n in sorted(self.counters.items()):
+            lines.append(f'{METRIC_PREFIX}_events_total{{scraper="{self.scraper}",event="{event}"}} {n}')
+
+        # Textfile collectors may read at any moment: write aside, then rename
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def report(self, top=10):
+        print_report(self.spans, self.counters, top)
+
+# Default for callers that don't pass one
+NO_TELEMETRY = Telemetry(enabled=False)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def print_report(spans, counters=None, top=10):
+    """Slowest communes and the time per phase"""
+    if not spans:
+        print("No spans recorded.")
+        return
+
+    # Slowest communes: the commune span (+ its CSV write) if there is one,
+    # else the sum of its phases
+    phases_of = defaultdict(lambda: defaultdict(float))
+    for span in spans:
+        if span["unit"] is not None:
+            phases_of[span["unit"]][span["phase"]] += span["seconds"]
+    per_unit = {}
+    for unit, phases in phases_of.items():
+        if UNIT_PHASE in phases:
+            per_unit[unit] = phases.pop(UNIT_PHASE) + phases.get(WRITE_PHASE, 0.0)
+        else:
+            per_unit[unit] = sum(phases.values())
+
+    print(f"\nSlowest communes (top {top}):")
+    for unit, seconds in sorted(per_unit.items(), key=lambda item: -item[1])[:top]:
+        slowest = sorted(phases_of[unit].items(), key=lambda item: -item[1])[:3]
+        detail = ", ".join(f"{phase} {s:.2f}s" for phase, s in slowest)
+        print(f"  {unit:<28} {seconds:>8.2f}s  ({detail})")
+
+    by_phase = defaultdict(list)
+    for span in spans:
+        if span["phase"] != UNIT_PHASE:
+            by_phase[span["phase"]].append(span["seconds"])
+    total = sum(sum(v) for v in by_phase.values()) or 1e-9
+    print("\nTime by phase:")
+    print(f"  {'phase':<16} {'count':>6} {'total':>9} {'share':>6} {'mean':>7} {'p50':>7} {'p95':>7} {'max':>7}")
+    for phase, values in sorted(by_phase.items(), key=lambda item: -sum(item[1])):
+        print(f"  {phase:<16} {len(values):>6} {sum(values):>8.1f}s {sum(values) / total * 100:>5.1f}% "
+              f"{sum(values) / len(values):>6.2f}s {percentile(values, 0.5):>6.2f}s "
+              f"{percentile(values, 0.95):>6.2f}s {max(values):>6.2f}s")
+
+    errors = sum(1 for span in spans if span["status"] != "ok")
+    if counters or errors:
+        events = dict(counters or {})
+        if errors:
+            events["phase errors"] = errors
+        print("\nEvents: " + ", ".join(f"{n} {event}" for event, n in sorted(events.items())))
+
+def read_trace(path):
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                continue  # truncated last line of an interrupted run
+    return spans
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit("Usage: python3 scrape_telemetry.py <trace.jsonl> [top]")
+    print_report(read_trace(sys.argv[1]), top=int(sys.argv[2]) if len(sys.argv) > 2 else 10)
@@ -0,0 +1,115 @@
+"""
+Raw Page Snapshot Store
+Content-addressed cache of every result view we fetch (page HTML or captured
+JSON), so parsing and consolidation can be re-run offline with --replay.
+
+Layout:
+    snapshots/index.jsonl                    one line per fetch (append-only)
+    snapshots/objects/ab/abcdef....html.gz   gzipped content, keyed by sha256
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from emol_capture import parse_payload
+from emol_extract import extract_results_from_html
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "snapshots")
+
+class SnapshotStore:
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.jsonl")
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+
+    def _object_path(self, digest, kind):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.{kind}.gz")
+
+    def put(self, election, region, unit, content, kind="html", fetched_at=None):
+        """
+        Stores one fetched view. `unit` is the commune or distrito name.
+        Identical content is written once; every fetch still gets an index line.
+        """
+        if kind == "json" and not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, sort_keys=True)
+        raw = content.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+
+        path = self._object_path(digest, kind)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, path)
+
+        entry = {
+            "election": election,
+            "region": region,
+            "unit": unit,
+            "fetched_at": fetched_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "kind": kind,
+            "sha256": digest
+        }
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return digest
+
+    def entries(self, election, region=None, kind=None):
+        """
+        Latest snapshot per (region, unit) for an election, in the order the
+        units were first fetched (so replays allocate IDs like the live run).
+        """
+        if not os.path.exists(self.index_path):
+            return []
+
+        latest = {}
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["election"] != election:
+                    continue
+                if region is not None and entry["region"] != region:
+                    continue
+                if kind is not None and entry["kind"] != kind:
+                    continue
+                # dicts keep first-insertion order; later fetches replace the value
+                latest[(entry["region"], entry["unit"])] = entry
+        return list(latest.values())
+
+    def read(self, entry):
+        """Returns the stored content (str for html, parsed object for json)"""
+        with gzip.open(self._object_path(entry["sha256"], entry["kind"]), "rb") as f:
+            content = f.read().decode("utf-8")
+        return json.loads(content) if entry["kind"] == "json" else content
+
+async def snapshot_page(store, page, election, region, unit):
+    """Saves the current page HTML; never lets a snapshot failure stop a scrape"""
+    if store is None:
+        return None
+    try:
+        return store.put(election, region, unit, await page.content(), kind="html")
+    except Exception as e:
+        print(f"  Warning: Snapshot failed for {unit}: {e}")
+        return None
+
+def read_results(store, entry, year="2024"):
+    """
+    Parses a snapshot into the emol_extract.parse_results shape: saved HTML
+    goes through the offline DOM reader, captured JSON through parse_payload
+    (newest usable payload wins, as in ResultCapture.wait_for_result).
+    """
+    content = store.read(entry)
+    if entry["kind"] == "html":
+        return extract_results_from_html(content, year)
+
+    for item in reversed(content):
+        parsed = parse_payload(item.get("data"))
+        if parsed is not None:
+            return parsed
+    return None
@@ -0,0 +1,50 @@
+"""
+Merger State Index
+Sidecar JSON next to the master CSVs holding what the mergers otherwise
+rebuild by scanning every table on startup (next IDs and name -> id lookups).
+
+The index records each CSV's size and mtime when it was saved; if any table
+changed since (edited by hand, cleaned, or a crashed run), load() returns
+None and the merger falls back to a full scan, then saves a fresh index.
+"""
+import json
+import os
+
+class StateIndex:
+    def __init__(self, data_dir, tables, name="state_index"):
+        self.data_dir = data_dir
+        self.tables = list(tables)
+        self.path = os.path.join(data_dir, f".{name}.json")
+
+    def _file_stats(self):
+        stats = {}
+        for table in self.tables:
+            file_path = os.path.join(self.data_dir, f"{table}.csv")
+            if os.path.exists(file_path):
+                st = os.stat(file_path)
+                stats[table] = [st.st_size, st.st_mtime_ns]
+            else:
+                stats[table] = None
+        return stats
+
+    def load(self):
+        """Returns the saved state, or None if missing or any table changed"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except ValueError:
+            return None
+
+        if saved.get("files") != self._file_stats():
+            return None
+        return saved["state"]
+
+    def save(self, state):
+        """Call after every write to the tables (i.e. once writers are closed)"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"files": self._file_stats(), "state": state}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
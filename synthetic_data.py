@@ -0,0 +1,237 @@
+"""
+Synthetic Election Data
+Writes fake but well-formed source JSONs in every shape the mergers read,
+for the whole country (data/gazetteer.csv) times a scale factor, so the
+pipeline can be benchmarked at sizes the real scrapes never reach:
+
+    <out>/alcaldes/<CODE>/region_<code>_data.json      merge_regions.py (2024 mayors)
+    <out>/presidentes/<CODE>/region_<code>_data.json   GhostMouse/consolidate_2021.py
+    <out>/senators/<CODE>/region_<code>_data.json      GhostMouse/consolidate_senators_2021.py
+    <out>/diputados/<CODE>/region_<code>_diputados.json
+    <out>/presidential_2021.json                        regional presidential totals
+
+Scale 10 means every commune, district and senate race appears ten times
+(copies are named "Arica 2", "Arica 3", ...). Output is deterministic for a
+given seed. Vote totals are internally consistent: candidacy votes add up
+to valid_votes, and valid + blank + null = total_votes.
+
+Usage:
+    python3 synthetic_data.py /tmp/synthetic            # 1x national
+    python3 synthetic_data.py /tmp/synthetic --scale 10 --seed 7
+"""
+import argparse
+import json
+import os
+import random
+
+from gazetteer import get_gazetteer
+from party_normalizer import PARTIES
+
+DEFAULT_SEED = 2024
+
+GIVEN_NAMES = [
+    "José", "Juan", "Luis", "Carlos", "Jorge", "Francisco", "Manuel", "Pedro", "Cristián", "Rodrigo",
+    "Felipe", "Gonzalo", "Sebastián", "Matías", "Andrés", "Claudio", "Patricio", "Ricardo", "Hernán", "Tomás",
+    "María", "Ana", "Carolina", "Daniela", "Francisca", "Javiera", "Camila", "Valentina", "Paula", "Macarena",
+    "Claudia", "Verónica", "Marcela", "Paulina", "Alejandra", "Constanza", "Catalina", "Soledad", "Ximena", "Ignacia"
+]
+COMMON_SURNAMES = [
+    "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda",
+    "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres", "Araya", "Flores", "Espinoza", "Valenzuela",
+    "Castillo", "Tapia", "Reyes", "Gutiérrez", "Castro", "Pizarro", "Álvarez", "Vásquez", "Sánchez", "Fernández"
+]
+SYLLABLES = ["al", "ba", "ca", "do", "fe", "ga", "hu", "ja", "la", "ma", "ne", "pa", "qui", "ra", "sa", "te",
+             "va", "ve", "ro", "ni", "lo", "cu", "mi", "ren", "tal", "gor", "bel", "zu"]
+COALITIONS = ["Chile Vamos", "Apruebo Dignidad", "Nuevo Pacto Social", "Frente Social Cristiano",
+              "Unidad por Chile", "Independiente fuera de pacto"]
+PRESIDENTIAL = [
+    ("Gabriel Boric", "Convergencia Social - Apruebo Dignidad"),
+    ("José Antonio Kast", "Partido Republicano"),
+    ("Yasna Provoste", "Democracia Cristiana - Nuevo Pacto Social"),
+    ("Sebastián Sichel", "Independiente - Chile Vamos"),
+    ("Eduardo Artés", "Unión Patriótica"),
+    ("Marco Enríquez-Ominami", "Partido Progresista"),
+    ("Franco Parisi", "Partido de la Gente")
+]
+
+class SyntheticElections:
+    def __init__(self, scale=1, seed=DEFAULT_SEED):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.gazetteer = get_gazetteer()
+        # ~30% of people carry a very common surname, as in the real tables
+        self.surnames = COMMON_SURNAMES + sorted({self.surname() for _ in range(4000)})
+        self.regions = [p for p in self.gazetteer.places.values() if p.type == "REGION"]
+
+    def surname(self):
+        return "".join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(2, 4))).capitalize()
+
+    def person(self):
+        rng = self.rng
+        surnames = COMMON_SURNAMES if rng.random() < 0.3 else self.surnames
+        given = rng.choice(GIVEN_NAMES)
+        if rng.random() < 0.4:
+            given += " " + rng.choice(GIVEN_NAMES)
+        return f"{given} {rng.choice(surnames)} {rng.choice(self.surnames)}"
+
+    def party(self):
+        """A raw party string in one of the forms the scrapes produce"""
+        rng = self.rng
+        short = rng.choice(list(PARTIES))
+        name = PARTIES[short]
+        form = rng.random()
+        if form < 0.3:
+            return f"{short} - {rng.choice(COALITIONS)}"
+        if form < 0.45:
+            return f"IND ( {short} ) - {rng.choice(COALITIONS)}"
+        if form < 0.55:
+            return f"Independiente en cupo {name}"
+        return name
+
+    def copies(self, name, i):
+        return name if i == 0 else f"{name} {i + 1}"
+
+    def votes(self, count, electorate):
+        """`count` vote totals that add up to roughly the turnout of `electorate`"""
+        weights = [self.rng.paretovariate(1.2) for _ in range(count)]
+        total = sum(weights)
+        valid = int(electorate * self.rng.uniform(0.25, 0.6))
+        return [max(1, int(valid * w / total)) for w in weights]
+
+    def stats(self, valid, electorate):
+        blank = int(valid * self.rng.uniform(0.01, 0.04))
+        null = int(valid * self.rng.uniform(0.02, 0.06))
+        total = valid + blank + null
+        return {
+            "valid_votes": valid,
+            "blank_votes": blank,
+            "null_votes": null,
+            "total_votes": total,
+            "participation_rate": round(min(100.0, total / electorate * 100), 2)
+        }
+
+    def race(self, names_parties, electorate, seats):
+        """Candidates + stats for one race; the `seats` most voted are elected"""
+        votes = self.votes(len(names_parties), electorate)
+        valid = sum(votes)
+        winners = set(sorted(range(len(votes)), key=lambda i: -votes[i])[:seats])
+        candidates = [{
+            "name": name,
+            "party": party,
+            "votes": v,
+            "percentage": round(v / valid * 100, 2),
+            "elected": i in winners
+        } for i, ((name, party), v) in enumerate(zip(names_parties, votes))]
+        return candidates, self.stats(valid, electorate)
+
+    def electorate(self):
+        return int(self.rng.lognormvariate(10, 1.1)) + 500
+
+    def region_communes(self, region):
+        communes = [self.gazetteer.places[c] for c in self.gazetteer.communes_in(region.code)]
+        return [(self.copies(c.name, i), c) for i in range(self.scale) for c in communes]
+
+    def alcaldes(self, region):
+        data = []
+        for name, _ in self.region_communes(region):
+            field = [(self.person(), self.party()) for _ in range(self.rng.randint(2, 8))]
+            candidates, stats = self.race(field, self.electorate(), 1)
+            data.append({"commune": name, "candidates": candidates, "stats": stats})
+        return data
+
+    def presidentes(self, region):
+        data = []
+        for name, _ in self.region_communes(region):
+            candidates, stats = self.race(PRESIDENTIAL, self.electorate(), 0)
+            data.append({"commune": name, "candidates": candidates, "stats": stats})
+        return data
+
+    def senators(self, region, i):
+        field = [(self.person(), self.party()) for _ in range(self.rng.randint(6, 25))]
+        candidates, stats = self.race(field, self.electorate() * 20, self.rng.randint(2, 5))
+        return [{"commune": self.copies(region.name, i), "candidates": candidates, "stats": stats}]
+
+    def diputados(self, region):
+        districts = sorted({int(self.gazetteer.places[c].district) for c in self.gazetteer.communes_in(region.code)})
+        data = {"region_code": region.region, "region_name": region.name, "distritos": []}
+        for i in range(self.scale):
+            for district in districts:
+                communes = [self.copies(self.gazetteer.places[c].name, i)
+                            for c in self.gazetteer.communes_in_district(district)]
+                seats = self.rng.randint(3, 8)
+                pacts = []
+                for p in range(self.rng.randint(5, 12)):
+                    field = [(self.person(), self.party()) for _ in range(self.rng.randint(1, 6))]
+                    candidates, _ = self.race(field, self.electorate() * 5, 0)
+                    pacts.append({"pacto_nombre": f"{chr(65 + p) * 2}. {self.rng.choice(COALITIONS)}",
+                                  "candidatos": [{
+                                      "nombre": c["name"],
+                                      "partido": c["party"].split(" - ")[0],
+                                      "condicion": self.rng.choice(["Militante", "Independiente"]),
+                                      "porcentaje_votos": c["percentage"],
+                                      "votos_totales": c["votes"],
+                                      "electo": False
+                                  } for c in candidates]})
+                # The `seats` most voted candidates of the district are elected
+                everyone = sorted((c for p in pacts for c in p["candidatos"]), key=lambda c: -c["votos_totales"])
+                for c in everyone[:seats]:
+                    c["electo"] = True
+                data["distritos"].append({"region": "", "distrito_id": district + 28 * i, "comunas": communes,
+                                          "escaños_totales": seats, "pactos": pacts})
+        return data
+
+    def write(self, output_dir):
+        """Writes every shape; returns {shape: number of files}"""
+        counts = {"alcaldes": 0, "presidentes": 0, "senators": 0, "diputados": 0}
+        presidential = []
+        for region in self.regions:
+            code = region.region
+            write_json(os.path.join(output_dir, "alcaldes", code, f"region_{code.lower()}_data.json"),
+                       self.alcaldes(region))
+            communes = self.presidentes(region)
+            write_json(os.path.join(output_dir, "presidentes", code, f"region_{code.lower()}_data.json"), communes)
+            for i in range(self.scale):
+                suffix = "" if i == 0 else f"_{i + 1}"
+                write_json(os.path.join(output_dir, "senators", code, f"region_{code.lower()}{suffix}_data.json"),
+                           self.senators(region, i))
+            write_json(os.path.join(output_dir, "diputados", code, f"region_{code.lower()}_diputados.json"),
+                       self.diputados(region))
+            counts["alcaldes"] += 1
+            counts["presidentes"] += 1
+            counts["senators"] += self.scale
+            counts["diputados"] += 1
+
+            # Regional totals, summed from the commune results above
+            totals = {name: 0 for name, _ in PRESIDENTIAL}
+            for commune in communes:
+                for cand in commune["candidates"]:
+                    totals[cand["name"]] += cand["votes"]
+            valid = sum(totals.values())
+            presidential.append({
+                "region_id": code,
+                "region_name": region.name,
+                "candidates": [{"candidate": name, "party": party, "votes": totals[name],
+                                "percentage": round(totals[name] / valid * 100, 2)} for name, party in PRESIDENTIAL],
+                "stats": {"valid_votes": valid, "total_votes": sum(c["stats"]["total_votes"] for c in communes)}
+            })
+        write_json(os.path.join(output_dir, "presidential_2021.json"), presidential)
+        return counts
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+def generate(output_dir, scale=1, seed=DEFAULT_SEED):
+    return SyntheticElections(scale, seed).write(output_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic source JSONs for benchmarking")
+    parser.add_argument("output", help="Output directory")
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the country (1, 10, 100, ...)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    args = parser.parse_args()
+
+    counts = generate(args.output, args.scale, args.seed)
+    print(f"✓ Wrote {sum(counts.values())} files to {args.output} "
+          f"({', '.join(f'{n} {shape}' for shape, n in counts.items())})")
@@ -0,0 +1,148 @@
+"""
+Buffered Table Writers
+Shared write path for CsvGenerator and the Merger classes: rows are tuples in
+column order, created_at/updated_at use one timestamp per run, and rows are
+flushed with writerows() once a buffer fills up or gets old.
+
+    tables = TableSet.open_csv(DATA_DIR, TABLES)        # append to the master CSVs
+    tables.ids["wp_politeia_people"] = next_free_id      # or let open_csv start at 1
+    person_id = tables.insert("wp_politeia_people", given, paternal)
+    tables.close()                                       # flush + rows/sec per table
+"""
+import csv
+import os
+import time
+from datetime import datetime
+
+FLUSH_ROWS = 1000  # flush a table once this many rows are buffered...
+FLUSH_SECONDS = 5.0  # ...or once the oldest buffered row is this old
+
+TIMESTAMP_COLUMNS = ["created_at", "updated_at"]
+
+def run_timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+class TableWriter:
+    """
+    One CSV table. `columns` is the order rows are given in; when appending
+    to a file whose header differs (e.g. elections with title/rounds), rows
+    are mapped onto the file's own header so columns never shift.
+    """
+
+    def __init__(self, path, columns, mode="a", flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS):
+        self.path = path
+        self.columns = list(columns)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.rows = 0
+        self.started = None
+        self.finished = None
+        self._buffered_since = None
+
+        header = None
+        if mode == "a" and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                header = next(csv.reader(f), None)
+
+        self.file = open(path, mode, newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        if header is None:
+            self.writer.writerow(self.columns)
+            header = self.columns
+
+        # Positions of our columns in the file header (None = same order)
+        self.mapping = None
+        if header != self.columns:
+            self.mapping = [self.columns.index(c) if c in self.columns else None for c in header]
+
+    def write(self, row):
+        """Buffers one row (a tuple in `columns` order)"""
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+        if not self.buffer:
+            self._buffered_since = now
+
+        if self.mapping is not None:
+            row = tuple("" if i is None else row[i] for i in self.mapping)
+        self.buffer.append(row)
+        self.rows += 1
+
+        if len(self.buffer) >= self.flush_rows or now - self._buffered_since >= self.flush_seconds:
+            self.flush()
+
+    def writerow(self, row):
+        """csv.DictWriter-style entry point for callers that still build dicts"""
+        self.write(tuple(row.get(c, "") for c in self.columns))
+
+    def flush(self):
+        if self.buffer:
+            self.writer.writerows(self.buffer)
+            self.buffer = []
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.finished = time.perf_counter()
+
+class TableSet:
+    """
+    A group of table writers sharing one run timestamp and the ID counters
+    (`ids[table]` is the next free id, as in the Merger classes).
+    """
+
+    def __init__(self, writers=None, ids=None, timestamp=None):
+        self.writers = writers or {}
+        self.ids = ids if ids is not None else {}
+        self.timestamp = timestamp or run_timestamp()
+
+    @classmethod
+    def open_csv(cls, data_dir, tables, mode="a", ids=None):
+        """Writers for <data_dir>/<table>.csv (mode "w" starts fresh files)"""
+        table_set = cls(ids=ids)
+        for table, columns in tables.items():
+            table_set.add_csv(data_dir, table, columns, mode)
+        return table_set
+
+    def add_csv(self, data_dir, table, columns, mode="a"):
+        self.writers[table] = TableWriter(os.path.join(data_dir, f"{table}.csv"), columns, mode)
+        self.ids.setdefault(table, 1)
+        return self.writers[table]
+
+    def next_id(self, table):
+        new_id = self.ids[table]
+        self.ids[table] += 1
+        return new_id
+
+    def write(self, table, *values):
+        """Writes a row that already has its id; timestamps are appended"""
+        writer = self.writers[table]
+        if writer.columns[-2:] == TIMESTAMP_COLUMNS:
+            values = values + (self.timestamp, self.timestamp)
+        writer.write(values)
+
+    def insert(self, table, *values):
+        """Allocates the next id, writes (id, *values, timestamps), returns the id"""
+        new_id = self.next_id(table)
+        self.write(table, new_id, *values)
+        return new_id
+
+    def flush(self):
+        for writer in self.writers.values():
+            writer.flush()
+
+    def close(self, report=True):
+        for writer in self.writers.values():
+            writer.close()
+        if report:
+            self.report()
+
+    def report(self):
+        """Rows written and rows/sec per table"""
+        for table, writer in self.writers.items():
+            if not writer.rows:
+                continue
+            elapsed = ((writer.finished or time.perf_counter()) - writer.started) or 1e-9
+            print(f"  {table}: {writer.rows} rows ({writer.rows / elapsed:,.0f} rows/s)")
@@ -0,0 +1,49 @@
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cascade_delete import remove_elections
+from person_resolver import match_cache_path, review_cache_path
+from politeia_sqlite import table_columns
+
+ROWS = {
+    "wp_politeia_jurisdictions": [{"id": 1, "official_name": "Putre", "type": "COMMUNE"}],
+    "wp_politeia_political_parties": [{"id": 1, "official_name": "Independiente"}],
+    "wp_politeia_people": [{"id": 1, "given_names": "Ana", "paternal_surname": "Soto"},
+                           {"id": 2, "given_names": "Luis", "paternal_surname": "Rojas"}],
+    "wp_politeia_elections": [{"id": 1, "office_id": 1, "jurisdiction_id": 1, "election_date": "2024-10-27"},
+                              {"id": 2, "office_id": 1, "jurisdiction_id": 1, "election_date": "2021-05-16"}],
+    "wp_politeia_election_results": [],
+    "wp_politeia_candidacies": [{"id": 1, "election_id": 1, "person_id": 1, "party_id": 1, "votes": 10},
+                                {"id": 2, "election_id": 2, "person_id": 2, "party_id": 1, "votes": 20}],
+    "wp_politeia_party_memberships": [],
+    "wp_politeia_office_terms": []
+}
+
+def write_tables(data_dir):
+    for table, rows in ROWS.items():
+        columns = table_columns(table)
+        with open(os.path.join(data_dir, f"{table}.csv"), 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows([[row.get(c, "") for c in columns] for row in rows])
+
+def test_deleted_people_leave_the_match_cache_and_review_list(tmp_path):
+    data_dir = str(tmp_path)
+    write_tables(data_dir)
+    match_path = match_cache_path(data_dir)
+    with open(match_path, 'w', encoding='utf-8') as f:
+        json.dump({"ANA SOTO": 1, "Luis Rojas R.": 2}, f)
+    with open(review_cache_path(match_path), 'w', encoding='utf-8') as f:
+        json.dump({"Anna Soto": {"person_id": 1, "name": "ana soto", "score": 0.94},
+                   "Luiz Rojas": {"person_id": 2, "name": "luis rojas", "score": 0.94}}, f)
+
+    removed = remove_elections("2024-10-27", data_dir=data_dir)
+
+    assert removed["wp_politeia_people"] == 1
+    with open(match_path, encoding='utf-8') as f:
+        assert json.load(f) == {"Luis Rojas R.": 2}
+    with open(review_cache_path(match_path), encoding='utf-8') as f:
+        assert list(json.load(f)) == ["Luiz Rojas"]
@@ -0,0 +1,26 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from emol_capture import ResultCapture, payload_matches
+
+SANTIAGO = {"comuna": "Santiago", "candidatos": [{"nombre": "A", "votos": 10}], "validos": 10}
+NUNOA = {"comuna": "Ñuñoa", "candidatos": [{"nombre": "B", "votos": 7}], "validos": 7}
+
+def test_payload_matches_zone_id_in_url_or_name_in_body():
+    assert payload_matches("https://www.emol.com/r/13120.json", {}, "13120")
+    assert not payload_matches("https://www.emol.com/r/113120.json", {}, "13120")
+    assert payload_matches("https://www.emol.com/r/x.json", NUNOA, "13120", "ÑUÑOA")
+    assert not payload_matches("https://www.emol.com/r/x.json", SANTIAGO, "13120", "Ñuñoa")
+
+def test_stale_payload_is_not_returned_for_the_clicked_commune():
+    capture = ResultCapture(page=None)
+    capture.begin("13120", "Ñuñoa")
+    capture._store("http", "https://www.emol.com/r/13101.json", SANTIAGO)  # default view, still loading
+    assert capture.ignored == 1
+    assert asyncio.run(capture.wait_for_result(timeout=0.01)) is None
+
+    capture._store("http", "https://www.emol.com/r/13120.json", NUNOA)
+    result = asyncio.run(capture.wait_for_result(timeout=0.01))
+    assert [c["name"] for c in result["candidates"]] == ["B"]
@@ -0,0 +1,36 @@
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from partitions import PartitionStore
+
+def write_table(data_dir, table, rows, mode='w'):
+    with open(os.path.join(data_dir, f"{table}.csv"), mode, encoding='utf-8', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+def read_rows(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))[1:]
+
+def test_updated_rows_reach_the_partitions_without_a_rebuild(tmp_path, capsys):
+    data_dir = str(tmp_path)
+    write_table(data_dir, "wp_politeia_elections", [
+        ["id", "office_id", "jurisdiction_id", "election_date"], ["1", "1", "10", "2024-10-27"]])
+    write_table(data_dir, "wp_politeia_candidacies", [
+        ["id", "election_id", "person_id", "party_id", "votes", "elected"],
+        ["1", "1", "5", "2", "100", "1"], ["2", "1", "6", "3", "50", "0"]])
+    store = PartitionStore(data_dir)
+    store.split()
+
+    # A re-merge appends a row, then updates one partitioned row and removes another
+    write_table(data_dir, "wp_politeia_candidacies", [["3", "1", "7", "3", "20", "0"]], mode='a')
+    store.update_rows("wp_politeia_candidacies", {"1": {"votes": "120"}}, removed={"2"})
+    moved = PartitionStore(data_dir).sync()
+
+    assert "rebuilding" not in capsys.readouterr().out
+    assert moved["wp_politeia_candidacies"] == 1
+    partition = store.partition_path("1_2024-10-27", "wp_politeia_candidacies")
+    assert read_rows(partition) == [["1", "1", "5", "2", "120", "1"], ["3", "1", "7", "3", "20", "0"]]
+    assert read_rows(store.combined_path("wp_politeia_candidacies")) == read_rows(partition)
+    assert PartitionStore(data_dir).manifest["partitions"]["1_2024-10-27"]["tables"]["wp_politeia_candidacies"]["rows"] == 2
@@ -0,0 +1,45 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from person_resolver import PersonResolver, match_cache_path, name_tokens
+
+def test_spelling_only_match_on_two_token_name_is_not_merged(tmp_path):
+    resolver = PersonResolver(match_cache_path(str(tmp_path)))
+    resolver.add(776, "Christian Contreras")
+
+    assert resolver.resolve("Cristián Contreras") is None
+    assert "Cristián Contreras" not in resolver.matches
+    assert resolver.review["Cristián Contreras"]["person_id"] == 776
+
+    resolver.save_matches()
+    with open(tmp_path / ".person_matches.json", encoding="utf-8") as f:
+        assert "Cristián Contreras" not in json.load(f)
+    with open(tmp_path / ".person_review.json", encoding="utf-8") as f:
+        assert json.load(f)["Cristián Contreras"]["person_id"] == 776
+
+def test_spelling_match_with_maternal_surname_still_merges():
+    resolver = PersonResolver()
+    resolver.add(12, "María Valenzuela Soto")
+    assert resolver.resolve("María Valenzuella Soto") == 12
+
+def test_accent_and_case_variants_still_merge():
+    resolver = PersonResolver()
+    resolver.add(5, "Joaquín Lavín")
+    assert resolver.resolve("JOAQUIN LAVIN") == 5
+    assert resolver.resolve("Joaquín Lavín Infante") == 5
+
+def test_review_list_is_named_after_its_match_cache(tmp_path):
+    csv_side = PersonResolver(match_cache_path(str(tmp_path)))
+    sqlite_side = PersonResolver(str(tmp_path / "politeia.db.person_matches.json"))
+
+    assert csv_side.review_path() == str(tmp_path / ".person_review.json")
+    assert sqlite_side.review_path() == str(tmp_path / "politeia.db.person_review.json")
+
+def test_second_given_name_is_not_a_surname_block():
+    resolver = PersonResolver()
+    resolver.add(21, "Juan Pablo Pérez González")
+
+    assert 21 in resolver.candidates(name_tokens("Juan Pérez"))
+    assert 21 not in resolver.candidates(name_tokens("Pedro Pablo"))
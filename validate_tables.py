@@ -0,0 +1,176 @@
+"""
+Referential Integrity & Vote Consistency Checks
+Loads the eight master tables into numpy columns and checks them with
+array operations only (no per-row Python), so a full pass stays well under
+a second today and grows linearly with the row count:
+
+1. Primary keys: present and unique
+2. Foreign keys: every REFERENCES column in politeia_sqlite.SCHEMA resolves
+   (NOT NULL columns must also be filled), via a boolean "id exists" array
+   indexed by id instead of a join
+3. Votes: per election, the candidacies' votes add up to the result's
+   valid_votes; valid + blank + null matches total_votes; and
+   participation_rate is a percentage
+
+REQUIRES:
+pip install numpy
+
+Usage:
+    python3 validate_tables.py                  # data/*.csv
+    python3 validate_tables.py --from-sqlite    # data/politeia.db
+    python3 validate_tables.py --data-dir /tmp/data --samples 20
+"""
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from politeia_sqlite import (DATA_DIR, DEFAULT_DB, SCHEMA, SqliteStore, column_types, foreign_keys,
+                             table_columns, table_rows)
+
+VOTE_SUM_TOLERANCE = 0  # candidacy votes vs valid_votes (exact)
+TOTAL_TOLERANCE = 1  # valid + blank + null vs total_votes (rounding in the sources)
+PARTICIPATION_RANGE = (0.0, 100.0)
+SAMPLE_SIZE = 5  # offending ids shown per check
+
+Issue = namedtuple("Issue", ["check", "table", "count", "sample"])
+
+def to_numbers(values):
+    """Column of strings/numbers -> float64 array, NaN for empty values"""
+    array = np.asarray(values, dtype=object)
+    empty = (array == "") | (array == None)  # noqa: E711 (elementwise)
+    array[empty] = "nan"
+    return array.astype(np.float64)
+
+def load_columns(source=DATA_DIR):
+    """
+    {table: {column: float64 array}} for the INTEGER/REAL columns (text
+    columns aren't needed by any check). `source` is a data dir or a
+    SqliteStore.
+    """
+    tables = {}
+    for table in SCHEMA:
+        columns = table_columns(table)
+        types = column_types(table)
+        # One 2-D object array, sliced per column (much cheaper than zip(*rows))
+        matrix = np.array(list(table_rows(table, source)), dtype=object).reshape(-1, len(columns))
+        tables[table] = {c: to_numbers(matrix[:, i]) for i, c in enumerate(columns) if types[c] != "TEXT"}
+    return tables
+
+def id_lookup(ids):
+    """Boolean array where exists[i] is True for every id i in `ids`"""
+    ids = ids[~np.isnan(ids)].astype(np.int64)
+    exists = np.zeros(int(ids.max()) + 1 if ids.size else 1, dtype=bool)
+    exists[ids[ids >= 0]] = True
+    return exists
+
+def resolves(values, exists):
+    """Mask of values that are ids present in `exists` (NaN -> False)"""
+    filled = ~np.isnan(values)
+    ids = np.where(filled, values, -1).astype(np.int64)
+    in_range = (ids >= 0) & (ids < exists.size)
+    return filled & in_range & exists[np.clip(ids, 0, exists.size - 1)]
+
+def sample(ids, mask, size=SAMPLE_SIZE):
+    """First `size` ids of the rows in `mask`"""
+    return [int(i) for i in ids[mask & ~np.isnan(ids)][:size]]
+
+def check_primary_keys(tables, size=SAMPLE_SIZE):
+    issues = []
+    for table, columns in tables.items():
+        ids = columns["id"]
+        missing = np.isnan(ids)
+        if missing.any():
+            issues.append(Issue("id missing", table, int(missing.sum()), []))
+        present = ids[~missing].astype(np.int64)
+        if present.size:
+            counts = np.bincount(present[present >= 0])
+            duplicated = np.nonzero(counts > 1)[0]
+            if duplicated.size:
+                issues.append(Issue("duplicate id", table, int(duplicated.size), [int(i) for i in duplicated[:size]]))
+    return issues
+
+def check_foreign_keys(tables, size=SAMPLE_SIZE):
+    issues = []
+    exists = {table: id_lookup(columns["id"]) for table, columns in tables.items()}
+    for table, column, parent, not_null in foreign_keys():
+        values = tables[table][column]
+        filled = ~np.isnan(values)
+        broken = filled & ~resolves(values, exists[parent])
+        if broken.any():
+            issues.append(Issue(f"{column} -> {parent}.id", table, int(broken.sum()),
+                                sample(tables[table]["id"], broken, size)))
+        if not_null and not filled.all():
+            issues.append(Issue(f"{column} is empty", table, int((~filled).sum()),
+                                sample(tables[table]["id"], ~filled, size)))
+    return issues
+
+def check_votes(tables, size=SAMPLE_SIZE):
+    issues = []
+    results = tables["wp_politeia_election_results"]
+    candidacies = tables["wp_politeia_candidacies"]
+    result_ids = results["id"]
+
+    # Sum of candidacy votes per election id (one bincount, no grouping loop)
+    cand_elections = candidacies["election_id"]
+    counted = ~np.isnan(cand_elections) & (cand_elections >= 0)
+    election_ids = results["election_id"]
+    length = int(max(np.nanmax(cand_elections, initial=0), np.nanmax(election_ids, initial=0))) + 1
+    sums = np.bincount(cand_elections[counted].astype(np.int64),
+                       weights=np.nan_to_num(candidacies["votes"][counted]), minlength=length)
+    has_election = ~np.isnan(election_ids)
+    candidate_votes = np.where(has_election, sums[np.where(has_election, election_ids, 0).astype(np.int64)], np.nan)
+    valid = results["valid_votes"]
+    mismatch = has_election & ~(np.abs(candidate_votes - valid) <= VOTE_SUM_TOLERANCE)
+    if mismatch.any():
+        issues.append(Issue("candidacy votes != valid_votes", "wp_politeia_election_results",
+                            int(mismatch.sum()), sample(result_ids, mismatch, size)))
+
+    counted_total = valid + results["blank_votes"] + results["null_votes"]
+    off = ~(np.abs(counted_total - results["total_votes"]) <= TOTAL_TOLERANCE)
+    if off.any():
+        issues.append(Issue("valid + blank + null != total_votes", "wp_politeia_election_results",
+                            int(off.sum()), sample(result_ids, off, size)))
+
+    low, high = PARTICIPATION_RANGE
+    rate = results["participation_rate"]
+    out = ~((rate >= low) & (rate <= high))
+    if out.any():
+        issues.append(Issue(f"participation_rate outside {low:g}-{high:g}", "wp_politeia_election_results",
+                            int(out.sum()), sample(result_ids, out, size)))
+
+    shares = candidacies["vote_share"]
+    bad_share = ~np.isnan(shares) & ~((shares >= low) & (shares <= high))
+    if bad_share.any():
+        issues.append(Issue(f"vote_share outside {low:g}-{high:g}", "wp_politeia_candidacies",
+                            int(bad_share.sum()), sample(candidacies["id"], bad_share, size)))
+    return issues
+
+def validate(source=DATA_DIR, size=SAMPLE_SIZE, verbose=True):
+    """Runs every check; returns the list of Issues (empty = consistent)"""
+    start = time.perf_counter()
+    tables = load_columns(source)
+    loaded = time.perf_counter()
+    issues = check_primary_keys(tables, size) + check_foreign_keys(tables, size) + check_votes(tables, size)
+    checked = time.perf_counter()
+
+    if verbose:
+        rows = sum(len(columns["id"]) for columns in tables.values())
+        for issue in issues:
+            print(f"  ❌ {issue.table}: {issue.check} ({issue.count} rows, e.g. ids {issue.sample})")
+        if not issues:
+            print("  ✅ All keys resolve and all vote totals add up")
+        print(f"  {rows} rows: loaded in {loaded - start:.3f}s, checked in {checked - loaded:.3f}s")
+    return issues
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check keys and vote totals of the master tables")
+    parser.add_argument("--from-sqlite", action="store_true", help=f"Read {DEFAULT_DB} instead of the CSVs")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the master CSVs")
+    parser.add_argument("--samples", type=int, default=SAMPLE_SIZE, help="Offending ids to show per check")
+    args = parser.parse_args()
+
+    source = SqliteStore(DEFAULT_DB) if args.from_sqlite else args.data_dir
+    sys.exit(1 if validate(source, args.samples) else 0)
@@ -1,6 +1,8 @@
 import csv
 import os
 
+from validate_tables import validate
+
 DATA_DIR = "/Users/nicolas/Desktop/PoliteiaDB/data"
 
 REGIONS_TO_CHECK = [
@@ -65,6 +67,10 @@ def verify_data():
         elections_count = sum(1 for line in f) - 1
     print(f"  • Elections: {elections_count} (Communes)")
 
+    # 3. Keys and vote totals (validate_tables.py)
+    print("\n3. Integrity Checks:")
+    validate(DATA_DIR)
+
     print("\n" + "="*60)
 
 if __name__ == "__main__":